@@ -23,6 +23,8 @@
 import traceback
 import sys
 from edk2basetools.AutoGen.DataPipe import MemoryDataPipe
+from edk2basetools.AutoGen.FileHashStore import FileHashStore
+from edk2basetools.AutoGen.IncludeGraph import IncludeGraph
 import logging
 import time
 
@@ -33,6 +35,37 @@ def clearQ(q):
     except Empty:
         pass
 
+## Put the modules into the module queue in batches
+#
+#   The most expensive modules are queued first, and the cheap ones are grouped
+# so that a batch costs about the same as the others. Each worker pulls a whole
+# batch with one blocking get, and exits at the sentinel (None) queued for it
+# after all batches.
+#
+#   @param  module_queue    The queue the AutoGen workers pull from
+#   @param  module_list     The module tuples from PlatformAutoGen.GetAllModuleInfo
+#   @param  cost_of         Function which estimates the AutoGen cost of a module tuple
+#   @param  worker_num      The number of AutoGen workers
+#
+def PutModuleBatches(module_queue, module_list, cost_of, worker_num):
+    worker_num = max(worker_num, 1)
+    module_cost = sorted(((cost_of(m), m) for m in module_list), key=lambda item: item[0], reverse=True)
+    # a few batches per worker keeps them busy until the end of the queue
+    batch_cost = max(sum(cost for cost, _ in module_cost) // (worker_num * 4), 1)
+    batch = []
+    cost_sum = 0
+    for cost, m in module_cost:
+        batch.append(m)
+        cost_sum += cost
+        if cost_sum >= batch_cost:
+            module_queue.put(batch)
+            batch = []
+            cost_sum = 0
+    if batch:
+        module_queue.put(batch)
+    for _ in range(worker_num):
+        module_queue.put(None)
+
 class LogAgent(threading.Thread):
     def __init__(self,log_q,log_level,log_file=None):
         super(LogAgent,self).__init__()
@@ -103,6 +136,8 @@ def __init__(self,autogen_workers, feedback_q,error_event):
         self.feedback_q = feedback_q
         self.Status = True
         self.error_event = error_event
+        # {(module path, arch): AutoGen wall time in seconds}
+        self.ModuleTime = {}
     def run(self):
         try:
             fin_num = 0
@@ -110,11 +145,11 @@ def run(self):
                 badnews = self.feedback_q.get()
                 if badnews is None:
                     break
-                if badnews == "Done":
+                if isinstance(badnews, tuple):
+                    module_path, module_arch, module_time = badnews
+                    self.ModuleTime[(module_path, module_arch)] = module_time
+                elif badnews == "Done":
                     fin_num += 1
-                elif badnews == "QueueEmpty":
-                    EdkLogger.debug(EdkLogger.DEBUG_9, "Worker %s: %s" % (os.getpid(), badnews))
-                    self.TerminateWorkers()
                 else:
                     EdkLogger.debug(EdkLogger.DEBUG_9, "Worker %s: %s" % (os.getpid(), badnews))
                     self.Status = False
@@ -173,12 +208,12 @@ def GetPlatformMetaFile(self,filepath,root):
     def run(self):
         try:
             taskname = "Init"
-            with self.file_lock:
-                try:
-                    self.data_pipe = MemoryDataPipe()
-                    self.data_pipe.load(self.data_pipe_file_path)
-                except:
-                    self.feedback_q.put(taskname + ":" + "load data pipe %s failed." % self.data_pipe_file_path)
+            # the data pipe file is only mapped here, no need to serialize the loading by file_lock
+            try:
+                self.data_pipe = MemoryDataPipe()
+                self.data_pipe.load(self.data_pipe_file_path)
+            except:
+                self.feedback_q.put(taskname + ":" + "load data pipe %s failed." % self.data_pipe_file_path)
             EdkLogger.LogClientInitialize(self.log_q)
             loglevel = self.data_pipe.Get("LogLevel")
             if not loglevel:
@@ -204,6 +239,7 @@ def run(self):
             GlobalData.gDisableIncludePathCheck = False
             GlobalData.gFdfParser = self.data_pipe.Get("FdfParser")
             GlobalData.gDatabasePath = self.data_pipe.Get("DatabasePath")
+            GlobalData.gMetaFileCache = self.data_pipe.Get("MetaFileCache")
 
             GlobalData.gUseHashCache = self.data_pipe.Get("UseHashCache")
             GlobalData.gBinCacheSource = self.data_pipe.Get("BinCacheSource")
@@ -214,7 +250,11 @@ def run(self):
             GlobalData.gHashChainStatus = dict()
             GlobalData.gCMakeHashFile = dict()
             GlobalData.gModuleHashFile = dict()
-            GlobalData.gFileHashDict = dict()
+            GlobalData.gHashAlgorithm = self.data_pipe.Get("HashAlgorithm")
+            GlobalData.gFileHashCache = self.data_pipe.Get("FileHashCache")
+            GlobalData.gFileHashStore = FileHashStore(GlobalData.gFileHashCache, GlobalData.gHashAlgorithm)
+            GlobalData.gIncludeGraphFile = self.data_pipe.Get("IncludeGraphFile")
+            GlobalData.gIncludeGraph = IncludeGraph(GlobalData.gIncludeGraphFile)
             GlobalData.gEnableGenfdsMultiThread = self.data_pipe.Get("EnableGenfdsMultiThread")
             GlobalData.gPlatformFinalPcds = self.data_pipe.Get("gPlatformFinalPcds")
             GlobalData.file_lock = self.file_lock
@@ -226,84 +266,94 @@ def run(self):
                     pcd_id = ".".join((pcd_id,pcd_tuple[2]))
                 pcd_from_build_option.append("=".join((pcd_id,pcd_tuple[3])))
             GlobalData.BuildOptionPcd = pcd_from_build_option
-            module_count = 0
             FfsCmd = self.data_pipe.Get("FfsCommand")
             if FfsCmd is None:
                 FfsCmd = {}
             GlobalData.FfsCmd = FfsCmd
-            PlatformMetaFile = self.GetPlatformMetaFile(self.data_pipe.Get("P_Info").get("ActivePlatform"),
+            self.PlatformMetaFile = self.GetPlatformMetaFile(self.data_pipe.Get("P_Info").get("ActivePlatform"),
                                              self.data_pipe.Get("P_Info").get("WorkspaceDir"))
-            while True:
-                if self.error_event.is_set():
-                    break
-                module_count += 1
+            while not self.error_event.is_set():
                 try:
-                    module_file,module_root,module_path,module_basename,module_originalpath,module_arch,IsLib = self.module_queue.get_nowait()
+                    # block until a batch is available, but wake up now and then to check the error event
+                    batch = self.module_queue.get(timeout=1)
                 except Empty:
-                    EdkLogger.debug(EdkLogger.DEBUG_9, "Worker %s: %s" % (os.getpid(), "Fake Empty."))
-                    time.sleep(0.01)
                     continue
-                if module_file is None:
+                if batch is None:
                     EdkLogger.debug(EdkLogger.DEBUG_9, "Worker %s: %s" % (os.getpid(), "Worker get the last item in the queue."))
-                    self.feedback_q.put("QueueEmpty")
-                    time.sleep(0.01)
-                    continue
-
-                modulefullpath = os.path.join(module_root,module_file)
-                taskname = " : ".join((modulefullpath,module_arch))
-                module_metafile = PathClass(module_file,module_root)
-                if module_path:
-                    module_metafile.Path = module_path
-                if module_basename:
-                    module_metafile.BaseName = module_basename
-                if module_originalpath:
-                    module_metafile.OriginalPath = PathClass(module_originalpath,module_root)
-                arch = module_arch
-                target = self.data_pipe.Get("P_Info").get("Target")
-                toolchain = self.data_pipe.Get("P_Info").get("ToolChain")
-                Ma = ModuleAutoGen(self.Wa,module_metafile,target,toolchain,arch,PlatformMetaFile,self.data_pipe)
-                Ma.IsLibrary = IsLib
-                # SourceFileList calling sequence impact the makefile string sequence.
-                # Create cached SourceFileList here to unify its calling sequence for both
-                # CanSkipbyPreMakeCache and CreateCodeFile/CreateMakeFile.
-                RetVal = Ma.SourceFileList
-                if GlobalData.gUseHashCache and not GlobalData.gBinCacheDest and CommandTarget in [None, "", "all"]:
-                    try:
-                        CacheResult = Ma.CanSkipbyPreMakeCache()
-                    except:
-                        CacheResult = False
-                        self.feedback_q.put(taskname)
-
-                    if CacheResult:
-                        self.cache_q.put((Ma.MetaFile.Path, Ma.Arch, "PreMakeCache", True))
-                        continue
-                    else:
-                        self.cache_q.put((Ma.MetaFile.Path, Ma.Arch, "PreMakeCache", False))
-
-                Ma.CreateCodeFile(False)
-                Ma.CreateMakeFile(False,GenFfsList=FfsCmd.get((Ma.MetaFile.Path, Ma.Arch),[]))
-                Ma.CreateAsBuiltInf()
-                if GlobalData.gBinCacheSource and CommandTarget in [None, "", "all"]:
-                    try:
-                        CacheResult = Ma.CanSkipbyMakeCache()
-                    except:
-                        CacheResult = False
-                        self.feedback_q.put(taskname)
-
-                    if CacheResult:
-                        self.cache_q.put((Ma.MetaFile.Path, Ma.Arch, "MakeCache", True))
-                        continue
-                    else:
-                        self.cache_q.put((Ma.MetaFile.Path, Ma.Arch, "MakeCache", False))
+                    break
+                for module_info in batch:
+                    if self.error_event.is_set():
+                        break
+                    taskname = " : ".join((os.path.join(module_info[1],module_info[0]),module_info[5]))
+                    start_time = time.perf_counter()
+                    self.AutoGenModule(module_info, taskname, CommandTarget, FfsCmd)
+                    self.feedback_q.put((module_info[2], module_info[5], time.perf_counter() - start_time))
 
         except Exception as e:
             EdkLogger.debug(EdkLogger.DEBUG_9, "Worker %s: %s" % (os.getpid(), str(e)))
             self.feedback_q.put(taskname)
         finally:
+            if GlobalData.gIncludeGraph is not None:
+                GlobalData.gIncludeGraph.SaveWorkerEntries()
+            if self.data_pipe is not None:
+                self.data_pipe.close()
             EdkLogger.debug(EdkLogger.DEBUG_9, "Worker %s: %s" % (os.getpid(), "Done"))
             self.feedback_q.put("Done")
             self.cache_q.put("CacheDone")
 
+    ## Generate the code and makefile of one module
+    #
+    #   @param  module_info     The module tuple from PlatformAutoGen.GetAllModuleInfo
+    #   @param  taskname        The name reported to manager if the binary cache check fails
+    #   @param  CommandTarget   The target of build command
+    #   @param  FfsCmd          The FFS generation commands of the modules
+    #
+    def AutoGenModule(self, module_info, taskname, CommandTarget, FfsCmd):
+        module_file,module_root,module_path,module_basename,module_originalpath,module_arch,IsLib = module_info
+        module_metafile = PathClass(module_file,module_root)
+        if module_path:
+            module_metafile.Path = module_path
+        if module_basename:
+            module_metafile.BaseName = module_basename
+        if module_originalpath:
+            module_metafile.OriginalPath = PathClass(module_originalpath,module_root)
+        arch = module_arch
+        target = self.data_pipe.Get("P_Info").get("Target")
+        toolchain = self.data_pipe.Get("P_Info").get("ToolChain")
+        Ma = ModuleAutoGen(self.Wa,module_metafile,target,toolchain,arch,self.PlatformMetaFile,self.data_pipe)
+        Ma.IsLibrary = IsLib
+        # SourceFileList calling sequence impact the makefile string sequence.
+        # Create cached SourceFileList here to unify its calling sequence for both
+        # CanSkipbyPreMakeCache and CreateCodeFile/CreateMakeFile.
+        RetVal = Ma.SourceFileList
+        if GlobalData.gUseHashCache and not GlobalData.gBinCacheDest and CommandTarget in [None, "", "all"]:
+            try:
+                CacheResult = Ma.CanSkipbyPreMakeCache()
+            except:
+                CacheResult = False
+                self.feedback_q.put(taskname)
+
+            if CacheResult:
+                self.cache_q.put((Ma.MetaFile.Path, Ma.Arch, "PreMakeCache", True))
+                return
+            else:
+                self.cache_q.put((Ma.MetaFile.Path, Ma.Arch, "PreMakeCache", False))
+
+        Ma.CreateCodeFile(False)
+        Ma.CreateMakeFile(False,GenFfsList=FfsCmd.get((Ma.MetaFile.Path, Ma.Arch),[]))
+        Ma.CreateAsBuiltInf()
+        if GlobalData.gBinCacheSource and CommandTarget in [None, "", "all"]:
+            try:
+                CacheResult = Ma.CanSkipbyMakeCache()
+            except:
+                CacheResult = False
+                self.feedback_q.put(taskname)
+
+            if CacheResult:
+                self.cache_q.put((Ma.MetaFile.Path, Ma.Arch, "MakeCache", True))
+            else:
+                self.cache_q.put((Ma.MetaFile.Path, Ma.Arch, "MakeCache", False))
+
     def printStatus(self):
         print("Processs ID: %d Run %d modules in AutoGen " % (os.getpid(),len(AutoGen.Cache())))
         print("Processs ID: %d Run %d modules in AutoGenInfo " % (os.getpid(),len(AutoGenInfo.GetCache())))
@@ -0,0 +1,220 @@
+## @file
+# Content-addressed storage of the module build results in binary cache
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+import os
+import json
+import shutil
+
+import edk2basetools.Common.EdkLogger as EdkLogger
+import edk2basetools.Common.GlobalData as GlobalData
+from edk2basetools.Common.LongFilePathSupport import LongFilePath, OpenLongFilePath as open
+from edk2basetools.Common.Misc import CreateDirectory
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+#
+# The output files of all modules are kept once per content in blob directory
+# of the cache, named by their digest. A module build result is a manifest
+# file listing the digest, the output directory kind and the relative path of
+# each output file. The kinds of output directory are:
+#
+#   B   The build directory of module
+#   F   The FFS output directory of module
+#
+BLOB_DIR = "Blobs"
+MANIFEST_EXT = ".manifest"
+
+# ioctl request cloning a file on Linux file systems supporting reflink
+_FICLONE_ = 0x40049409
+
+def _BlobPath(CacheRoot, Digest):
+    return os.path.join(CacheRoot, BLOB_DIR, Digest[:2], Digest)
+
+## Copy a file, sharing the data blocks with source file if file system allows
+def _CloneFile(SrcFile, DstFile):
+    if fcntl is not None:
+        try:
+            with open(SrcFile, 'rb') as SrcFd, open(DstFile, 'wb') as DstFd:
+                fcntl.ioctl(DstFd.fileno(), _FICLONE_, SrcFd.fileno())
+            shutil.copystat(LongFilePath(SrcFile), LongFilePath(DstFile))
+            return
+        except (IOError, OSError):
+            pass
+    shutil.copy2(LongFilePath(SrcFile), LongFilePath(DstFile))
+
+## Replace a file by a clone of another one, in an atomic way
+def _ReplaceFile(SrcFile, DstFile):
+    TempFile = "%s.%d.tmp" % (DstFile, os.getpid())
+    try:
+        _CloneFile(SrcFile, TempFile)
+        os.replace(LongFilePath(TempFile), LongFilePath(DstFile))
+    finally:
+        if os.path.exists(LongFilePath(TempFile)):
+            os.remove(LongFilePath(TempFile))
+
+## Read the (digest, kind, relative path) entries of a manifest file
+def _ReadManifest(ManifestFile):
+    EntryList = []
+    with open(ManifestFile, 'r') as Fd:
+        for Line in Fd:
+            Digest, Kind, RelativePath = Line.rstrip('\n').split(' ', 2)
+            EntryList.append((Digest, Kind, RelativePath))
+    return EntryList
+
+## Save the output files of a module build into cache
+#
+# @param CacheRoot          The root directory of binary cache
+# @param ManifestFile       The manifest file of the module build result
+# @param FileList           List of (kind, relative path, file path) of the output files
+#
+# @retval True              The build result is saved
+# @retval False             Any output file cannot be saved
+#
+def SaveModuleFiles(CacheRoot, ManifestFile, FileList):
+    EntryList = []
+    for Kind, RelativePath, File in FileList:
+        Digest = GlobalData.gFileHashStore.Digest(File)
+        if Digest is None:
+            EdkLogger.quiet("[cache warning]: fail to read file:%s" % File)
+            return False
+        BlobFile = _BlobPath(CacheRoot, Digest)
+        if not os.path.exists(LongFilePath(BlobFile)):
+            CreateDirectory(os.path.dirname(BlobFile))
+            try:
+                _ReplaceFile(File, BlobFile)
+            except (IOError, OSError) as X:
+                EdkLogger.quiet("[cache warning]: fail to copy file:%s to cache: %s" % (File, X))
+                return False
+        EntryList.append("%s %s %s\n" % (Digest, Kind, RelativePath.replace(os.sep, '/')))
+
+    CreateDirectory(os.path.dirname(ManifestFile))
+    TempFile = "%s.%d.tmp" % (ManifestFile, os.getpid())
+    try:
+        with open(TempFile, 'w') as Fd:
+            Fd.writelines(EntryList)
+        os.replace(LongFilePath(TempFile), LongFilePath(ManifestFile))
+    except (IOError, OSError) as X:
+        EdkLogger.quiet("[cache warning]: fail to save manifest file:%s: %s" % (ManifestFile, X))
+        if os.path.exists(LongFilePath(TempFile)):
+            os.remove(LongFilePath(TempFile))
+        return False
+    return True
+
+## Restore the output files of a module build from cache
+#
+#   Output files having the same content already are not touched, so that
+# their time stamps are kept.
+#
+# @param CacheRoot          The root directory of binary cache
+# @param ManifestFile       The manifest file of the module build result
+# @param OutputDirs         The dict of output directory kind to directory path
+#
+# @retval True              All output files are restored
+# @retval False             The build result is not in cache, or is broken
+#
+def RestoreModuleFiles(CacheRoot, ManifestFile, OutputDirs):
+    try:
+        EntryList = _ReadManifest(ManifestFile)
+    except (IOError, OSError, ValueError):
+        return False
+    for Digest, Kind, RelativePath in EntryList:
+        BlobFile = _BlobPath(CacheRoot, Digest)
+        DstFile = os.path.join(OutputDirs[Kind], os.path.normpath(RelativePath))
+        if GlobalData.gFileHashStore.Digest(DstFile) == Digest:
+            continue
+        CreateDirectory(os.path.dirname(DstFile))
+        try:
+            _ReplaceFile(BlobFile, DstFile)
+        except (IOError, OSError) as X:
+            EdkLogger.quiet("[cache error]: fail to restore file:%s from cache: %s" % (DstFile, X))
+            return False
+    # the modification time of manifest tells the last use of build result
+    try:
+        os.utime(LongFilePath(ManifestFile), None)
+    except OSError:
+        pass
+    return True
+
+## Evict the least recently used build results to keep cache in size limit
+#
+#   The blobs not referenced by any manifest are removed, and the module
+# hash pairs of the evicted build results are dropped.
+#
+# @param CacheRoot          The root directory of binary cache
+# @param SizeLimit          The maximum size of blobs in bytes, or None
+#
+def CollectGarbage(CacheRoot, SizeLimit=None):
+    ManifestList = []
+    HashPairList = []
+    for Root, Dirs, Files in os.walk(CacheRoot):
+        if Root == CacheRoot and BLOB_DIR in Dirs:
+            Dirs.remove(BLOB_DIR)
+        for File in Files:
+            FilePath = os.path.join(Root, File)
+            if File.endswith(MANIFEST_EXT):
+                ManifestList.append((os.path.getmtime(FilePath), FilePath))
+            elif File.endswith(".ModuleHashPair"):
+                HashPairList.append(FilePath)
+
+    BlobSize = {}
+    BlobRoot = os.path.join(CacheRoot, BLOB_DIR)
+    for Root, Dirs, Files in os.walk(BlobRoot):
+        for File in Files:
+            BlobSize[File] = os.path.getsize(os.path.join(Root, File))
+
+    # keep the most recently used build results until size limit is reached
+    KeptBlobs = set()
+    KeptSize = 0
+    Evicted = 0
+    Full = False
+    for MTime, ManifestFile in sorted(ManifestList, reverse=True):
+        try:
+            DigestSet = set(Entry[0] for Entry in _ReadManifest(ManifestFile))
+        except (IOError, OSError, ValueError):
+            DigestSet = None
+        if not Full and DigestSet is not None and all(Digest in BlobSize for Digest in DigestSet):
+            NewSize = sum(BlobSize[Digest] for Digest in DigestSet - KeptBlobs)
+            if SizeLimit is None or KeptSize + NewSize <= SizeLimit:
+                KeptBlobs.update(DigestSet)
+                KeptSize += NewSize
+                continue
+            Full = True
+        os.remove(ManifestFile)
+        Evicted += 1
+
+    FreedSize = 0
+    for Digest, Size in BlobSize.items():
+        if Digest not in KeptBlobs:
+            os.remove(_BlobPath(CacheRoot, Digest))
+            FreedSize += Size
+    if os.path.isdir(BlobRoot):
+        for SubDir in os.listdir(BlobRoot):
+            if not os.listdir(os.path.join(BlobRoot, SubDir)):
+                os.rmdir(os.path.join(BlobRoot, SubDir))
+
+    # drop the hash pairs whose build result is gone
+    for HashPairFile in HashPairList:
+        ModuleCacheDir = os.path.dirname(HashPairFile)
+        try:
+            with open(HashPairFile, 'r') as Fd:
+                ModuleHashPairList = json.load(Fd)
+        except (IOError, OSError, ValueError):
+            continue
+        NewList = [Pair for Pair in ModuleHashPairList
+                   if os.path.exists(os.path.join(ModuleCacheDir, Pair[1] + MANIFEST_EXT))]
+        if len(NewList) != len(ModuleHashPairList):
+            with open(HashPairFile, 'w') as Fd:
+                json.dump(NewList, Fd, indent=2)
+
+    EdkLogger.quiet("[cache gc]: %d build results evicted, %d bytes freed, %d bytes kept in %s" %
+                    (Evicted, FreedSize, KeptSize, CacheRoot))
@@ -9,7 +9,9 @@
 from edk2basetools.Workspace.WorkspaceCommon import GetModuleLibInstances
 import edk2basetools.Common.GlobalData as GlobalData
 import os
+import mmap
 import pickle
+import struct
 from pickle import HIGHEST_PROTOCOL
 from edk2basetools.Common import EdkLogger
 
@@ -36,26 +38,87 @@ def __init__(self, BuildDir=None):
         self.data_container = {}
         self.BuildDir = BuildDir
         self.dump_file = ""
+        # mapped dump file and the location of each value not decoded yet
+        self.mapped_file = None
+        self.pending_keys = {}
 
+## Data pipe between the build process and AutoGen workers
+#
+#   The dump file has a header, an index of keys and the separately pickled
+# value of each key:
+#
+#       MAGIC | size of index (8 bytes) | pickled {key: (offset, size)} | values
+#
+#   The file is written once by the build process. Each worker maps it read-only,
+# so that the pages are shared by all workers, and a value is only unpickled when
+# it is asked by Get() for the first time. The mapping is kept until close(),
+# which the worker calls when it exits.
+#
 class MemoryDataPipe(DataPipe):
+    _MAGIC_ = b'EDK2DATAPIPE\x00\x00\x00\x01'
+    _INDEX_SIZE_ = struct.Struct('<Q')
 
     def Get(self,key):
+        if key in self.pending_keys:
+            offset, size = self.pending_keys.pop(key)
+            self.data_container[key] = pickle.loads(self.mapped_file[offset:offset + size])
         return self.data_container.get(key)
 
     def dump(self,file_path):
         self.dump_file = file_path
+        index = {}
+        values = []
+        offset = 0
+        for key, value in self.DataContainer.items():
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            index[key] = (offset, len(data))
+            offset += len(data)
+            values.append(data)
+        index_data = pickle.dumps(index, pickle.HIGHEST_PROTOCOL)
         with open(file_path,'wb') as fd:
-            pickle.dump(self.data_container,fd,pickle.HIGHEST_PROTOCOL)
+            fd.write(self._MAGIC_)
+            fd.write(self._INDEX_SIZE_.pack(len(index_data)))
+            fd.write(index_data)
+            for data in values:
+                fd.write(data)
 
     def load(self,file_path):
+        self.close()
         with open(file_path,'rb') as fd:
-            self.data_container = pickle.load(fd)
+            self.mapped_file = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        start = len(self._MAGIC_)
+        if self.mapped_file[:start] != self._MAGIC_:
+            raise ValueError("%s is not a data pipe file" % file_path)
+        index_size, = self._INDEX_SIZE_.unpack_from(self.mapped_file, start)
+        start += self._INDEX_SIZE_.size
+        index = pickle.loads(self.mapped_file[start:start + index_size])
+        start += index_size
+        self.data_container = {}
+        self.pending_keys = {key: (start + offset, size) for key, (offset, size) in index.items()}
+
+    ## Release the mapped file, the values not got yet are dropped
+    def close(self):
+        self.pending_keys = {}
+        if self.mapped_file is not None:
+            self.mapped_file.close()
+            self.mapped_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     @property
     def DataContainer(self):
+        for key in list(self.pending_keys):
+            self.Get(key)
         return self.data_container
     @DataContainer.setter
     def DataContainer(self,data):
+        # the values set replace the ones in mapped file
+        for key in data:
+            self.pending_keys.pop(key, None)
         self.data_container.update(data)
 
     def FillData(self,PlatformInfo):
@@ -158,6 +221,8 @@ def FillData(self,PlatformInfo):
 
         self.DataContainer = {"DatabasePath":GlobalData.gDatabasePath}
 
+        self.DataContainer = {"MetaFileCache":GlobalData.gMetaFileCache}
+
         self.DataContainer = {"FdfParser": True if GlobalData.gFdfParser else False}
 
         self.DataContainer = {"LogLevel": EdkLogger.GetLevel()}
@@ -168,6 +233,12 @@ def FillData(self,PlatformInfo):
 
         self.DataContainer = {"BinCacheDest":GlobalData.gBinCacheDest}
 
+        self.DataContainer = {"HashAlgorithm":GlobalData.gHashAlgorithm}
+
+        self.DataContainer = {"FileHashCache":GlobalData.gFileHashCache}
+
+        self.DataContainer = {"IncludeGraphFile":GlobalData.gIncludeGraphFile}
+
         self.DataContainer = {"EnableGenfdsMultiThread":GlobalData.gEnableGenfdsMultiThread}
 
         self.DataContainer = {"gPlatformFinalPcds":GlobalData.gPlatformFinalPcds}
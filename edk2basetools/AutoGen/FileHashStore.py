@@ -0,0 +1,125 @@
+## @file
+# Store of the file digests used by the hash-based binary cache
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+import hashlib
+import threading
+
+from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
+from edk2basetools.Common.PersistentStore import FileStamp, LoadStore, SaveStore, StableEntries
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+def _Blake2b(Data=b''):
+    return hashlib.blake2b(Data, digest_size=16)
+
+## Digest algorithms for the binary cache
+#
+#   All of them give 32 hex digits, as the hash chain file names require.
+#
+HASH_ALGORITHMS = {
+    'md5'       : hashlib.md5,
+    'blake2b'   : _Blake2b,
+}
+if xxhash is not None:
+    HASH_ALGORITHMS['xxh128'] = xxhash.xxh3_128
+
+## Process-wide store of file digests
+#
+#   A file is read and hashed only once as long as its size, time stamp and
+# inode are unchanged, no matter how many modules depend on it. The digests
+# can be kept in a file across build invocations.
+#
+# @param StoreFile          Path of the file keeping the digests, or None
+# @param Algorithm          Name of the digest algorithm in HASH_ALGORITHMS
+#
+class FileHashStore(object):
+    # bump it whenever the layout of entries changes
+    _VERSION_ = 1
+    # size of the chunks files are read in
+    _CHUNK_SIZE_ = 1024 * 1024
+
+    def __init__(self, StoreFile=None, Algorithm='md5'):
+        self.StoreFile = StoreFile
+        self.Algorithm = Algorithm
+        self._NewHash = HASH_ALGORITHMS[Algorithm]
+        self._Entries = None
+        self._Updated = False
+        self._Lock = threading.Lock()
+
+    ## Create a hash object of the algorithm of this store
+    def NewHash(self, Data=b''):
+        return self._NewHash(Data)
+
+    ## Load the digests saved by previous build
+    def _Load(self):
+        self._Entries = LoadStore(self.StoreFile, (self._VERSION_, self.Algorithm), "file hash store") or {}
+
+    ## Get the hex digest of a file
+    #
+    # @param FilePath:   Path of the file
+    #
+    # @retval str        The hex digest of file content
+    # @retval None       The file doesn't exist or cannot be read
+    #
+    def Digest(self, FilePath):
+        if self._Entries is None:
+            with self._Lock:
+                if self._Entries is None:
+                    self._Load()
+        Stamp = FileStamp(FilePath)
+        if Stamp is None:
+            return None
+        Entry = self._Entries.get(FilePath)
+        if Entry is not None and Entry[0] == Stamp:
+            return Entry[1]
+        Hash = self._NewHash()
+        try:
+            with open(FilePath, 'rb') as Fd:
+                for Chunk in iter(lambda: Fd.read(self._CHUNK_SIZE_), b''):
+                    Hash.update(Chunk)
+        except IOError:
+            return None
+        Digest = Hash.hexdigest()
+        self._Entries[FilePath] = (Stamp, Digest)
+        self._Updated = True
+        return Digest
+
+    ## Save the digests to store file
+    def Save(self):
+        if not self.StoreFile or not self._Updated:
+            return
+        with self._Lock:
+            if SaveStore(self.StoreFile, (self._VERSION_, self.Algorithm), StableEntries(self._Entries), "file hash store"):
+                self._Updated = False
+
+## Save a hash chain file
+#
+#   Each line holds the hex digest and the path of a file, so that the chain
+# can be verified line by line, stopping at the first changed file.
+#
+# @param HashChainFile      Path of the hash chain file
+# @param FileList           List of (file path, hex digest)
+#
+def SaveHashChain(HashChainFile, FileList):
+    with open(HashChainFile, 'w') as Fd:
+        Fd.writelines("%s %s\n" % (Digest, File) for File, Digest in FileList)
+
+## Iterate the (file path, hex digest) pairs of a hash chain file
+#
+# @param HashChainFile      Path of the hash chain file
+#
+def IterHashChain(HashChainFile):
+    with open(HashChainFile, 'r') as Fd:
+        for Line in Fd:
+            Digest, File = Line.rstrip('\n').split(' ', 1)
+            yield File, Digest
@@ -30,8 +30,6 @@
 ## Regular expression for matching macro used in header file inclusion
 gMacroPattern = re.compile("([_A-Z][_A-Z0-9]*)[ \t]*\\((.+)\\)", re.UNICODE)
 
-gIsFileMap = {}
-
 ## pattern for include style in Edk.x code
 gProtocolDefinition = "Protocol/%(HeaderKey)s/%(HeaderKey)s.h"
 gGuidDefinition = "Guid/%(HeaderKey)s/%(HeaderKey)s.h"
@@ -1611,6 +1609,10 @@ def _TemplateDict(self):
             ExtraOption += " -c"
         if not GlobalData.gEnableGenfdsMultiThread:
             ExtraOption += " --no-genfds-multi-thread"
+        if GlobalData.gEnableGenfdsInProcess:
+            ExtraOption += " --genfds-in-process"
+        if GlobalData.gThreadNumber:
+            ExtraOption += " -n %d" % GlobalData.gThreadNumber
         if GlobalData.gIgnoreSource:
             ExtraOption += " --ignore-sources"
 
@@ -1700,9 +1702,10 @@ def GetDependencyList(AutoGenObject, FileCache, File, ForceList, SearchPathList)
     FileStack = [File] + ForceList
     DependencySet = set()
 
-    if AutoGenObject.Arch not in gDependencyDatabase:
-        gDependencyDatabase[AutoGenObject.Arch] = {}
-    DepDb = gDependencyDatabase[AutoGenObject.Arch]
+    IncGraph = GlobalData.gIncludeGraph
+    if IncGraph is None:
+        from edk2basetools.AutoGen.IncludeGraph import IncludeGraph
+        IncGraph = GlobalData.gIncludeGraph = IncludeGraph()
 
     while len(FileStack) > 0:
         F = FileStack.pop()
@@ -1716,60 +1719,23 @@ def GetDependencyList(AutoGenObject, FileCache, File, ForceList, SearchPathList)
             DependencySet.update(FullPathDependList)
             continue
 
-        CurrentFileDependencyList = []
-        if F in DepDb:
-            CurrentFileDependencyList = DepDb[F]
-        else:
-            try:
-                Fd = open(F.Path, 'rb')
-                FileContent = Fd.read()
-                Fd.close()
-            except BaseException as X:
-                EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=F.Path + "\n\t" + str(X))
-            if len(FileContent) == 0:
-                continue
-            try:
-                if FileContent[0] == 0xff or FileContent[0] == 0xfe:
-                    FileContent = FileContent.decode('utf-16')
-                else:
-                    FileContent = FileContent.decode()
-            except:
-                # The file is not txt file. for example .mcb file
-                continue
-            IncludedFileList = gIncludePattern.findall(FileContent)
-
-            for Inc in IncludedFileList:
-                Inc = Inc.strip()
-                # if there's macro used to reference header file, expand it
-                HeaderList = gMacroPattern.findall(Inc)
-                if len(HeaderList) == 1 and len(HeaderList[0]) == 2:
-                    HeaderType = HeaderList[0][0]
-                    HeaderKey = HeaderList[0][1]
-                    if HeaderType in gIncludeMacroConversion:
-                        Inc = gIncludeMacroConversion[HeaderType] % {"HeaderKey" : HeaderKey}
-                    else:
-                        # not known macro used in #include, always build the file by
-                        # returning a empty dependency
-                        FileCache[File] = []
-                        return []
-                Inc = os.path.normpath(Inc)
-                CurrentFileDependencyList.append(Inc)
-            DepDb[F] = CurrentFileDependencyList
+        CurrentFileDependencyList = IncGraph.GetIncludeList(F.Path)
+        if CurrentFileDependencyList is None:
+            # not known macro used in #include, always build the file by
+            # returning a empty dependency
+            FileCache[File] = []
+            return []
+        if len(CurrentFileDependencyList) == 0:
+            continue
 
         CurrentFilePath = F.Dir
         PathList = [CurrentFilePath] + SearchPathList
         for Inc in CurrentFileDependencyList:
             for SearchPath in PathList:
                 FilePath = os.path.join(SearchPath, Inc)
-                if FilePath in gIsFileMap:
-                    if not gIsFileMap[FilePath]:
-                        continue
                 # If isfile is called too many times, the performance is slow down.
-                elif not os.path.isfile(FilePath):
-                    gIsFileMap[FilePath] = False
+                if not IncGraph.IsFile(FilePath):
                     continue
-                else:
-                    gIsFileMap[FilePath] = True
                 FilePath = PathClass(FilePath)
                 FullPathDependList.append(FilePath)
                 if FilePath not in DependencySet:
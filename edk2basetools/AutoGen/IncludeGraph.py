@@ -0,0 +1,123 @@
+## @file
+# Workspace-wide index of the files included and string tokens referenced by source files
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+import os
+
+import edk2basetools.Common.EdkLogger as EdkLogger
+from edk2basetools.Common.BuildToolError import FILE_OPEN_FAILURE
+from edk2basetools.Common.LongFilePathSupport import LongFilePath, OpenLongFilePath as open
+from edk2basetools.Common.PersistentStore import FileEntryStore
+from edk2basetools.AutoGen.GenMake import gIncludePattern, gMacroPattern, gIncludeMacroConversion
+from edk2basetools.AutoGen.StrGather import STRING_TOKEN
+
+## Index of the #include lists and string tokens of files, shared by all modules and arches
+#
+#   The raw #include list of a file, and the names of the strings it references
+# with STRING_TOKEN(), are scanned only once as long as the file is unchanged.
+# The index is loaded from its store file by the main process and every
+# AutoGen worker. A worker saves the entries it adds to a file of its own,
+# which the main process merges into the store at the end of build.
+#
+#   Existence of the files in search paths is checked against a cache of
+# directory listings, instead of probing each search path for each include.
+#
+# @param StoreFile          Path of the file keeping the index, or None
+#
+class IncludeGraph(FileEntryStore):
+    # bump it whenever the layout of entries changes
+    _VERSION_ = 3
+    _NAME_ = 'include graph'
+
+    def __init__(self, StoreFile=None):
+        FileEntryStore.__init__(self, StoreFile)
+        self._DirCache = {}
+
+    ## Get the raw #include list of a file
+    #
+    #   The macros of known form used in #include are expanded, and the paths
+    # are normalized but not resolved against any search path.
+    #
+    # @param FilePath:   Path of the file
+    #
+    # @retval list       The included file names. Empty for empty or binary file
+    # @retval None       An unknown macro is used in #include
+    #
+    def GetIncludeList(self, FilePath):
+        return self.GetEntry(FilePath)[1]
+
+    ## Get the names of the strings a file references with STRING_TOKEN()
+    #
+    # @param FilePath:   Path of the file
+    #
+    # @retval tuple      The string names. Empty for binary file
+    #
+    def GetStringTokenList(self, FilePath):
+        return self.GetEntry(FilePath)[2]
+
+    def _GetFileEntry(self, FilePath, Stamp):
+        try:
+            with open(FilePath, 'rb') as Fd:
+                FileContent = Fd.read()
+        except BaseException as X:
+            EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=FilePath + "\n\t" + str(X))
+        FileContent = self._DecodeFile(FileContent)
+        if FileContent is None:
+            return (Stamp, [], ())
+        # the names of strings are kept in the order they are first referenced
+        return (Stamp, self._ParseIncludeList(FileContent),
+                tuple(dict.fromkeys(STRING_TOKEN.findall(FileContent))))
+
+    @staticmethod
+    def _DecodeFile(FileContent):
+        if len(FileContent) == 0:
+            return ''
+        try:
+            if FileContent[0] == 0xff or FileContent[0] == 0xfe:
+                return FileContent.decode('utf-16')
+            return FileContent.decode()
+        except:
+            # The file is not txt file. for example .mcb file
+            return None
+
+    @staticmethod
+    def _ParseIncludeList(FileContent):
+        IncludeList = []
+        for Inc in gIncludePattern.findall(FileContent):
+            Inc = Inc.strip()
+            # if there's macro used to reference header file, expand it
+            HeaderList = gMacroPattern.findall(Inc)
+            if len(HeaderList) == 1 and len(HeaderList[0]) == 2:
+                HeaderType = HeaderList[0][0]
+                HeaderKey = HeaderList[0][1]
+                if HeaderType in gIncludeMacroConversion:
+                    Inc = gIncludeMacroConversion[HeaderType] % {"HeaderKey" : HeaderKey}
+                else:
+                    return None
+            IncludeList.append(os.path.normpath(Inc))
+        return IncludeList
+
+    ## Check if a file exists, using the cached listing of its directory
+    #
+    # @param FilePath:   Path of the file
+    #
+    def IsFile(self, FilePath):
+        Dir, Name = os.path.split(os.path.normpath(FilePath))
+        FileSet = self._DirCache.get(Dir)
+        if FileSet is None:
+            FileSet = set()
+            try:
+                with os.scandir(LongFilePath(Dir)) as DirEntries:
+                    for DirEntry in DirEntries:
+                        if DirEntry.is_file():
+                            FileSet.add(os.path.normcase(DirEntry.name))
+            except OSError:
+                pass
+            self._DirCache[Dir] = FileSet
+        return os.path.normcase(Name) in FileSet
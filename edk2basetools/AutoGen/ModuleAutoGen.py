@@ -15,7 +15,6 @@
 from edk2basetools.Workspace.WorkspaceCommon import OrderedListDict
 import os.path as path
 import copy
-import hashlib
 from . import InfSectionParser
 from . import GenC
 from . import GenMake
@@ -26,6 +25,8 @@
 from .GenPcdDb import CreatePcdDatabaseCode
 from edk2basetools.Common.caching import cached_class_function
 from edk2basetools.AutoGen.ModuleAutoGenHelper import PlatformInfo,WorkSpaceInfo
+from edk2basetools.AutoGen.FileHashStore import SaveHashChain, IterHashChain
+from edk2basetools.AutoGen.BinaryCache import SaveModuleFiles, RestoreModuleFiles, MANIFEST_EXT
 import json
 import tempfile
 
@@ -1691,11 +1692,7 @@ def CopyModuleToCache(self):
 
         # Create Cache destination dirs
         FileDir = path.join(GlobalData.gBinCacheDest, self.PlatformInfo.OutputDir, self.BuildTarget + "_" + self.ToolChain, self.Arch, self.SourceDir, self.MetaFile.BaseName)
-        FfsDir = path.join(GlobalData.gBinCacheDest, self.PlatformInfo.OutputDir, self.BuildTarget + "_" + self.ToolChain, TAB_FV_DIRECTORY, "Ffs", self.Guid + self.Name)
-        CacheFileDir = path.join(FileDir, MakeHashStr)
-        CacheFfsDir = path.join(FfsDir, MakeHashStr)
-        CreateDirectory (CacheFileDir)
-        CreateDirectory (CacheFfsDir)
+        CreateDirectory (FileDir)
 
         # Create ModuleHashPair file to support multiple version cache together
         ModuleHashPair = path.join(FileDir, self.Name + ".ModuleHashPair")
@@ -1708,13 +1705,17 @@ def CopyModuleToCache(self):
             with open(ModuleHashPair, 'w') as f:
                 json.dump(ModuleHashPairList, f, indent=2)
 
-        # Copy files to Cache destination dirs
+        # Copy hash files to Cache destination dirs, and save the build
+        # result into the content-addressed store of cache
         if not self.OutputFile:
             Ma = self.BuildDatabase[self.MetaFile, self.Arch, self.BuildTarget, self.ToolChain]
             self.OutputFile = Ma.Binaries
+        OutputFileList = []
         for File in self.OutputFile:
+            if os.path.isdir(File):
+                continue
             if File.startswith(os.path.abspath(self.FfsOutputDir)+os.sep):
-                self.CacheCopyFile(CacheFfsDir, self.FfsOutputDir, File)
+                OutputFileList.append(('F', os.path.relpath(File, self.FfsOutputDir), File))
             else:
                 if  self.Name + ".autogen.hash." in File or \
                     self.Name + ".autogen.hashchain." in File or \
@@ -1724,7 +1725,8 @@ def CopyModuleToCache(self):
                     self.Name + ".MakeHashFileList." in File:
                     self.CacheCopyFile(FileDir, self.BuildDir, File)
                 else:
-                    self.CacheCopyFile(CacheFileDir, self.BuildDir, File)
+                    OutputFileList.append(('B', os.path.relpath(File, self.BuildDir), File))
+        SaveModuleFiles(GlobalData.gBinCacheDest, path.join(FileDir, MakeHashStr + MANIFEST_EXT), OutputFileList)
     ## Create makefile for the module and its dependent libraries
     #
     #   @param      CreateLibraryMakeFile   Flag indicating if or not the makefiles of
@@ -1898,21 +1900,19 @@ def GenCMakeHash(self):
         # Caculate all above dependency files hash
         # Initialze hash object
         FileList = []
-        m = hashlib.md5()
+        m = GlobalData.gFileHashStore.NewHash()
         for File in sorted(DependencyFileSet, key=lambda x: str(x)):
-            if not path.exists(LongFilePath(str(File))):
+            Digest = GlobalData.gFileHashStore.Digest(str(File))
+            if Digest is None:
                 EdkLogger.quiet("[cache warning]: header file %s is missing for module: %s[%s]" % (File, self.MetaFile.Path, self.Arch))
                 continue
-            with open(LongFilePath(str(File)), 'rb') as f:
-                Content = f.read()
-            m.update(Content)
-            FileList.append((str(File), hashlib.md5(Content).hexdigest()))
+            m.update(Digest.encode('utf-8'))
+            FileList.append((str(File), Digest))
 
         HashChainFile = path.join(self.BuildDir, self.Name + ".autogen.hashchain." + m.hexdigest())
         GlobalData.gCMakeHashFile[(self.MetaFile.Path, self.Arch)] = HashChainFile
         try:
-            with open(LongFilePath(HashChainFile), 'w') as f:
-                json.dump(FileList, f, indent=2)
+            SaveHashChain(LongFilePath(HashChainFile), FileList)
         except:
             EdkLogger.quiet("[cache warning]: fail to save hashchain file:%s" % HashChainFile)
             return False
@@ -1953,26 +1953,24 @@ def GenModuleHash(self):
         # Caculate all above dependency files hash
         # Initialze hash object
         FileList = []
-        m = hashlib.md5()
+        m = GlobalData.gFileHashStore.NewHash()
         BuildDirStr = path.abspath(self.BuildDir).lower()
         for File in sorted(DependencyFileSet, key=lambda x: str(x)):
             # Skip the AutoGen files in BuildDir which already been
             # included in .autogen.hash. file
             if BuildDirStr in path.abspath(File).lower():
                 continue
-            if not path.exists(LongFilePath(File)):
+            Digest = GlobalData.gFileHashStore.Digest(File)
+            if Digest is None:
                 EdkLogger.quiet("[cache warning]: header file %s is missing for module: %s[%s]" % (File, self.MetaFile.Path, self.Arch))
                 continue
-            with open(LongFilePath(File), 'rb') as f:
-                Content = f.read()
-            m.update(Content)
-            FileList.append((File, hashlib.md5(Content).hexdigest()))
+            m.update(Digest.encode('utf-8'))
+            FileList.append((File, Digest))
 
         HashChainFile = path.join(self.BuildDir, self.Name + ".hashchain." + m.hexdigest())
         GlobalData.gModuleHashFile[(self.MetaFile.Path, self.Arch)] = HashChainFile
         try:
-            with open(LongFilePath(HashChainFile), 'w') as f:
-                json.dump(FileList, f, indent=2)
+            SaveHashChain(LongFilePath(HashChainFile), FileList)
         except:
             EdkLogger.quiet("[cache warning]: fail to save hashchain file:%s" % HashChainFile)
             return False
@@ -1991,7 +1989,7 @@ def GenPreMakefileHashList(self):
             return
 
         FileList = []
-        m = hashlib.md5()
+        m = GlobalData.gFileHashStore.NewHash()
         # Add Platform level hash
         HashFile = GlobalData.gPlatformHashFile
         if path.exists(LongFilePath(HashFile)):
@@ -2058,7 +2056,7 @@ def GenMakefileHashList(self):
             return
 
         FileList = []
-        m = hashlib.md5()
+        m = GlobalData.gFileHashStore.NewHash()
         # Add AutoGen hash
         HashFile = GlobalData.gCMakeHashFile[(self.MetaFile.Path, self.Arch)]
         if path.exists(LongFilePath(HashFile)):
@@ -2108,33 +2106,17 @@ def CheckHashChainFile(self, HashChainFile):
             EdkLogger.quiet("[cache error]: wrong format HashChainFile:%s" % (File))
             return False
 
+        # Verify the files one by one, stop at the first different one
         try:
-            with open(LongFilePath(HashChainFile), 'r') as f:
-                HashChainList = json.load(f)
+            for SrcFile, SrcHash in IterHashChain(LongFilePath(HashChainFile)):
+                # cache miss if SrcFile is removed in new version code
+                if SrcHash != GlobalData.gFileHashStore.Digest(SrcFile):
+                    EdkLogger.quiet("[cache insight]: first cache miss file in %s is %s" % (HashChainFile, SrcFile))
+                    return False
         except:
             EdkLogger.quiet("[cache error]: fail to load HashChainFile: %s" % HashChainFile)
             return False
 
-        # Print the different file info
-        # print(HashChainFile)
-        for idx, (SrcFile, SrcHash) in enumerate (HashChainList):
-            if SrcFile in GlobalData.gFileHashDict:
-                DestHash = GlobalData.gFileHashDict[SrcFile]
-            else:
-                try:
-                    with open(LongFilePath(SrcFile), 'rb') as f:
-                        Content = f.read()
-                        DestHash = hashlib.md5(Content).hexdigest()
-                        GlobalData.gFileHashDict[SrcFile] = DestHash
-                except IOError as X:
-                    # cache miss if SrcFile is removed in new version code
-                    GlobalData.gFileHashDict[SrcFile] = 0
-                    EdkLogger.quiet("[cache insight]: first cache miss file in %s is %s" % (HashChainFile, SrcFile))
-                    return False
-            if SrcHash != DestHash:
-                EdkLogger.quiet("[cache insight]: first cache miss file in %s is %s" % (HashChainFile, SrcFile))
-                return False
-
         return True
 
     ## Decide whether we can skip the left autogen and make process
@@ -2167,7 +2149,6 @@ def CanSkipbyMakeCache(self):
                 return False
 
         ModuleCacheDir = path.join(GlobalData.gBinCacheSource, self.PlatformInfo.OutputDir, self.BuildTarget + "_" + self.ToolChain, self.Arch, self.SourceDir, self.MetaFile.BaseName)
-        FfsDir = path.join(GlobalData.gBinCacheSource, self.PlatformInfo.OutputDir, self.BuildTarget + "_" + self.ToolChain, TAB_FV_DIRECTORY, "Ffs", self.Guid + self.Name)
 
         ModuleHashPairList = [] # tuple list: [tuple(PreMakefileHash, MakeHash)]
         ModuleHashPair = path.join(ModuleCacheDir, self.Name + ".ModuleHashPair")
@@ -2183,8 +2164,6 @@ def CanSkipbyMakeCache(self):
 
         # Check the PreMakeHash in ModuleHashPairList one by one
         for idx, (PreMakefileHash, MakeHash) in enumerate (ModuleHashPairList):
-            SourceHashDir = path.join(ModuleCacheDir, MakeHash)
-            SourceFfsHashDir = path.join(FfsDir, MakeHash)
             PreMakeHashFileList_FilePah = path.join(ModuleCacheDir, self.Name + ".PreMakeHashFileList." + PreMakefileHash)
             MakeHashFileList_FilePah = path.join(ModuleCacheDir, self.Name + ".MakeHashFileList." + MakeHash)
 
@@ -2222,15 +2201,10 @@ def CanSkipbyMakeCache(self):
                 continue
 
             # PreMakefile cache hit, restore the module build result
-            for root, dir, files in os.walk(SourceHashDir):
-                for f in files:
-                    File = path.join(root, f)
-                    self.CacheCopyFile(self.BuildDir, SourceHashDir, File)
-            if os.path.exists(SourceFfsHashDir):
-                for root, dir, files in os.walk(SourceFfsHashDir):
-                    for f in files:
-                        File = path.join(root, f)
-                        self.CacheCopyFile(self.FfsOutputDir, SourceFfsHashDir, File)
+            if not RestoreModuleFiles(GlobalData.gBinCacheSource, path.join(ModuleCacheDir, MakeHash + MANIFEST_EXT),
+                                      {'B': self.BuildDir, 'F': self.FfsOutputDir}):
+                EdkLogger.quiet("[cache warning]: fail to restore build result: %s" % MakeHash)
+                continue
 
             if self.Name == "PcdPeim" or self.Name == "PcdDxe":
                 CreatePcdDatabaseCode(self, TemplateString(), TemplateString())
@@ -2327,7 +2301,6 @@ def CanSkipbyPreMakeCache(self):
                 return True
 
         ModuleCacheDir = path.join(GlobalData.gBinCacheSource, self.PlatformInfo.OutputDir, self.BuildTarget + "_" + self.ToolChain, self.Arch, self.SourceDir, self.MetaFile.BaseName)
-        FfsDir = path.join(GlobalData.gBinCacheSource, self.PlatformInfo.OutputDir, self.BuildTarget + "_" + self.ToolChain, TAB_FV_DIRECTORY, "Ffs", self.Guid + self.Name)
 
         ModuleHashPairList = [] # tuple list: [tuple(PreMakefileHash, MakeHash)]
         ModuleHashPair = path.join(ModuleCacheDir, self.Name + ".ModuleHashPair")
@@ -2343,8 +2316,6 @@ def CanSkipbyPreMakeCache(self):
 
         # Check the PreMakeHash in ModuleHashPairList one by one
         for idx, (PreMakefileHash, MakeHash) in enumerate (ModuleHashPairList):
-            SourceHashDir = path.join(ModuleCacheDir, MakeHash)
-            SourceFfsHashDir = path.join(FfsDir, MakeHash)
             PreMakeHashFileList_FilePah = path.join(ModuleCacheDir, self.Name + ".PreMakeHashFileList." + PreMakefileHash)
             MakeHashFileList_FilePah = path.join(ModuleCacheDir, self.Name + ".MakeHashFileList." + MakeHash)
 
@@ -2379,15 +2350,10 @@ def CanSkipbyPreMakeCache(self):
                 continue
 
             # PreMakefile cache hit, restore the module build result
-            for root, dir, files in os.walk(SourceHashDir):
-                for f in files:
-                    File = path.join(root, f)
-                    self.CacheCopyFile(self.BuildDir, SourceHashDir, File)
-            if os.path.exists(SourceFfsHashDir):
-                for root, dir, files in os.walk(SourceFfsHashDir):
-                    for f in files:
-                        File = path.join(root, f)
-                        self.CacheCopyFile(self.FfsOutputDir, SourceFfsHashDir, File)
+            if not RestoreModuleFiles(GlobalData.gBinCacheSource, path.join(ModuleCacheDir, MakeHash + MANIFEST_EXT),
+                                      {'B': self.BuildDir, 'F': self.FfsOutputDir}):
+                EdkLogger.quiet("[cache warning]: fail to restore build result: %s" % MakeHash)
+                continue
 
             if self.Name == "PcdPeim" or self.Name == "PcdDxe":
                 CreatePcdDatabaseCode(self, TemplateString(), TemplateString())
@@ -1167,6 +1167,20 @@ def GetAllModuleInfo(self,WithoutPcd=True):
 
         return ModuleLibs
 
+    ## Estimate the AutoGen cost of a module given by GetAllModuleInfo
+    #
+    #   The cost grows with the source files to list in the makefile and the
+    # library classes to resolve for the module.
+    #
+    #   @param  ModuleInfo  The module tuple from GetAllModuleInfo
+    #
+    #   @retval int         The estimated cost, at least 1
+    #
+    def GetModuleCost(self, ModuleInfo):
+        module_file, module_root, _, _, _, module_arch, _ = ModuleInfo
+        module_obj = self.BuildDatabase[PathClass(module_file, module_root), module_arch, self.BuildTarget, self.ToolChain]
+        return 1 + len(module_obj.Sources) + len(module_obj.LibraryClasses)
+
     ## Resolve the library classes in a module to library instances
     #
     # This method will not only resolve library classes but also sort the library
@@ -11,6 +11,7 @@
 from __future__ import absolute_import
 import re
 import edk2basetools.Common.EdkLogger as EdkLogger
+import edk2basetools.Common.GlobalData as GlobalData
 from edk2basetools.Common.BuildToolError import *
 from .UniClassObject import *
 from io import BytesIO
@@ -466,6 +467,20 @@ def CreateCFile(BaseName, UniObjectClass, IsCompatibleMode, FilterInfo):
     CFile = WriteLine(CFile, CreateCFileEnd())
     return "".join(CFile)
 
+## _GetIncludeGraph
+#
+# Get the index of files shared by all modules, which also keeps the string
+# tokens referenced by each file
+#
+# @retval IncludeGraph: The index of files
+#
+def _GetIncludeGraph():
+    IncGraph = GlobalData.gIncludeGraph
+    if IncGraph is None:
+        from edk2basetools.AutoGen.IncludeGraph import IncludeGraph
+        IncGraph = GlobalData.gIncludeGraph = IncludeGraph()
+    return IncGraph
+
 ## GetFileList
 #
 # Get a list for all files
@@ -482,28 +497,23 @@ def GetFileList(SourceFileList, IncludeList, SkipList):
     FileList = []
     if SkipList is None:
         SkipList = []
+    SkipList = [Skip.upper() for Skip in SkipList]
+    IncGraph = _GetIncludeGraph()
 
-    for File in SourceFileList:
+    for SourceFile in SourceFileList:
         for Dir in IncludeList:
-            if not os.path.exists(Dir):
-                continue
-            File = os.path.join(Dir, File.Path)
+            File = os.path.join(Dir, SourceFile.Path)
             #
-            # Ignore Dir
+            # Ignore Dir, the listings of directories are cached
             #
-            if os.path.isfile(File) != True:
+            if not IncGraph.IsFile(File):
                 continue
             #
             # Ignore file listed in skip list
             #
-            IsSkip = False
-            for Skip in SkipList:
-                if os.path.splitext(File)[1].upper() == Skip.upper():
-                    EdkLogger.verbose("Skipped %s for string token uses search" % File)
-                    IsSkip = True
-                    break
-
-            if not IsSkip:
+            if os.path.splitext(File)[1].upper() in SkipList:
+                EdkLogger.verbose("Skipped %s for string token uses search" % File)
+            else:
                 FileList.append(File)
 
             break
@@ -525,14 +535,12 @@ def SearchString(UniObjectClass, FileList, IsCompatibleMode):
     if FileList == []:
         return UniObjectClass
 
+    IncGraph = _GetIncludeGraph()
     for File in FileList:
         try:
-            if os.path.isfile(File):
-                Lines = open(File, 'r')
-                for Line in Lines:
-                    for StrName in STRING_TOKEN.findall(Line):
-                        EdkLogger.debug(EdkLogger.DEBUG_5, "Found string identifier: " + StrName)
-                        UniObjectClass.SetStringReferenced(StrName)
+            for StrName in IncGraph.GetStringTokenList(File):
+                EdkLogger.debug(EdkLogger.DEBUG_5, "Found string identifier: " + StrName)
+                UniObjectClass.SetStringReferenced(StrName)
         except:
             EdkLogger.error("UnicodeStringGather", AUTOGEN_ERROR, "SearchString: Error while processing file", File=File, RaiseError=False)
             raise
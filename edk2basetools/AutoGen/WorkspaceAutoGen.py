@@ -10,7 +10,6 @@
 from __future__ import print_function
 from __future__ import absolute_import
 import os.path as path
-import hashlib
 from collections import defaultdict
 from edk2basetools.GenFds.FdfParser import FdfParser
 from edk2basetools.Workspace.WorkspaceCommon import GetModuleLibInstances
@@ -18,12 +17,12 @@
 from edk2basetools.AutoGen.AutoGen import AutoGen
 from edk2basetools.AutoGen.PlatformAutoGen import PlatformAutoGen
 from edk2basetools.AutoGen.BuildEngine import gDefaultBuildRuleFile
+from edk2basetools.AutoGen.FileHashStore import SaveHashChain
 from edk2basetools.Common.ToolDefClassObject import gDefaultToolsDefFile
 from edk2basetools.Common.StringUtils import NormPath
 from edk2basetools.Common.BuildToolError import *
 from edk2basetools.Common.DataType import *
 from edk2basetools.Common.Misc import *
-import json
 
 ## Regular expression for splitting Dependency Expression string into tokens
 gDepexTokenPattern = re.compile(r"(\(|\)|\w+| \S+\.inf)")
@@ -574,15 +573,15 @@ def GeneratePlatformLevelHash(self):
 
         if GlobalData.gUseHashCache:
             FileList = []
-            m = hashlib.md5()
+            m = GlobalData.gFileHashStore.NewHash()
             for file in AllWorkSpaceMetaFileList:
                 if file.endswith('.dec'):
                     continue
-                f = open(file, 'rb')
-                Content = f.read()
-                f.close()
-                m.update(Content)
-                FileList.append((str(file), hashlib.md5(Content).hexdigest()))
+                Digest = GlobalData.gFileHashStore.Digest(str(file))
+                if Digest is None:
+                    EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=str(file))
+                m.update(Digest.encode('utf-8'))
+                FileList.append((str(file), Digest))
 
             HashDir = path.join(self.BuildDir, "Hash_Platform")
             HashFile = path.join(HashDir, 'Platform.hash.' + m.hexdigest())
@@ -590,8 +589,7 @@ def GeneratePlatformLevelHash(self):
             HashChainFile = path.join(HashDir, 'Platform.hashchain.' + m.hexdigest())
             GlobalData.gPlatformHashFile = HashChainFile
             try:
-                with open(HashChainFile, 'w') as f:
-                    json.dump(FileList, f, indent=2)
+                SaveHashChain(HashChainFile, FileList)
             except:
                 EdkLogger.quiet("[cache warning]: fail to save hashchain file:%s" % HashChainFile)
 
@@ -623,24 +621,24 @@ def _GenPkgLevelHash(self, Pkg):
         PkgDir = os.path.join(self.BuildDir, Pkg.Arch, "Hash_Pkg", Pkg.PackageName)
         CreateDirectory(PkgDir)
         FileList = []
-        m = hashlib.md5()
+        m = GlobalData.gFileHashStore.NewHash()
         # Get .dec file's hash value
-        f = open(Pkg.MetaFile.Path, 'rb')
-        Content = f.read()
-        f.close()
-        m.update(Content)
-        FileList.append((str(Pkg.MetaFile.Path), hashlib.md5(Content).hexdigest()))
+        Digest = GlobalData.gFileHashStore.Digest(Pkg.MetaFile.Path)
+        if Digest is None:
+            EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=str(Pkg.MetaFile.Path))
+        m.update(Digest.encode('utf-8'))
+        FileList.append((str(Pkg.MetaFile.Path), Digest))
         # Get include files hash value
         if Pkg.Includes:
             for inc in sorted(Pkg.Includes, key=lambda x: str(x)):
                 for Root, Dirs, Files in os.walk(str(inc)):
                     for File in sorted(Files):
                         File_Path = os.path.join(Root, File)
-                        f = open(File_Path, 'rb')
-                        Content = f.read()
-                        f.close()
-                        m.update(Content)
-                        FileList.append((str(File_Path), hashlib.md5(Content).hexdigest()))
+                        Digest = GlobalData.gFileHashStore.Digest(File_Path)
+                        if Digest is None:
+                            EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=File_Path)
+                        m.update(Digest.encode('utf-8'))
+                        FileList.append((str(File_Path), Digest))
         GlobalData.gPackageHash[Pkg.PackageName] = m.hexdigest()
 
         HashDir = PkgDir
@@ -649,8 +647,7 @@ def _GenPkgLevelHash(self, Pkg):
         HashChainFile = path.join(HashDir, Pkg.PackageName + '.hashchain.' + m.hexdigest())
         GlobalData.gPackageHashFile[(Pkg.PackageName, Pkg.Arch)] = HashChainFile
         try:
-            with open(HashChainFile, 'w') as f:
-                json.dump(FileList, f, indent=2)
+            SaveHashChain(HashChainFile, FileList)
         except:
             EdkLogger.quiet("[cache warning]: fail to save hashchain file:%s" % HashChainFile)
 
@@ -903,6 +900,10 @@ def GenFdsCommandDict(self):
             FdsCommandDict["quiet"] = True
 
         FdsCommandDict["GenfdsMultiThread"] = GlobalData.gEnableGenfdsMultiThread
+        if GlobalData.gEnableGenfdsInProcess:
+            FdsCommandDict["GenfdsInProcess"] = True
+        if GlobalData.gThreadNumber:
+            FdsCommandDict["thread_number"] = GlobalData.gThreadNumber
         if GlobalData.gIgnoreSource:
             FdsCommandDict["IgnoreSources"] = True
 
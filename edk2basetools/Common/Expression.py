@@ -11,11 +11,14 @@
 from edk2basetools.Common.GlobalData import *
 from edk2basetools.CommonDataClass.Exceptions import BadExpression
 from edk2basetools.CommonDataClass.Exceptions import WrnExpression
-from .Misc import GuidStringToGuidStructureString, ParseFieldValue,CopyDict
+from .Misc import GuidStringToGuidStructureString, ParseFieldValue
 import edk2basetools.Common.EdkLogger as EdkLogger
 import copy
 from edk2basetools.Common.DataType import *
 import sys
+import threading
+from collections import OrderedDict
+from itertools import islice
 from random import sample
 import string
 
@@ -151,6 +154,105 @@ def BuildOptionValue(PcdValue, GuidDict):
 
     return PcdValue
 
+## Read-only view of a symbol table
+#
+#   Expressions look up symbols through the view instead of a copy of the
+# table. The symbols looked up and their values are recorded, so that a cached
+# result can be checked against another table. A view over another view records
+# in both, so nested expressions report their lookups to the outer one.
+#
+_MISSING = object()
+
+class SymbolView(object):
+    def __init__(self, SymbolTable, Overlay=None):
+        self._Table = SymbolTable
+        self._Overlay = Overlay or {}
+        self.Reads = {}
+
+    def get(self, Key, Default=None):
+        if Key in self._Overlay:
+            return self._Overlay[Key]
+        Value = self._Table.get(Key, _MISSING)
+        self.Reads[Key] = Value
+        if Value is _MISSING:
+            return Default
+        return Value
+
+    def __contains__(self, Key):
+        return self.get(Key, _MISSING) is not _MISSING
+
+    def __getitem__(self, Key):
+        Value = self.get(Key, _MISSING)
+        if Value is _MISSING:
+            raise KeyError(Key)
+        return Value
+
+    ## Check if the symbols recorded in Reads have the same values in this view
+    def Match(self, Reads):
+        for Key, Value in Reads.items():
+            if self.get(Key, _MISSING) != Value:
+                return False
+        return True
+
+    ## Check if the values looked up can be kept in cache
+    def IsCacheable(self):
+        return all(Value is _MISSING or isinstance(Value, (str, int)) for Value in self.Reads.values())
+
+## Bounded LRU cache of the results of expressions
+#
+#   An entry is only used when the symbols read to get it have the same
+# values in the symbol table of the expression being evaluated.
+#
+class ExpressionCache(object):
+    def __init__(self, MaxSize):
+        self.MaxSize = MaxSize
+        self._Entries = OrderedDict()
+        self._Lock = threading.Lock()
+
+    def Get(self, Key):
+        with self._Lock:
+            Entry = self._Entries.get(Key)
+            if Entry is not None:
+                self._Entries.move_to_end(Key)
+            return Entry
+
+    def Set(self, Key, Entry):
+        with self._Lock:
+            self._Entries[Key] = Entry
+            self._Entries.move_to_end(Key)
+            while len(self._Entries) > self.MaxSize:
+                self._Entries.popitem(last=False)
+
+    def Clear(self):
+        with self._Lock:
+            self._Entries.clear()
+
+# macro-replaced expression text and evaluated values of expressions
+gMacroReplaceCache = ExpressionCache(4096)
+gExpressionCache = ExpressionCache(8192)
+
+## ReplaceExprMacro with result cache
+#
+#   The PCDs used in conditional directives are collected as ReplaceExprMacro
+# does, the platform PCDs added after an entry was cached are checked on hit.
+#
+def CachedReplaceExprMacro(String, Macros, ExceptionList = None):
+    CacheKey = (String, tuple(ExceptionList) if ExceptionList else None)
+    Entry = gMacroReplaceCache.Get(CacheKey)
+    if Entry is not None and Macros.Match(Entry[1]):
+        Result, Reads, StrList, Checked = Entry
+        if len(gPlatformPcds) != Checked:
+            for Pcd in islice(gPlatformPcds, Checked if len(gPlatformPcds) > Checked else 0, None):
+                if Pcd not in gConditionalPcds and any(Pcd in Str for Str in StrList):
+                    gConditionalPcds.append(Pcd)
+            gMacroReplaceCache.Set(CacheKey, (Result, Reads, StrList, len(gPlatformPcds)))
+        return Result
+    Result = ReplaceExprMacro(String, Macros, ExceptionList)
+    if Macros.IsCacheable():
+        StrList = [Str for Str in SplitString(String) if '$(' not in Str]
+        gMacroReplaceCache.Set(CacheKey, (Result, dict(Macros.Reads), StrList, len(gPlatformPcds)))
+    return Result
+
 ## ReplaceExprMacro
 #
 def ReplaceExprMacro(String, Macros, ExceptionList = None):
@@ -339,18 +441,19 @@ def __init__(self, Expression, SymbolTable={}):
             self._NoProcess = True
             return
 
-        self._Expr = ReplaceExprMacro(Expression.strip(),
-                                  SymbolTable,
+        #
+        # The symbol table including PCD and macro mapping
+        #
+        self._Symb = SymbolView(SymbolTable, self.LogicalOperators)
+        Macros = SymbolView(SymbolTable)
+        self._Expr = CachedReplaceExprMacro(Expression.strip(),
+                                  Macros,
                                   SupportedInMacroList)
+        self._Symb.Reads.update(Macros.Reads)
 
         if not self._Expr.strip():
             raise BadExpression(ERR_EMPTY_EXPR)
 
-        #
-        # The symbol table including PCD and macro mapping
-        #
-        self._Symb = CopyDict(SymbolTable)
-        self._Symb.update(self.LogicalOperators)
         self._Idx = 0
         self._Len = len(self._Expr)
         self._Token = ''
@@ -369,7 +472,20 @@ def __init__(self, Expression, SymbolTable={}):
     def __call__(self, RealValue=False, Depth=0):
         if self._NoProcess:
             return self._Expr
-
+        return self._CachedCall(ValueExpression, (self._Expr, RealValue, Depth == 0), RealValue, Depth)
+
+    ## Get the value from cache, or evaluate it by Cls._Evaluate and cache it
+    def _CachedCall(self, Cls, CacheKey, RealValue, Depth):
+        CacheKey = (Cls,) + CacheKey
+        Entry = gExpressionCache.Get(CacheKey)
+        if Entry is not None and self._Symb.Match(Entry[1]):
+            return Entry[0]
+        Value = Cls._Evaluate(self, RealValue, Depth)
+        if self._Symb.IsCacheable():
+            gExpressionCache.Set(CacheKey, (Value, dict(self._Symb.Reads)))
+        return Value
+
+    def _Evaluate(self, RealValue, Depth):
         self._Depth = Depth
 
         self._Expr = self._Expr.strip()
@@ -820,6 +936,11 @@ def __init__(self, PcdValue, PcdType, SymbolTable={}):
         self.PcdType = PcdType
 
     def __call__(self, RealValue=False, Depth=0):
+        if self._NoProcess:
+            return self._Evaluate(RealValue, Depth)
+        return self._CachedCall(ValueExpressionEx, (self.PcdValue, self.PcdType, RealValue, Depth == 0), RealValue, Depth)
+
+    def _Evaluate(self, RealValue, Depth):
         PcdValue = self.PcdValue
         if "{CODE(" not in PcdValue:
             try:
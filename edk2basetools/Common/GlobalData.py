@@ -79,6 +79,11 @@
 #
 gDatabasePath = ".cache/build.db"
 
+#
+# The file of persistent meta-file cache, None if it's disabled
+#
+gMetaFileCache = None
+
 #
 # Build flag for binary build
 #
@@ -105,6 +110,9 @@
 gUseHashCache = None
 gBinCacheDest = None
 gBinCacheSource = None
+# Maximum size in bytes of the binary cache, and flag to only clean the cache up
+gCacheSizeLimit = None
+gCacheGc = False
 gPlatformHash = None
 gPlatformHashFile = None
 gPackageHash = None
@@ -114,11 +122,20 @@
 gHashChainStatus = None
 gModulePreMakeCacheStatus = None
 gModuleMakeCacheStatus = None
-gFileHashDict = None
+# FileHashStore object of the file digests, its store file and digest algorithm
+gFileHashStore = None
+gFileHashCache = None
+gHashAlgorithm = 'md5'
+# IncludeGraph object of the #include lists of files, and its store file
+gIncludeGraph = None
+gIncludeGraphFile = None
 gModuleAllCacheStatus = None
 gModuleCacheHit = None
 
 gEnableGenfdsMultiThread = True
+gEnableGenfdsInProcess = False
+# Maximum number of concurrent threads of build, also used by GenFds
+gThreadNumber = None
 gSikpAutoGenCache = set()
 # Common lock for the file access in multiple process AutoGens
 file_lock = None
@@ -66,6 +66,7 @@ def replace(src, dst):
 
 environ = os.environ
 getcwd = os.getcwd
+getpid = os.getpid
 chdir = os.chdir
 walk = os.walk
 W_OK = os.W_OK
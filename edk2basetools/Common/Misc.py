@@ -54,9 +54,6 @@
 
 StructPattern = re.compile(r'[_a-zA-Z][0-9A-Za-z_]*$')
 
-## Dictionary used to store dependencies of files
-gDependencyDatabase = {}    # arch : {file path : [dependent files list]}
-
 #
 # If a module is built more than once with different PCDs or library classes
 # a temporary INF file with same content is created, the temporary file is removed
@@ -0,0 +1,180 @@
+## @file
+# Load and save the entries of the stores kept in files across build invocations
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+import os
+import glob
+import pickle
+import threading
+import time
+
+import edk2basetools.Common.EdkLogger as EdkLogger
+from edk2basetools.Common.LongFilePathSupport import LongFilePath, OpenLongFilePath as open
+
+# a file modified in the last seconds could be modified again without
+# changing its time stamp, so the entries keyed by its stamp are not saved
+RACY_TIME = 2
+
+## Get the stamp of a file, which is changed whenever the file is modified
+#
+# @param FilePath:   Path of the file
+#
+# @retval tuple      (size, time stamp in nanoseconds, inode) of the file
+# @retval None       The file doesn't exist
+#
+def FileStamp(FilePath):
+    try:
+        Stat = os.stat(LongFilePath(FilePath))
+    except OSError:
+        return None
+    return (Stat.st_size, Stat.st_mtime_ns, Stat.st_ino)
+
+## Drop the entries of the files modified recently
+#
+# @param Entries:    Dict of the entries whose first item is the stamp of file
+#
+# @retval dict       The entries which can be saved
+#
+def StableEntries(Entries):
+    Limit = int((time.time() - RACY_TIME) * 1000000000)
+    return dict((Key, Entry) for Key, Entry in list(Entries.items())
+                if Entry[0] is not None and Entry[0][1] < Limit)
+
+## Load the entries of a store file
+#
+# @param StoreFile:  Path of the store file, or None
+# @param Version:    The version the entries must have been saved with
+# @param Name:       Name of the store in debug messages
+#
+# @retval object     The entries saved
+# @retval None       The file doesn't exist, cannot be read, or is of another version
+#
+def LoadStore(StoreFile, Version, Name):
+    if not StoreFile or not os.path.exists(LongFilePath(StoreFile)):
+        return None
+    try:
+        with open(StoreFile, 'rb') as Fd:
+            SavedVersion, Entries = pickle.load(Fd)
+        if SavedVersion == Version:
+            return Entries
+    except Exception as Exc:
+        EdkLogger.debug(EdkLogger.DEBUG_5, "Failed to load %s %s: %s" % (Name, StoreFile, str(Exc)))
+    return None
+
+## Save entries to a store file
+#
+#   The entries are written to a temporary file which then replaces the
+# store file, so that other processes never read a partial store.
+#
+# @param StoreFile:  Path of the store file
+# @param Version:    The version of entries, which should be bumped whenever their layout changes
+# @param Entries:    The entries to save
+# @param Name:       Name of the store in debug messages
+#
+# @retval True       The entries are saved
+# @retval False      The store file cannot be written
+#
+def SaveStore(StoreFile, Version, Entries, Name):
+    TempFile = "%s.%d.tmp" % (StoreFile, os.getpid())
+    try:
+        with open(TempFile, 'wb') as Fd:
+            pickle.dump((Version, Entries), Fd, pickle.HIGHEST_PROTOCOL)
+        os.replace(LongFilePath(TempFile), LongFilePath(StoreFile))
+        return True
+    except Exception as Exc:
+        EdkLogger.debug(EdkLogger.DEBUG_5, "Failed to save %s %s: %s" % (Name, StoreFile, str(Exc)))
+        if os.path.exists(LongFilePath(TempFile)):
+            os.remove(LongFilePath(TempFile))
+        return False
+
+## Store of the entries got from files, reused as long as the files are unchanged
+#
+#   The entry of a file is got again by _GetFileEntry() of the derived class
+# only if the size, time stamp or inode of the file is changed. The entries
+# are loaded from the store file at the first lookup. Save() merges the
+# entries added by this process into the store file, keeping the entries
+# saved by other processes meanwhile. A worker process may save the entries
+# it adds to a file of its own, which Save() of the main process merges.
+#
+# @param StoreFile          Path of the file keeping the entries, or None
+#
+class FileEntryStore(object):
+    # bump it whenever the layout of entries changes
+    _VERSION_ = 1
+    # name of the store in debug messages
+    _NAME_ = 'file entry store'
+
+    def __init__(self, StoreFile=None):
+        self.StoreFile = StoreFile
+        self._Entries = None
+        self._NewEntries = {}
+        self._Lock = threading.Lock()
+
+    ## Get the entry of a file
+    #
+    # @param FilePath:   Path of the file
+    # @param Args:       The arguments the entry is got with, which are also in its key
+    #
+    # @retval tuple      The entry, whose first item is the stamp of file
+    # @retval None       _GetFileEntry() failed
+    #
+    def GetEntry(self, FilePath, *Args):
+        if self._Entries is None:
+            with self._Lock:
+                if self._Entries is None:
+                    self._Entries = LoadStore(self.StoreFile, self._VERSION_, self._NAME_) or {}
+        Key = (FilePath,) + Args
+        Stamp = FileStamp(FilePath)
+        Entry = self._Entries.get(Key)
+        if Entry is not None and Entry[0] == Stamp:
+            return Entry
+        Entry = self._GetFileEntry(FilePath, Stamp, *Args)
+        if Entry is not None:
+            self._Entries[Key] = self._NewEntries[Key] = Entry
+        return Entry
+
+    ## Get the entry of a file from its content, implemented by derived class
+    #
+    # @param FilePath:   Path of the file
+    # @param Stamp:      The stamp of file, or None if it doesn't exist
+    # @param Args:       The arguments passed to GetEntry()
+    #
+    # @retval tuple      The entry, whose first item is Stamp
+    # @retval None       The file cannot be read
+    #
+    def _GetFileEntry(self, FilePath, Stamp, *Args):
+        raise NotImplementedError
+
+    ## Save the entries added by this worker process, for the main process to merge
+    def SaveWorkerEntries(self):
+        if not self.StoreFile or not self._NewEntries:
+            return
+        if SaveStore("%s.%d" % (self.StoreFile, os.getpid()), self._VERSION_, StableEntries(self._NewEntries), self._NAME_):
+            self._NewEntries = {}
+
+    ## Merge the entries added by this process and the workers into store file
+    def Save(self):
+        if not self.StoreFile:
+            return
+        WorkerFileList = [WorkerFile for WorkerFile in glob.glob(glob.escape(self.StoreFile) + ".[0-9]*")
+                          if not WorkerFile.endswith(".tmp")]
+        NewEntries = {}
+        for WorkerFile in WorkerFileList:
+            NewEntries.update(LoadStore(WorkerFile, self._VERSION_, self._NAME_) or {})
+        NewEntries.update(self._NewEntries)
+        if NewEntries:
+            Entries = LoadStore(self.StoreFile, self._VERSION_, self._NAME_) or {}
+            Entries.update(NewEntries)
+            if SaveStore(self.StoreFile, self._VERSION_, StableEntries(Entries), self._NAME_):
+                self._NewEntries = {}
+        for WorkerFile in WorkerFileList:
+            try:
+                os.remove(WorkerFile)
+            except OSError:
+                pass
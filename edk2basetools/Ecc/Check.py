@@ -8,12 +8,17 @@
 from __future__ import absolute_import
 import edk2basetools.Common.LongFilePathOs as os
 import re
+import time
+import multiprocessing
 from edk2basetools.CommonDataClass.DataClass import *
 import edk2basetools.Common.DataType as DT
 from edk2basetools.Ecc.EccToolError import *
 from edk2basetools.Ecc.MetaDataParser import ParseHeaderCommentSection
 from edk2basetools.Ecc import EccGlobalData
 from edk2basetools.Ecc import c
+from edk2basetools.Ecc import Database
+from edk2basetools.Table.TableReport import TableReport
+import edk2basetools.Common.GlobalData as GlobalData
 from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
 from edk2basetools.Common.MultipleWorkspace import MultipleWorkspace as mws
 
@@ -24,11 +29,30 @@
 # @param object:          Inherited from object class
 #
 class Check(object):
+    # Checkpoints looping over C/H files one by one, which can be run on
+    # separate slices of the file lists
+    ShardableCheckpoints = set([
+        'FunctionLayoutCheckReturnType', 'FunctionLayoutCheckModifier', 'FunctionLayoutCheckName',
+        'FunctionLayoutCheckPrototype', 'FunctionLayoutCheckBody', 'FunctionLayoutCheckLocalVariable',
+        'DeclCheckNoUseCType', 'DeclCheckInOutModifier', 'DeclCheckEnumeratedType',
+        'DeclCheckStructureDeclaration', 'DeclCheckUnionType',
+        'PredicateExpressionCheckBooleanValue', 'PredicateExpressionCheckNonBooleanOperator',
+        'PredicateExpressionCheckComparisonNullType',
+        'IncludeFileCheckIfndef', 'IncludeFileCheckData',
+        'DoxygenCheckFunctionHeader', 'DoxygenCheckCommentFormat', 'DoxygenCheckCommand',
+        ])
+
     def __init__(self):
-        pass
+        self.TimingList = []
+        self.CheckpointList = None
 
     # Check all required checkpoints
-    def Check(self):
+    #
+    # With more than one job, the checkpoints are run in worker processes
+    #
+    def Check(self, Jobs=1):
+        if Jobs > 1:
+            self.CheckpointList = []
         self.GeneralCheck()
         self.MetaDataFileCheck()
         self.DoxygenCheck()
@@ -38,9 +62,69 @@ def Check(self):
         self.FunctionLayoutCheck()
         self.NamingConventionCheck()
         self.SmmCommParaCheck()
+        if self.CheckpointList is not None:
+            self.RunCheckpointsInParallel(Jobs)
+            self.CheckpointList = None
+        self.ReportTiming()
+
+    # Run a checkpoint, recording the time spent in it and in its database queries
+    def RunCheckpoint(self, Checkpoint):
+        if self.CheckpointList is not None:
+            self.CheckpointList.append(Checkpoint.__name__)
+            return
+        Cursor = EccGlobalData.gDb.Cur
+        QueryTime = Cursor.ElapsedTime
+        StartTime = time.perf_counter()
+        Checkpoint()
+        self.TimingList.append((Checkpoint.__name__, time.perf_counter() - StartTime, Cursor.ElapsedTime - QueryTime))
+
+    # Run the collected checkpoints in worker processes
+    #
+    # Per-file checkpoints are split into slices of the C/H file lists. The
+    # report rows of each task are inserted in the order of tasks, so that the
+    # report is the same as the one of a sequential run.
+    #
+    def RunCheckpointsInParallel(self, Jobs):
+        FileList = EccGlobalData.gCFileList + EccGlobalData.gHFileList
+        ShardSize = (len(FileList) + Jobs - 1) // Jobs
+        TaskList = []
+        for Name in self.CheckpointList:
+            if Name in self.ShardableCheckpoints and ShardSize > 0:
+                for Index, Start in enumerate(range(0, len(FileList), ShardSize)):
+                    TaskList.append((Name, Index, Start, Start + ShardSize))
+            else:
+                TaskList.append((Name, 0, 0, len(FileList)))
+
+        # workers see the database through connections of their own
+        EccGlobalData.gDb.Conn.commit()
+        State = (EccGlobalData.gDb.DbPath, EccGlobalData.gWorkspace, EccGlobalData.gTarget, EccGlobalData.gConfig,
+                 EccGlobalData.gException, EccGlobalData.gIdentifierTableList, EccGlobalData.gCFileList,
+                 EccGlobalData.gHFileList, EccGlobalData.gUFileList, GlobalData.gWorkspace, EdkLogger.GetLevel())
+        Pool = multiprocessing.Pool(min(Jobs, len(TaskList)), InitCheckWorker, (State,))
+        TimingDict = {}
+        try:
+            for Name, RowList, TotalTime, QueryTime in Pool.imap(RunCheckTask, TaskList):
+                for Row in RowList:
+                    EccGlobalData.gDb.TblReport.Insert(*Row)
+                if Name in TimingDict:
+                    TimingDict[Name] = (TimingDict[Name][0] + TotalTime, TimingDict[Name][1] + QueryTime)
+                else:
+                    TimingDict[Name] = (TotalTime, QueryTime)
+            Pool.close()
+        finally:
+            Pool.terminate()
+            Pool.join()
+        for Name in self.CheckpointList:
+            self.TimingList.append((Name,) + TimingDict[Name])
+
+    # Report the time of checkpoints, the slowest first
+    def ReportTiming(self):
+        EdkLogger.info("Time of checkpoints (total / database query, in seconds):")
+        for Name, TotalTime, QueryTime in sorted(self.TimingList, key=lambda Item: Item[1], reverse=True):
+            EdkLogger.info("    %-50s %10.3f %10.3f" % (Name, TotalTime, QueryTime))
 
     def SmmCommParaCheck(self):
-        self.SmmCommParaCheckBufferType()
+        self.RunCheckpoint(self.SmmCommParaCheckBufferType)
 
 
     # Check if SMM communication function has correct parameter type
@@ -181,11 +265,11 @@ def UniCheck(self):
 
     # General Checking
     def GeneralCheck(self):
-        self.GeneralCheckNonAcsii()
-        self.UniCheck()
-        self.GeneralCheckNoTab()
-        self.GeneralCheckLineEnding()
-        self.GeneralCheckTrailingWhiteSpaceLine()
+        self.RunCheckpoint(self.GeneralCheckNonAcsii)
+        self.RunCheckpoint(self.UniCheck)
+        self.RunCheckpoint(self.GeneralCheckNoTab)
+        self.RunCheckpoint(self.GeneralCheckLineEnding)
+        self.RunCheckpoint(self.GeneralCheckTrailingWhiteSpaceLine)
 
     # Check whether NO Tab is used, replaced with spaces
     def GeneralCheckNoTab(self):
@@ -259,13 +343,13 @@ def GeneralCheckNonAcsii(self):
 
     # C Function Layout Checking
     def FunctionLayoutCheck(self):
-        self.FunctionLayoutCheckReturnType()
-        self.FunctionLayoutCheckModifier()
-        self.FunctionLayoutCheckName()
-        self.FunctionLayoutCheckPrototype()
-        self.FunctionLayoutCheckBody()
-        self.FunctionLayoutCheckLocalVariable()
-        self.FunctionLayoutCheckDeprecated()
+        self.RunCheckpoint(self.FunctionLayoutCheckReturnType)
+        self.RunCheckpoint(self.FunctionLayoutCheckModifier)
+        self.RunCheckpoint(self.FunctionLayoutCheckName)
+        self.RunCheckpoint(self.FunctionLayoutCheckPrototype)
+        self.RunCheckpoint(self.FunctionLayoutCheckBody)
+        self.RunCheckpoint(self.FunctionLayoutCheckLocalVariable)
+        self.RunCheckpoint(self.FunctionLayoutCheckDeprecated)
 
     # To check if the deprecated functions are used
     def FunctionLayoutCheckDeprecated(self):
@@ -433,13 +517,13 @@ def FunctionLayoutCheckLocalVariable(self):
 
     # Declarations and Data Types Checking
     def DeclAndDataTypeCheck(self):
-        self.DeclCheckNoUseCType()
-        self.DeclCheckInOutModifier()
-        self.DeclCheckEFIAPIModifier()
-        self.DeclCheckEnumeratedType()
-        self.DeclCheckStructureDeclaration()
-        self.DeclCheckSameStructure()
-        self.DeclCheckUnionType()
+        self.RunCheckpoint(self.DeclCheckNoUseCType)
+        self.RunCheckpoint(self.DeclCheckInOutModifier)
+        self.RunCheckpoint(self.DeclCheckEFIAPIModifier)
+        self.RunCheckpoint(self.DeclCheckEnumeratedType)
+        self.RunCheckpoint(self.DeclCheckStructureDeclaration)
+        self.RunCheckpoint(self.DeclCheckSameStructure)
+        self.RunCheckpoint(self.DeclCheckUnionType)
 
 
     # Check whether no use of int, unsigned, char, void, long in any .c, .h or .asl files.
@@ -542,9 +626,9 @@ def DeclCheckUnionType(self):
 
     # Predicate Expression Checking
     def PredicateExpressionCheck(self):
-        self.PredicateExpressionCheckBooleanValue()
-        self.PredicateExpressionCheckNonBooleanOperator()
-        self.PredicateExpressionCheckComparisonNullType()
+        self.RunCheckpoint(self.PredicateExpressionCheckBooleanValue)
+        self.RunCheckpoint(self.PredicateExpressionCheckNonBooleanOperator)
+        self.RunCheckpoint(self.PredicateExpressionCheckComparisonNullType)
 
     # Check whether Boolean values, variable type BOOLEAN not use explicit comparisons to TRUE or FALSE
     def PredicateExpressionCheckBooleanValue(self):
@@ -593,9 +677,9 @@ def PredicateExpressionCheckComparisonNullType(self):
 
     # Include file checking
     def IncludeFileCheck(self):
-        self.IncludeFileCheckIfndef()
-        self.IncludeFileCheckData()
-        self.IncludeFileCheckSameName()
+        self.RunCheckpoint(self.IncludeFileCheckIfndef)
+        self.RunCheckpoint(self.IncludeFileCheckData)
+        self.RunCheckpoint(self.IncludeFileCheckSameName)
 
     # Check whether having include files with same name
     def IncludeFileCheckSameName(self):
@@ -661,11 +745,11 @@ def IncludeFileCheckData(self):
 
     # Doxygen document checking
     def DoxygenCheck(self):
-        self.DoxygenCheckFileHeader()
-        self.DoxygenCheckFunctionHeader()
-        self.DoxygenCheckCommentDescription()
-        self.DoxygenCheckCommentFormat()
-        self.DoxygenCheckCommand()
+        self.RunCheckpoint(self.DoxygenCheckFileHeader)
+        self.RunCheckpoint(self.DoxygenCheckFunctionHeader)
+        self.RunCheckpoint(self.DoxygenCheckCommentDescription)
+        self.RunCheckpoint(self.DoxygenCheckCommentFormat)
+        self.RunCheckpoint(self.DoxygenCheckCommand)
 
     # Check whether the file headers are followed Doxygen special documentation blocks in section 2.3.5
     def DoxygenCheckFileHeader(self):
@@ -805,25 +889,25 @@ def DoxygenCheckCommand(self):
 
     # Meta-Data File Processing Checking
     def MetaDataFileCheck(self):
-        self.MetaDataFileCheckPathName()
-        self.MetaDataFileCheckGenerateFileList()
-        self.MetaDataFileCheckLibraryInstance()
-        self.MetaDataFileCheckLibraryInstanceDependent()
-        self.MetaDataFileCheckLibraryInstanceOrder()
-        self.MetaDataFileCheckLibraryNoUse()
-        self.MetaDataFileCheckLibraryDefinedInDec()
-        self.MetaDataFileCheckBinaryInfInFdf()
-        self.MetaDataFileCheckPcdDuplicate()
-        self.MetaDataFileCheckPcdFlash()
-        self.MetaDataFileCheckPcdNoUse()
-        self.MetaDataFileCheckGuidDuplicate()
-        self.MetaDataFileCheckModuleFileNoUse()
-        self.MetaDataFileCheckPcdType()
-        self.MetaDataFileCheckModuleFileGuidDuplication()
-        self.MetaDataFileCheckModuleFileGuidFormat()
-        self.MetaDataFileCheckModuleFileProtocolFormat()
-        self.MetaDataFileCheckModuleFilePpiFormat()
-        self.MetaDataFileCheckModuleFilePcdFormat()
+        self.RunCheckpoint(self.MetaDataFileCheckPathName)
+        self.RunCheckpoint(self.MetaDataFileCheckGenerateFileList)
+        self.RunCheckpoint(self.MetaDataFileCheckLibraryInstance)
+        self.RunCheckpoint(self.MetaDataFileCheckLibraryInstanceDependent)
+        self.RunCheckpoint(self.MetaDataFileCheckLibraryInstanceOrder)
+        self.RunCheckpoint(self.MetaDataFileCheckLibraryNoUse)
+        self.RunCheckpoint(self.MetaDataFileCheckLibraryDefinedInDec)
+        self.RunCheckpoint(self.MetaDataFileCheckBinaryInfInFdf)
+        self.RunCheckpoint(self.MetaDataFileCheckPcdDuplicate)
+        self.RunCheckpoint(self.MetaDataFileCheckPcdFlash)
+        self.RunCheckpoint(self.MetaDataFileCheckPcdNoUse)
+        self.RunCheckpoint(self.MetaDataFileCheckGuidDuplicate)
+        self.RunCheckpoint(self.MetaDataFileCheckModuleFileNoUse)
+        self.RunCheckpoint(self.MetaDataFileCheckPcdType)
+        self.RunCheckpoint(self.MetaDataFileCheckModuleFileGuidDuplication)
+        self.RunCheckpoint(self.MetaDataFileCheckModuleFileGuidFormat)
+        self.RunCheckpoint(self.MetaDataFileCheckModuleFileProtocolFormat)
+        self.RunCheckpoint(self.MetaDataFileCheckModuleFilePpiFormat)
+        self.RunCheckpoint(self.MetaDataFileCheckModuleFilePcdFormat)
 
     # Check whether each file defined in meta-data exists
     def MetaDataFileCheckPathName(self):
@@ -1392,8 +1476,8 @@ def NamingConventionCheck(self):
                         if os.path.splitext(F)[1] in ('.h'):
                             self.NamingConventionCheckIfndefStatement(FileTable)
 
-        self.NamingConventionCheckPathName()
-        self.NamingConventionCheckFunctionName()
+        self.RunCheckpoint(self.NamingConventionCheckPathName)
+        self.RunCheckpoint(self.NamingConventionCheckFunctionName)
 
     # Check whether only capital letters are used for #define declarations
     def NamingConventionCheckDefineStatement(self, FileTable):
@@ -1525,6 +1609,72 @@ def FindPara(FilePath, Para, CallingLine):
 
     return ''
 
+## ReportRecorder
+#
+# This class defined a report table keeping the inserted rows in memory, for
+# the main process to insert them into database
+#
+# @param TableReport:    Inherited from TableReport class
+#
+class ReportRecorder(TableReport):
+    def __init__(self, Cursor):
+        TableReport.__init__(self, Cursor)
+        self.RowList = []
+
+    def Insert(self, ErrorID, OtherMsg='', BelongsToTable='', BelongsToItem= -1, Enabled=0, Corrected= -1):
+        self.RowList.append((ErrorID, OtherMsg, BelongsToTable, BelongsToItem, Enabled, Corrected))
+        self.ID = self.ID + 1
+        return self.ID
+
+# Checker of worker process
+_CheckWorker = None
+
+## Initialize a worker process running checkpoints
+#
+# @param State:          The global data of main process
+#
+def InitCheckWorker(State):
+    global _CheckWorker
+    (DbPath, EccGlobalData.gWorkspace, EccGlobalData.gTarget, EccGlobalData.gConfig, EccGlobalData.gException,
+     EccGlobalData.gIdentifierTableList, EccGlobalData.gCFileList, EccGlobalData.gHFileList, EccGlobalData.gUFileList,
+     GlobalData.gWorkspace, LogLevel) = State
+    EdkLogger.SetLevel(LogLevel)
+    mws.setWs(GlobalData.gWorkspace, os.getenv("PACKAGES_PATH"))
+    EccGlobalData.gDb = Database.Database(DbPath)
+    EccGlobalData.gDb.InitDatabase(False, True)
+    EccGlobalData.gDb.TblReport = ReportRecorder(EccGlobalData.gDb.Cur)
+    _CheckWorker = Check()
+    _CheckWorker.FileList = EccGlobalData.gCFileList + EccGlobalData.gHFileList
+    _CheckWorker.CFileCount = len(EccGlobalData.gCFileList)
+
+## Run a checkpoint on a slice of the C/H file lists in worker process
+#
+# @param Task:           The checkpoint name, the slice index, and the start
+#                        and end of the slice
+#
+# @retval Name:          The checkpoint name
+# @retval RowList:       The report rows found by the checkpoint
+# @retval TotalTime:     The time spent in the checkpoint
+# @retval QueryTime:     The time spent in database queries
+#
+def RunCheckTask(Task):
+    Name, Index, Start, End = Task
+    FileList = _CheckWorker.FileList
+    CFileCount = _CheckWorker.CFileCount
+    EccGlobalData.gCFileList = FileList[Start:min(End, CFileCount)]
+    EccGlobalData.gHFileList = FileList[max(Start, CFileCount):End]
+    RowList = EccGlobalData.gDb.TblReport.RowList = []
+    LogLevel = EdkLogger.GetLevel()
+    # only the first slice tells the progress
+    if Index > 0:
+        EdkLogger.SetLevel(EdkLogger.ERROR)
+    try:
+        _CheckWorker.TimingList = []
+        _CheckWorker.RunCheckpoint(getattr(_CheckWorker, Name))
+    finally:
+        EdkLogger.SetLevel(LogLevel)
+    return (Name, RowList, _CheckWorker.TimingList[0][1], _CheckWorker.TimingList[0][2])
+
 ##
 #
 # This acts like the main() function for the script, unless it is 'import'ed into another
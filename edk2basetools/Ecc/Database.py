@@ -9,14 +9,15 @@
 # Import Modules
 #
 from __future__ import absolute_import
-import sqlite3
 import edk2basetools.Common.LongFilePathOs as os, time
 
 import edk2basetools.Common.EdkLogger as EdkLogger
 import edk2basetools.CommonDataClass.DataClass as DataClass
 
+from edk2basetools.Table.Connection import Connect, CreateIndexes
 from edk2basetools.Table.TableDataModel import TableDataModel
 from edk2basetools.Table.TableFile import TableFile
+from edk2basetools.Table.TableFileDigest import TableFileDigest
 from edk2basetools.Table.TableFunction import TableFunction
 from edk2basetools.Table.TablePcd import TablePcd
 from edk2basetools.Table.TableIdentifier import TableIdentifier
@@ -51,6 +52,7 @@ def __init__(self, DbPath):
         self.Cur = None
         self.TblDataModel = None
         self.TblFile = None
+        self.TblFileDigest = None
         self.TblFunction = None
         self.TblIdentifier = None
         self.TblPcd = None
@@ -66,7 +68,10 @@ def __init__(self, DbPath):
     # 2. Create new tables
     # 3. Initialize table DataModel
     #
-    def InitDatabase(self, NewDatabase = True):
+    # @param NewDatabase:  Create a new database file
+    # @param ReadOnly:     Open an existing database for queries only
+    #
+    def InitDatabase(self, NewDatabase = True, ReadOnly = False):
         EdkLogger.verbose("\nInitialize ECC database started ...")
         #
         # Drop all old existing tables
@@ -74,15 +79,11 @@ def InitDatabase(self, NewDatabase = True):
         if NewDatabase:
             if os.path.exists(self.DbPath):
                 os.remove(self.DbPath)
-        self.Conn = sqlite3.connect(self.DbPath, isolation_level = 'DEFERRED')
-        self.Conn.execute("PRAGMA page_size=4096")
-        self.Conn.execute("PRAGMA synchronous=OFF")
-        # to avoid non-ascii character conversion error
-        self.Conn.text_factory = str
-        self.Cur = self.Conn.cursor()
+        self.Conn, self.Cur = Connect(self.DbPath, 4096)
 
         self.TblDataModel = TableDataModel(self.Cur)
         self.TblFile = TableFile(self.Cur)
+        self.TblFileDigest = TableFileDigest(self.Cur)
         self.TblFunction = TableFunction(self.Cur)
         self.TblIdentifier = TableIdentifier(self.Cur)
         self.TblPcd = TablePcd(self.Cur)
@@ -105,6 +106,9 @@ def InitDatabase(self, NewDatabase = True):
             self.TblDec.Create()
             self.TblDsc.Create()
             self.TblFdf.Create()
+        # the table is missing in database created by old version
+        if not ReadOnly:
+            self.TblFileDigest.Create()
 
         #
         # Init each table's ID
@@ -125,6 +129,9 @@ def InitDatabase(self, NewDatabase = True):
         if NewDatabase:
             self.TblDataModel.InitTable()
 
+        if ReadOnly:
+            self.Cur.execute("PRAGMA query_only=ON")
+
         EdkLogger.verbose("Initialize ECC database ... DONE!")
 
     ## Query a table
@@ -155,11 +162,8 @@ def Close(self):
     #
     # Insert one file's information to the database
     # 1. Create a record in TableFile
-    # 2. Create functions one by one
-    #    2.1 Create variables of function one by one
-    #    2.2 Create pcds of function one by one
-    # 3. Create variables one by one
-    # 4. Create pcds one by one
+    # 2. Create all functions at once
+    # 3. Create all variables and pcds of functions and file at once
     #
     def InsertOneFile(self, File):
         #
@@ -172,37 +176,36 @@ def InsertOneFile(self, File):
             IdTable.Table = "Identifier%s" % FileID
             IdTable.Create()
             #
-            # Insert function of file
+            # Insert functions of file
             #
-            for Function in File.FunctionList:
-                FunctionID = self.TblFunction.Insert(Function.Header, Function.Modifier, Function.Name, Function.ReturnStatement, \
-                                        Function.StartLine, Function.StartColumn, Function.EndLine, Function.EndColumn, \
-                                        Function.BodyStartLine, Function.BodyStartColumn, FileID, \
-                                        Function.FunNameStartLine, Function.FunNameStartColumn)
-                #
-                # Insert Identifier of function
+            FunctionIdList = self.TblFunction.InsertMany((Function.Header, Function.Modifier, Function.Name, Function.ReturnStatement, \
+                                                          Function.StartLine, Function.StartColumn, Function.EndLine, Function.EndColumn, \
+                                                          Function.BodyStartLine, Function.BodyStartColumn, FileID, \
+                                                          Function.FunNameStartLine, Function.FunNameStartColumn)
+                                                         for Function in File.FunctionList)
+            IdentifierList = []
+            PcdList = []
+            for FunctionID, Function in zip(FunctionIdList, File.FunctionList):
                 #
-                for Identifier in Function.IdentifierList:
-                    IdentifierID = IdTable.Insert(Identifier.Modifier, Identifier.Type, Identifier.Name, Identifier.Value, Identifier.Model, \
-                                            FileID, FunctionID, Identifier.StartLine, Identifier.StartColumn, Identifier.EndLine, Identifier.EndColumn)
+                # Identifiers and pcds of function
                 #
-                # Insert Pcd of function
-                #
-                for Pcd in Function.PcdList:
-                    PcdID = self.TblPcd.Insert(Pcd.CName, Pcd.TokenSpaceGuidCName, Pcd.Token, Pcd.DatumType, Pcd.Model, \
-                                       FileID, FunctionID, Pcd.StartLine, Pcd.StartColumn, Pcd.EndLine, Pcd.EndColumn)
-            #
-            # Insert Identifier of file
+                IdentifierList.extend((Identifier.Modifier, Identifier.Type, Identifier.Name, Identifier.Value, Identifier.Model, \
+                                       FileID, FunctionID, Identifier.StartLine, Identifier.StartColumn, Identifier.EndLine, Identifier.EndColumn)
+                                      for Identifier in Function.IdentifierList)
+                PcdList.extend((Pcd.CName, Pcd.TokenSpaceGuidCName, Pcd.Token, Pcd.DatumType, Pcd.Model, \
+                                FileID, FunctionID, Pcd.StartLine, Pcd.StartColumn, Pcd.EndLine, Pcd.EndColumn)
+                               for Pcd in Function.PcdList)
             #
-            for Identifier in File.IdentifierList:
-                IdentifierID = IdTable.Insert(Identifier.Modifier, Identifier.Type, Identifier.Name, Identifier.Value, Identifier.Model, \
-                                        FileID, -1, Identifier.StartLine, Identifier.StartColumn, Identifier.EndLine, Identifier.EndColumn)
+            # Identifiers and pcds of file
             #
-            # Insert Pcd of file
-            #
-            for Pcd in File.PcdList:
-                PcdID = self.TblPcd.Insert(Pcd.CName, Pcd.TokenSpaceGuidCName, Pcd.Token, Pcd.DatumType, Pcd.Model, \
-                                   FileID, -1, Pcd.StartLine, Pcd.StartColumn, Pcd.EndLine, Pcd.EndColumn)
+            IdentifierList.extend((Identifier.Modifier, Identifier.Type, Identifier.Name, Identifier.Value, Identifier.Model, \
+                                   FileID, -1, Identifier.StartLine, Identifier.StartColumn, Identifier.EndLine, Identifier.EndColumn)
+                                  for Identifier in File.IdentifierList)
+            PcdList.extend((Pcd.CName, Pcd.TokenSpaceGuidCName, Pcd.Token, Pcd.DatumType, Pcd.Model, \
+                            FileID, -1, Pcd.StartLine, Pcd.StartColumn, Pcd.EndLine, Pcd.EndColumn)
+                           for Pcd in File.PcdList)
+            IdTable.InsertMany(IdentifierList)
+            self.TblPcd.InsertMany(PcdList)
 
         EdkLogger.verbose("Insert information from file %s ... DONE!" % File.FullPath)
 
@@ -259,51 +262,111 @@ def UpdateIdentifierBelongsToFunction_disabled(self):
         EdkLogger.verbose("Update 'BelongsToFunction' for Identifiers ... DONE")
 
 
+    ## Get the source files in database
+    #
+    # Get the C/H and other files found in source tree by previous run
+    #
+    # @retval dict:  The dict of file full path to (file ID, time stamp, digest)
+    #
+    def GetSourceFiles(self):
+        Digests = self.TblFileDigest.GetDigests()
+        SqlCommand = """select ID, FullPath, TimeStamp from File where Model in (%s, %s, %s)""" % \
+                     (DataClass.MODEL_FILE_C, DataClass.MODEL_FILE_H, DataClass.MODEL_FILE_OTHERS)
+        return dict((FullPath, (FileID, TimeStamp, Digests.get(FileID)))
+                    for FileID, FullPath, TimeStamp in self.TblFile.Exec(SqlCommand))
+
+    ## Delete one file information
+    #
+    # Delete the records of a source file, including its functions, pcds and
+    # identifier table
+    #
+    # @param FileID:  ID of the file in table File
+    #
+    def DeleteOneFile(self, FileID):
+        self.Cur.execute("""delete from File where ID = %s""" % FileID)
+        self.Cur.execute("""delete from FileDigest where ID = %s""" % FileID)
+        self.Cur.execute("""delete from Function where BelongsToFile = %s""" % FileID)
+        self.Cur.execute("""delete from Pcd where BelongsToFile = %s""" % FileID)
+        self.Cur.execute("""drop table IF EXISTS Identifier%s""" % FileID)
+
+    ## Delete meta data information
+    #
+    # Delete the records of meta data files, which are always parsed again
+    #
+    def DeleteMetaData(self):
+        for Tbl in (self.TblInf, self.TblDec, self.TblDsc, self.TblFdf):
+            Tbl.Drop()
+            Tbl.Create()
+        SqlCommand = """delete from File where Model not in (%s, %s, %s)""" % \
+                     (DataClass.MODEL_FILE_C, DataClass.MODEL_FILE_H, DataClass.MODEL_FILE_OTHERS)
+        self.Cur.execute(SqlCommand)
+        self.TblFile.InitID()
+        self.TblInf.InitID()
+        self.TblDec.InitID()
+        self.TblDsc.InitID()
+        self.TblFdf.InitID()
+
     ## UpdateIdentifierBelongsToFunction
     #
     # Update the field "BelongsToFunction" for each Identifier
     #
+    # @param MinFileID:  Only the files whose ID is larger are updated
     #
-    def UpdateIdentifierBelongsToFunction(self):
+    def UpdateIdentifierBelongsToFunction(self, MinFileID = 0):
         EdkLogger.verbose("Update 'BelongsToFunction' for Identifiers started ...")
 
-        SqlCommand = """select ID, BelongsToFile, StartLine, EndLine from Function"""
+        SqlCommand = """select ID, BelongsToFile, StartLine, EndLine from Function where BelongsToFile > %s""" % MinFileID
         Records = self.TblFunction.Exec(SqlCommand)
-        Data1 = []
-        Data2 = []
+        Data1 = {}
+        Data2 = {}
         for Record in Records:
             FunctionID = Record[0]
             BelongsToFile = Record[1]
             StartLine = Record[2]
             EndLine = Record[3]
-            #Data1.append(("'file%s'" % BelongsToFile, FunctionID, BelongsToFile, StartLine, EndLine))
-            #Data2.append(("'file%s'" % BelongsToFile, FunctionID, DataClass.MODEL_IDENTIFIER_FUNCTION_HEADER, BelongsToFile, DataClass.MODEL_IDENTIFIER_COMMENT, StartLine - 1))
-
-            SqlCommand = """Update Identifier%s set BelongsToFunction = %s where BelongsToFile = %s and StartLine > %s and EndLine < %s""" % \
-                        (BelongsToFile, FunctionID, BelongsToFile, StartLine, EndLine)
-            self.TblIdentifier.Exec(SqlCommand)
-
-            SqlCommand = """Update Identifier%s set BelongsToFunction = %s, Model = %s where BelongsToFile = %s and Model = %s and EndLine = %s""" % \
-                         (BelongsToFile, FunctionID, DataClass.MODEL_IDENTIFIER_FUNCTION_HEADER, BelongsToFile, DataClass.MODEL_IDENTIFIER_COMMENT, StartLine - 1)
-            self.TblIdentifier.Exec(SqlCommand)
-#       #
-#       # Check whether an identifier belongs to a function
-#       #
-#       print Data1
-#       SqlCommand = """Update ? set BelongsToFunction = ? where BelongsToFile = ? and StartLine > ? and EndLine < ?"""
-#       print SqlCommand
-#       EdkLogger.debug(4, "SqlCommand: %s" %SqlCommand)
-#       self.Cur.executemany(SqlCommand, Data1)
-#
-#       #
-#       # Check whether the identifier is a function header
-#       #
-#       EdkLogger.debug(4, "For function headers ... ")
-#       SqlCommand = """Update ? set BelongsToFunction = ?, Model = ? where BelongsToFile = ? and Model = ? and EndLine = ?"""
-#       EdkLogger.debug(4, "SqlCommand: %s" %SqlCommand)
-#       self.Cur.executemany(SqlCommand, Data2)
-#
-#       EdkLogger.verbose("Update 'BelongsToFunction' for Identifiers ... DONE")
+            Data1.setdefault(BelongsToFile, []).append((FunctionID, BelongsToFile, StartLine, EndLine))
+            Data2.setdefault(BelongsToFile, []).append((FunctionID, DataClass.MODEL_IDENTIFIER_FUNCTION_HEADER, BelongsToFile, DataClass.MODEL_IDENTIFIER_COMMENT, StartLine - 1))
+
+        for BelongsToFile in Data1:
+            #
+            # Check whether an identifier belongs to a function
+            #
+            SqlCommand = """Update Identifier%s set BelongsToFunction = ? where BelongsToFile = ? and StartLine > ? and EndLine < ?""" % BelongsToFile
+            self.Cur.executemany(SqlCommand, Data1[BelongsToFile])
+            #
+            # Check whether the identifier is a function header
+            #
+            SqlCommand = """Update Identifier%s set BelongsToFunction = ?, Model = ? where BelongsToFile = ? and Model = ? and EndLine = ?""" % BelongsToFile
+            self.Cur.executemany(SqlCommand, Data2[BelongsToFile])
+
+        EdkLogger.verbose("Update 'BelongsToFunction' for Identifiers ... DONE")
+
+    ## Create indexes
+    #
+    # Create indexes on the columns checkpoints look up records by. They are
+    # created after all records are inserted, which is faster than updating
+    # them along with each insertion.
+    #
+    def CreateIndexes(self):
+        EdkLogger.verbose("Create indexes started ...")
+        IndexList = [
+            ('File', ('Model',)),
+            ('File', ('FullPath',)),
+            ('File', ('Path',)),
+            ('Function', ('BelongsToFile',)),
+            ('Pcd', ('BelongsToFile',)),
+            ('Inf', ('Model',)),
+            ('Inf', ('BelongsToFile',)),
+            ('Dec', ('Model',)),
+            ('Dsc', ('Model',)),
+            ('Fdf', ('Model',)),
+        ]
+        SqlCommand = """select ID from File where Model in (%s, %s)""" % (DataClass.MODEL_FILE_C, DataClass.MODEL_FILE_H)
+        for Record in self.TblFile.Exec(SqlCommand):
+            IndexList.append(('Identifier%s' % Record[0], ('Model',)))
+        CreateIndexes(self.Cur, IndexList)
+        self.Conn.commit()
+        EdkLogger.verbose("Create indexes ... DONE")
 
 
 ##
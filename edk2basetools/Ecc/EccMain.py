@@ -11,6 +11,7 @@
 #
 from __future__ import absolute_import
 import edk2basetools.Common.LongFilePathOs as os, time, glob, sys
+import multiprocessing
 import edk2basetools.Common.EdkLogger as EdkLogger
 from edk2basetools.Ecc import Database
 from edk2basetools.Ecc import EccGlobalData
@@ -58,6 +59,8 @@ def __init__(self):
         self.ScanMetaData = True
         self.MetaFile = ''
         self.OnlyScan = None
+        self.Incremental = False
+        self.Jobs = 1
 
         # Parse the options and args
         self.ParseOption()
@@ -83,7 +86,7 @@ def __init__(self):
 
         # Init Ecc database
         EccGlobalData.gDb = Database.Database(Database.DATABASE_PATH)
-        EccGlobalData.gDb.InitDatabase(self.IsInit)
+        EccGlobalData.gDb.InitDatabase(self.IsInit and not (self.Incremental and os.path.exists(Database.DATABASE_PATH)))
 
         #
         # Get files real name in workspace dir
@@ -144,15 +147,18 @@ def BuildDatabase(self, SpeciDirs = None):
         if self.IsInit:
             if self.ScanMetaData:
                 EdkLogger.quiet("Building database for Meta Data File ...")
+                if self.Incremental:
+                    EccGlobalData.gDb.DeleteMetaData()
                 self.BuildMetaDataFileDatabase(SpeciDirs)
             if self.ScanSourceCode:
                 EdkLogger.quiet("Building database for Meta Data File Done!")
                 if SpeciDirs is None:
-                    c.CollectSourceCodeDataIntoDB(EccGlobalData.gTarget)
+                    c.CollectSourceCodeDataIntoDB(EccGlobalData.gTarget, self.Jobs, self.Incremental)
                 else:
                     for specificDir in SpeciDirs:
-                        c.CollectSourceCodeDataIntoDB(os.path.join(EccGlobalData.gTarget, specificDir))
+                        c.CollectSourceCodeDataIntoDB(os.path.join(EccGlobalData.gTarget, specificDir), self.Jobs, self.Incremental)
 
+        EccGlobalData.gDb.CreateIndexes()
         EccGlobalData.gIdentifierTableList = GetTableList((MODEL_FILE_C, MODEL_FILE_H), 'Identifier', EccGlobalData.gDb)
         EccGlobalData.gCFileList = GetFileList(MODEL_FILE_C, EccGlobalData.gDb)
         EccGlobalData.gHFileList = GetFileList(MODEL_FILE_H, EccGlobalData.gDb)
@@ -245,7 +251,7 @@ def BuildMetaDataFileDatabase(self, SpecificDirs = None):
     def Check(self):
         EdkLogger.quiet("Checking ...")
         EccCheck = Check()
-        EccCheck.Check()
+        EccCheck.Check(self.Jobs)
         EdkLogger.quiet("Checking  done!")
 
     ##
@@ -333,6 +339,16 @@ def ParseOption(self):
             EccGlobalData.gTarget = os.path.normpath(os.getenv("WORKSPACE"))
         if Options.keepdatabase is not None:
             self.IsInit = False
+        if Options.incremental is not None:
+            if Options.keepdatabase is not None:
+                EdkLogger.error("ECC", BuildToolError.OPTION_CONFLICT, ExtraData="-k and -i can't be specified at one time")
+            self.Incremental = True
+        if Options.jobs is not None:
+            if Options.jobs < 1:
+                EdkLogger.error("ECC", BuildToolError.OPTION_VALUE_INVALID, ExtraData="Jobs [%d] must be a positive number" % Options.jobs)
+            self.Jobs = Options.jobs
+        else:
+            self.Jobs = multiprocessing.cpu_count()
         if Options.metadata is not None and Options.sourcecode is not None:
             EdkLogger.error("ECC", BuildToolError.OPTION_CONFLICT, ExtraData="-m and -s can't be specified at one time")
         if Options.metadata is not None:
@@ -380,6 +396,9 @@ def EccOptionParser(self):
         Parser.add_option("-m", "--metadata", action="store_true", type=None, help="Only scan meta-data files information if this option is specified.")
         Parser.add_option("-s", "--sourcecode", action="store_true", type=None, help="Only scan source code files information if this option is specified.")
         Parser.add_option("-k", "--keepdatabase", action="store_true", type=None, help="The existing Ecc database will not be cleaned except report information if this option is specified.")
+        Parser.add_option("-i", "--incremental", action="store_true", type=None, help="Reuse the existing Ecc database and only parse the source files changed since it was built. "\
+                                                                                        "Meta data files are always parsed again.")
+        Parser.add_option("-j", "--jobs", action="store", type="int", dest="jobs", help="Number of processes parsing source files. Defaultly use the number of processors.")
         Parser.add_option("-l", "--log filename", action="store", dest="LogFile", help="""If specified, the tool should emit the changes that
                                                                                           were made by the tool after printing the result message.
                                                                                           If filename, the emit to the file, otherwise emit to
@@ -12,6 +12,8 @@
 import edk2basetools.Common.LongFilePathOs as os
 import re
 import string
+import multiprocessing
+from hashlib import md5
 from edk2basetools.Ecc import CodeFragmentCollector
 from edk2basetools.Ecc import FileProfile
 from edk2basetools.CommonDataClass import DataClass
@@ -27,6 +29,8 @@
 ComplexTypeDict = {}
 SUDict = {}
 IgnoredKeywordList = ['EFI_ERROR']
+# number of parsed files committed to database at a time
+COMMIT_BATCH_SIZE = 100
 
 def GetIgnoredDirListPattern():
     skipList = list(EccGlobalData.gConfig.SkipDirList) + ['.svn']
@@ -493,8 +497,49 @@ def GetFileModificationTimeFromDB(FullFileName):
         TimeValue = Result[0]
     return TimeValue
 
-def CollectSourceCodeDataIntoDB(RootDir):
-    FileObjList = []
+## Parse a source file
+#
+# Run in the worker processes of CollectSourceCodeDataIntoDB
+#
+# @param Task:     Tuple of (file full path, file model, time stamp, token replace list)
+#
+# @retval tuple:   (FileClass object, whether parsing is recovered from error, digest)
+#
+def ParseSourceFile(Task):
+    FullName, Model, ModifiedTime, TokenReleaceList = Task
+    with open(FullName, 'rb') as Fd:
+        Digest = md5(Fd.read()).hexdigest()
+    ParseError = False
+    collector = None
+    if Model != DataClass.MODEL_FILE_OTHERS:
+        collector = CodeFragmentCollector.CodeFragmentCollector(FullName)
+        collector.TokenReleaceList = TokenReleaceList
+        try:
+            collector.ParseFile()
+        except UnicodeError:
+            ParseError = True
+            collector.CleanFileProfileBuffer()
+            collector.ParseFileWithClearedPPDirective()
+    BaseName = os.path.basename(FullName)
+    DirName = os.path.dirname(FullName)
+    Ext = os.path.splitext(FullName)[1].lstrip('.')
+    FileObj = DataClass.FileClass(-1, BaseName, Ext, DirName, FullName, Model, ModifiedTime, GetFunctionList(), GetIdentifierList(), [])
+    if collector:
+        collector.CleanFileProfileBuffer()
+    return FileObj, ParseError, Digest
+
+## Collect the information of source files into database
+#
+# The files are parsed in a pool of processes, and their information is
+# committed to database in batches. If Incremental is True, the files having
+# the same time stamp or content as in database are not parsed again.
+#
+# @param RootDir:      The root directory of source files
+# @param Jobs:         The number of processes to parse files
+# @param Incremental:  Whether to keep the information of unchanged files in database
+#
+def CollectSourceCodeDataIntoDB(RootDir, Jobs = 1, Incremental = False):
+    FileList = []
     tuple = os.walk(RootDir)
     IgnoredPattern = GetIgnoredDirListPattern()
     ParseErrorFileList = []
@@ -517,39 +562,71 @@ def CollectSourceCodeDataIntoDB(RootDir):
         for f in filenames:
             if f.lower() in EccGlobalData.gConfig.SkipFileList:
                 continue
-            collector = None
+            if os.path.splitext(f)[1].lstrip('.').upper() in ['INF', 'DEC', 'DSC', 'FDF']:
+                continue
             FullName = os.path.normpath(os.path.join(dirpath, f))
             model = DataClass.MODEL_FILE_OTHERS
             if os.path.splitext(f)[1] in ('.h', '.c'):
-                EdkLogger.info("Parsing " + FullName)
                 model = f.endswith('c') and DataClass.MODEL_FILE_C or DataClass.MODEL_FILE_H
-                collector = CodeFragmentCollector.CodeFragmentCollector(FullName)
-                collector.TokenReleaceList = TokenReleaceList
-                try:
-                    collector.ParseFile()
-                except UnicodeError:
-                    ParseErrorFileList.append(FullName)
-                    collector.CleanFileProfileBuffer()
-                    collector.ParseFileWithClearedPPDirective()
-#                collector.PrintFragments()
-            BaseName = os.path.basename(f)
-            DirName = os.path.dirname(FullName)
-            Ext = os.path.splitext(f)[1].lstrip('.')
-            ModifiedTime = os.path.getmtime(FullName)
-            FileObj = DataClass.FileClass(-1, BaseName, Ext, DirName, FullName, model, ModifiedTime, GetFunctionList(), GetIdentifierList(), [])
-            FileObjList.append(FileObj)
-            if collector:
-                collector.CleanFileProfileBuffer()
+            FileList.append((FullName, model))
+
+    Db = GetDB()
+    OldFileDict = {}
+    if Incremental:
+        RootPrefix = os.path.join(os.path.normpath(RootDir), '')
+        OldFileDict = dict((FullName, Value) for FullName, Value in Db.GetSourceFiles().items()
+                           if FullName.startswith(RootPrefix))
+    TaskList = []
+    for FullName, model in FileList:
+        ModifiedTime = os.path.getmtime(FullName)
+        OldFile = OldFileDict.pop(FullName, None)
+        if OldFile is not None:
+            FileID, TimeStamp, Digest = OldFile
+            if str(TimeStamp) == str(ModifiedTime):
+                continue
+            if Digest is not None:
+                with open(FullName, 'rb') as Fd:
+                    if md5(Fd.read()).hexdigest() == Digest:
+                        Db.TblFile.Exec("update File set TimeStamp = '%s' where ID = %s" % (ModifiedTime, FileID))
+                        continue
+            Db.DeleteOneFile(FileID)
+        TaskList.append((FullName, model, ModifiedTime, TokenReleaceList))
+    # files removed from source tree
+    for FileID, TimeStamp, Digest in OldFileDict.values():
+        Db.DeleteOneFile(FileID)
+    if Incremental:
+        EdkLogger.quiet("%d of %d source files changed" % (len(TaskList), len(FileList)))
+
+    Db.TblFile.InitID()
+    Db.TblFunction.InitID()
+    Db.TblPcd.InitID()
+    MinFileID = Db.TblFile.ID
+    Pool = None
+    if Jobs > 1 and len(TaskList) > 1:
+        Pool = multiprocessing.Pool(min(Jobs, len(TaskList)))
+        ResultIter = Pool.imap(ParseSourceFile, TaskList, chunksize=4)
+    else:
+        ResultIter = map(ParseSourceFile, TaskList)
+    try:
+        for Index, (FileObj, ParseError, Digest) in enumerate(ResultIter):
+            if FileObj.Model != DataClass.MODEL_FILE_OTHERS:
+                EdkLogger.info("Parsing " + FileObj.FullPath)
+            if ParseError:
+                ParseErrorFileList.append(FileObj.FullPath)
+            Db.InsertOneFile(FileObj)
+            Db.TblFileDigest.Insert(Db.TblFile.ID, Digest)
+            if (Index + 1) % COMMIT_BATCH_SIZE == 0:
+                Db.Conn.commit()
+    finally:
+        if Pool:
+            Pool.terminate()
+            Pool.join()
 
     if len(ParseErrorFileList) > 0:
         EdkLogger.info("Found unrecoverable error during parsing:\n\t%s\n" % "\n\t".join(ParseErrorFileList))
 
-    Db = GetDB()
-    for file in FileObjList:
-        if file.ExtName.upper() not in ['INF', 'DEC', 'DSC', 'FDF']:
-            Db.InsertOneFile(file)
-
-    Db.UpdateIdentifierBelongsToFunction()
+    Db.UpdateIdentifierBelongsToFunction(MinFileID)
+    Db.Conn.commit()
 
 def GetTableID(FullFileName, ErrorMsgList=None):
     if ErrorMsgList is None:
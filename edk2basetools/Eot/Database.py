@@ -8,12 +8,12 @@
 ##
 # Import Modules
 #
-import sqlite3
 import edk2basetools.Common.LongFilePathOs as os, time
 
 import edk2basetools.Common.EdkLogger as EdkLogger
 import edk2basetools.CommonDataClass.DataClass as DataClass
 
+from edk2basetools.Table.Connection import Connect, CreateIndexes
 from edk2basetools.Table.TableDataModel import TableDataModel
 from edk2basetools.Table.TableFile import TableFile
 from edk2basetools.Table.TableFunction import TableFunction
@@ -74,12 +74,7 @@ def InitDatabase(self, NewDatabase = True):
         if NewDatabase:
             if os.path.exists(self.DbPath):
                 os.remove(self.DbPath)
-        self.Conn = sqlite3.connect(self.DbPath, isolation_level = 'DEFERRED')
-        self.Conn.execute("PRAGMA page_size=8192")
-        self.Conn.execute("PRAGMA synchronous=OFF")
-        # to avoid non-ascii character conversion error
-        self.Conn.text_factory = str
-        self.Cur = self.Conn.cursor()
+        self.Conn, self.Cur = Connect(self.DbPath, 8192)
 
         self.TblDataModel = TableDataModel(self.Cur)
         self.TblFile = TableFile(self.Cur)
@@ -156,11 +151,8 @@ def Close(self):
     #
     # Insert one file's information to the database
     # 1. Create a record in TableFile
-    # 2. Create functions one by one
-    #    2.1 Create variables of function one by one
-    #    2.2 Create pcds of function one by one
-    # 3. Create variables one by one
-    # 4. Create pcds one by one
+    # 2. Create all functions at once
+    # 3. Create all variables of functions and file at once
     #
     # @param self: The object pointer
     # @param File: The object of the file to be inserted
@@ -172,21 +164,23 @@ def InsertOneFile(self, File):
         IdTable.Table = "Identifier%s" % FileID
         IdTable.Create()
 
-        # Insert function of file
-        for Function in File.FunctionList:
-            FunctionID = self.TblFunction.Insert(Function.Header, Function.Modifier, Function.Name, Function.ReturnStatement, \
-                                    Function.StartLine, Function.StartColumn, Function.EndLine, Function.EndColumn, \
-                                    Function.BodyStartLine, Function.BodyStartColumn, FileID, \
-                                    Function.FunNameStartLine, Function.FunNameStartColumn)
-
-            # Insert Identifier of function
-            for Identifier in Function.IdentifierList:
-                IdentifierID = IdTable.Insert(Identifier.Modifier, Identifier.Type, Identifier.Name, Identifier.Value, Identifier.Model, \
-                                        FileID, FunctionID, Identifier.StartLine, Identifier.StartColumn, Identifier.EndLine, Identifier.EndColumn)
-        # Insert Identifier of file
-        for Identifier in File.IdentifierList:
-            IdentifierID = IdTable.Insert(Identifier.Modifier, Identifier.Type, Identifier.Name, Identifier.Value, Identifier.Model, \
-                                    FileID, -1, Identifier.StartLine, Identifier.StartColumn, Identifier.EndLine, Identifier.EndColumn)
+        # Insert functions of file
+        FunctionIdList = self.TblFunction.InsertMany((Function.Header, Function.Modifier, Function.Name, Function.ReturnStatement, \
+                                                      Function.StartLine, Function.StartColumn, Function.EndLine, Function.EndColumn, \
+                                                      Function.BodyStartLine, Function.BodyStartColumn, FileID, \
+                                                      Function.FunNameStartLine, Function.FunNameStartColumn)
+                                                     for Function in File.FunctionList)
+
+        # Insert Identifiers of functions and file
+        IdentifierList = []
+        for FunctionID, Function in zip(FunctionIdList, File.FunctionList):
+            IdentifierList.extend((Identifier.Modifier, Identifier.Type, Identifier.Name, Identifier.Value, Identifier.Model, \
+                                   FileID, FunctionID, Identifier.StartLine, Identifier.StartColumn, Identifier.EndLine, Identifier.EndColumn)
+                                  for Identifier in Function.IdentifierList)
+        IdentifierList.extend((Identifier.Modifier, Identifier.Type, Identifier.Name, Identifier.Value, Identifier.Model, \
+                               FileID, -1, Identifier.StartLine, Identifier.StartColumn, Identifier.EndLine, Identifier.EndColumn)
+                              for Identifier in File.IdentifierList)
+        IdTable.InsertMany(IdentifierList)
 
         EdkLogger.verbose("Insert information from file %s ... DONE!" % File.FullPath)
 
@@ -201,21 +195,36 @@ def UpdateIdentifierBelongsToFunction(self):
 
         SqlCommand = """select ID, BelongsToFile, StartLine, EndLine from Function"""
         Records = self.TblFunction.Exec(SqlCommand)
-        Data1 = []
-        Data2 = []
+        Data1 = {}
+        Data2 = {}
         for Record in Records:
             FunctionID = Record[0]
             BelongsToFile = Record[1]
             StartLine = Record[2]
             EndLine = Record[3]
+            Data1.setdefault(BelongsToFile, []).append((FunctionID, BelongsToFile, StartLine, EndLine))
+            Data2.setdefault(BelongsToFile, []).append((FunctionID, DataClass.MODEL_IDENTIFIER_FUNCTION_HEADER, BelongsToFile, DataClass.MODEL_IDENTIFIER_COMMENT, StartLine - 1))
 
-            SqlCommand = """Update Identifier%s set BelongsToFunction = %s where BelongsToFile = %s and StartLine > %s and EndLine < %s""" % \
-                        (BelongsToFile, FunctionID, BelongsToFile, StartLine, EndLine)
-            self.TblIdentifier.Exec(SqlCommand)
+        for BelongsToFile in Data1:
+            SqlCommand = """Update Identifier%s set BelongsToFunction = ? where BelongsToFile = ? and StartLine > ? and EndLine < ?""" % BelongsToFile
+            self.Cur.executemany(SqlCommand, Data1[BelongsToFile])
+            SqlCommand = """Update Identifier%s set BelongsToFunction = ?, Model = ? where BelongsToFile = ? and Model = ? and EndLine = ?""" % BelongsToFile
+            self.Cur.executemany(SqlCommand, Data2[BelongsToFile])
 
-            SqlCommand = """Update Identifier%s set BelongsToFunction = %s, Model = %s where BelongsToFile = %s and Model = %s and EndLine = %s""" % \
-                         (BelongsToFile, FunctionID, DataClass.MODEL_IDENTIFIER_FUNCTION_HEADER, BelongsToFile, DataClass.MODEL_IDENTIFIER_COMMENT, StartLine - 1)
-            self.TblIdentifier.Exec(SqlCommand)
+    ## CreateIndexes() method
+    #
+    #  Create indexes on the columns the analysis looks up records by
+    #
+    #  @param self: The object pointer
+    #
+    def CreateIndexes(self):
+        CreateIndexes(self.Cur, [
+            ('File', ('FullPath',)),
+            ('Function', ('BelongsToFile',)),
+            ('Inf', ('BelongsToFile',)),
+            ('Inf', ('Value1',)),
+        ])
+        self.Conn.commit()
 
 
 ##
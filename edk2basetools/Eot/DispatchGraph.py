@@ -0,0 +1,82 @@
+## @file
+# This file is used to define the graph of modules and the PPIs/Protocols they produce
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+from collections import OrderedDict
+from edk2basetools.CommonDataClass.DataClass import MODEL_META_DATA_HEADER, MODEL_EFI_SOURCE_FILE
+
+## DispatchGraph() class
+#
+#  The PPIs and Protocols produced by each module, indexed by module GUID. It
+#  is built once before dispatch, so that the dispatcher needs no database
+#  query when a module is dispatched.
+#
+#  The graph can be built from Eot database, which knows the PPIs/Protocols
+#  installed in the source code of modules, or by build tools from the usages
+#  of PPIs/Protocols declared in INF files.
+#
+class DispatchGraph(object):
+    def __init__(self):
+        self.PpiDict = OrderedDict()
+        self.ProtocolDict = OrderedDict()
+
+    ## Add the PPIs and Protocols produced by a module
+    #
+    #  @param  ModuleGuid: The FILE_GUID of the module
+    #  @param  PpiList: The GUID values of produced PPIs
+    #  @param  ProtocolList: The GUID values of produced Protocols
+    #
+    def AddModule(self, ModuleGuid, PpiList=(), ProtocolList=()):
+        ModuleGuid = ModuleGuid.lower()
+        for Dict, GuidList in ((self.PpiDict, PpiList), (self.ProtocolDict, ProtocolList)):
+            ProducedList = Dict.setdefault(ModuleGuid, [])
+            for Guid in GuidList:
+                if Guid not in ProducedList:
+                    ProducedList.append(Guid)
+
+    def GetPpiList(self, ModuleGuid):
+        return self.PpiDict.get(ModuleGuid.lower(), [])
+
+    def GetProtocolList(self, ModuleGuid):
+        return self.ProtocolDict.get(ModuleGuid.lower(), [])
+
+## Build the graph from Eot database
+#
+#  A module produces the PPIs/Protocols installed in the source files of the
+#  first INF file having its FILE_GUID.
+#
+#  @param  Db: Eot database
+#
+#  @retval DispatchGraph: The graph of all modules in database
+#
+def BuildDispatchGraph(Db):
+    FileDict = OrderedDict()
+    SqlCommand = """select Value2, BelongsToFile from Inf where Value1 = 'FILE_GUID' and Model = %s order by ID""" \
+                 % MODEL_META_DATA_HEADER
+    for ModuleGuid, FileID in Db.TblInf.Exec(SqlCommand):
+        FileDict.setdefault(ModuleGuid.lower(), FileID)
+
+    SourceDict = {}
+    SqlCommand = """select BelongsToFile, Value1 from Inf where Model = %s""" % MODEL_EFI_SOURCE_FILE
+    for FileID, SourceFile in Db.TblInf.Exec(SqlCommand):
+        SourceDict.setdefault(SourceFile, set()).add(FileID)
+
+    PpiDict = {}
+    ProtocolDict = {}
+    SqlCommand = """select SourceFileFullPath, ItemType, GuidValue from Report
+                    where ItemMode = 'Produced' and (ItemType = 'Ppi' or ItemType = 'Protocol') order by ID"""
+    for SourceFile, ItemType, GuidValue in Db.TblReport.Exec(SqlCommand):
+        Dict = PpiDict if ItemType == 'Ppi' else ProtocolDict
+        for FileID in SourceDict.get(SourceFile, ()):
+            Dict.setdefault(FileID, []).append(GuidValue)
+
+    Graph = DispatchGraph()
+    for ModuleGuid, FileID in FileDict.items():
+        Graph.AddModule(ModuleGuid, PpiDict.get(FileID, []), ProtocolDict.get(FileID, []))
+    return Graph
@@ -20,14 +20,14 @@
 from edk2basetools.Eot.Parser import *
 from edk2basetools.Eot.InfParserLite import EdkInfParser
 from edk2basetools.Common.StringUtils import GetSplitValueList
-from edk2basetools.Eot import c
 from edk2basetools.Eot import Database
-from array import array
+from edk2basetools.Eot.DispatchGraph import BuildDispatchGraph
 from edk2basetools.Eot.Report import Report
 from edk2basetools.Common.BuildVersion import gBUILD_VERSION
 from edk2basetools.Eot.Parser import ConvertGuid
 from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
 import struct
+import mmap
 import uuid
 import copy
 import codecs
@@ -36,13 +36,32 @@
 gGuidStringFormat = "%08X-%04X-%04X-%02X%02X-%02X%02X%02X%02X%02X%02X"
 gIndention = -4
 
-class Image(array):
+## Map a file into memory
+#
+#  The images in the file are slices of the returned memoryview, so that they
+#  are not copied when the file is parsed.
+#
+#  @param  FilePath: The path of the file
+#
+#  @return A read-only memoryview of the file content
+#
+def MapFile(FilePath):
+    if os.path.getsize(FilePath) == 0:
+        return memoryview(b'')
+    with open(FilePath, 'rb') as Fd:
+        return memoryview(mmap.mmap(Fd.fileno(), 0, access=mmap.ACCESS_READ))
+
+## Image() class
+#
+#  A base class for the images in firmware. The bytes kept in an Image object
+#  (the header, or the whole image if it has no sub-image) are a memoryview
+#  slice of the buffer the image is in. They are copied only when a field of
+#  the image is changed.
+#
+class Image(object):
     _HEADER_ = struct.Struct("")
     _HEADER_SIZE_ = _HEADER_.size
 
-    def __new__(cls, *args, **kwargs):
-        return array.__new__(cls, 'B')
-
     def __init__(self, ID=None):
         if ID is None:
             self._ID_ = str(uuid.uuid1()).upper()
@@ -51,57 +70,67 @@ def __init__(self, ID=None):
         self._BUF_ = None
         self._LEN_ = None
         self._OFF_ = None
+        self._DATA_ = memoryview(b'')
 
         self._SubImages = sdict() # {offset: Image()}
 
-        array.__init__(self)
-
     def __repr__(self):
         return self._ID_
 
     def __len__(self):
-        Len = array.__len__(self)
-        for Offset in self._SubImages.keys():
-            Len += len(self._SubImages[Offset])
-        return Len
+        if self._LEN_ is None:
+            self._LEN_ = len(self._DATA_)
+            for Offset in self._SubImages.keys():
+                self._LEN_ += len(self._SubImages[Offset])
+        return self._LEN_
+
+    def __getitem__(self, Key):
+        return self._DATA_[Key]
 
     def _Unpack(self):
-        self.extend(self._BUF_[self._OFF_ : self._OFF_ + self._LEN_])
-        return len(self)
+        self._DATA_ = self._BUF_[self._OFF_ : self._OFF_ + self._LEN_]
+        return len(self._DATA_)
 
     def _Pack(self, PadByte=0xFF):
         raise NotImplementedError
 
     def frombuffer(self, Buffer, Offset=0, Size=None):
-        self._BUF_ = Buffer
+        self._BUF_ = memoryview(Buffer)
         self._OFF_ = Offset
         # we may need the Size information in advance if it's given
         self._LEN_ = Size
         self._LEN_ = self._Unpack()
 
+    def tofile(self, f):
+        f.write(self._DATA_)
+
     def empty(self):
-        del self[0:]
+        self._DATA_ = memoryview(b'')
+        self._LEN_ = None
 
     def GetField(self, FieldStruct, Offset=0):
-        return FieldStruct.unpack_from(self, Offset)
+        return FieldStruct.unpack_from(self._DATA_, Offset)
 
     def SetField(self, FieldStruct, Offset, *args):
-        # check if there's enough space
+        # copy the data out of the buffer before changing it, and check if there's enough space
+        Data = bytearray(self._DATA_)
         Size = FieldStruct.size
-        if Size > len(self):
-            self.extend([0] * (Size - len(self)))
-        FieldStruct.pack_into(self, Offset, *args)
+        if Size > len(Data):
+            Data.extend([0] * (Size - len(Data)))
+        FieldStruct.pack_into(Data, Offset, *args)
+        self._DATA_ = memoryview(Data)
+        self._LEN_ = None
 
     def _SetData(self, Data):
-        if len(self) < self._HEADER_SIZE_:
-            self.extend([0] * (self._HEADER_SIZE_ - len(self)))
-        else:
-            del self[self._HEADER_SIZE_:]
-        self.extend(Data)
+        Header = bytearray(self._DATA_[:self._HEADER_SIZE_])
+        Header.extend([0] * (self._HEADER_SIZE_ - len(Header)))
+        Header.extend(Data)
+        self._DATA_ = memoryview(Header)
+        self._LEN_ = None
 
     def _GetData(self):
-        if len(self) > self._HEADER_SIZE_:
-            return self[self._HEADER_SIZE_:]
+        if len(self._DATA_) > self._HEADER_SIZE_:
+            return self._DATA_[self._HEADER_SIZE_:]
         return None
 
     Data = property(_GetData, _SetData)
@@ -121,6 +150,7 @@ class CompressedImage(Image):
 
     def __init__(self, CompressedData=None, CompressionType=None, UncompressedLength=None):
         Image.__init__(self)
+        self._Sections = None
         if UncompressedLength is not None:
             self.UncompressedLength = UncompressedLength
         if CompressionType is not None:
@@ -148,15 +178,14 @@ def _SetCompressionType(self, Type):
     def _GetCompressionType(self):
         return self.GetField(self._CMPRS_TYPE_)[0]
 
+    # the data is decompressed at the first access to the sections
     def _GetSections(self):
+        if self._Sections is not None:
+            return self._Sections
         try:
-            TmpData = DeCompress('Efi', self[self._HEADER_SIZE_:])
-            DecData = array('B')
-            DecData.fromstring(TmpData)
+            DecData = memoryview(DeCompress('Efi', self[self._HEADER_SIZE_:]))
         except:
-            TmpData = DeCompress('Framework', self[self._HEADER_SIZE_:])
-            DecData = array('B')
-            DecData.fromstring(TmpData)
+            DecData = memoryview(DeCompress('Framework', self[self._HEADER_SIZE_:]))
 
         SectionList = []
         Offset = 0
@@ -169,6 +198,7 @@ def _GetSections(self):
             except:
                 break
             SectionList.append(Sec)
+        self._Sections = SectionList
         return SectionList
 
     UncompressedLength = property(_GetOriginalSize, _SetOriginalSize)
@@ -189,14 +219,8 @@ def __init__(self):
     def __str__(self):
         return self.String
 
-    def _Unpack(self):
-        # keep header in this Image object
-        self.empty()
-        self.extend(self._BUF_[self._OFF_ : self._OFF_ + self._LEN_])
-        return len(self)
-
     def _GetUiString(self):
-        return codecs.utf_16_decode(self[0:-2].tostring())[0]
+        return codecs.utf_16_decode(self[0:-2].tobytes())[0]
 
     String = property(_GetUiString)
 
@@ -257,18 +281,12 @@ def __str__(self):
         gIndention -= 4
         return S
 
-    def _Unpack(self):
-        # keep header in this Image object
-        self.empty()
-        self.extend(self._BUF_[self._OFF_ : self._OFF_ + self._LEN_])
-        return len(self)
-
     def _GetExpression(self):
         if self._ExprList == []:
             Offset = 0
             CurrentData = self._OPCODE_
             while Offset < len(self):
-                Token = CurrentData.unpack_from(self, Offset)
+                Token = CurrentData.unpack_from(self._DATA_, Offset)
                 Offset += CurrentData.size
                 if len(Token) == 1:
                     Token = Token[0]
@@ -375,10 +393,19 @@ def ParseDepex(self, Depex, Type):
             DepexString = DepexList[0].strip()
         return (CouldBeLoaded, DepexString, FileDepex)
 
-    def Dispatch(self, Db=None):
-        if Db is None:
-            return False
+    ## Predict the dispatch order of the FFS files
+    #
+    #  @param  Db: Eot database the dispatch graph is built from
+    #  @param  Graph: DispatchGraph object built already
+    #
+    def Dispatch(self, Db=None, Graph=None):
+        if Graph is None:
+            if Db is None:
+                return False
+            Graph = BuildDispatchGraph(Db)
+        self._Graph = Graph
         self.UnDispatchedFfsDict = copy.copy(self.FfsDict)
+        self._StartPhase()
         # Find PeiCore, DexCore, PeiPriori, DxePriori first
         FfsSecCoreGuid = None
         FfsPeiCoreGuid = None
@@ -406,12 +433,12 @@ def Dispatch(self, Db=None):
         # Parse SEC_CORE first
         if FfsSecCoreGuid is not None:
             self.OrderedFfsDict[FfsSecCoreGuid] = self.UnDispatchedFfsDict.pop(FfsSecCoreGuid)
-            self.LoadPpi(Db, FfsSecCoreGuid)
+            self.LoadPpi(FfsSecCoreGuid)
 
         # Parse PEI first
         if FfsPeiCoreGuid is not None:
             self.OrderedFfsDict[FfsPeiCoreGuid] = self.UnDispatchedFfsDict.pop(FfsPeiCoreGuid)
-            self.LoadPpi(Db, FfsPeiCoreGuid)
+            self.LoadPpi(FfsPeiCoreGuid)
             if FfsPeiPrioriGuid is not None:
                 # Load PEIM described in priori file
                 FfsPeiPriori = self.UnDispatchedFfsDict.pop(FfsPeiPrioriGuid)
@@ -426,14 +453,14 @@ def Dispatch(self, Db=None):
                             Start = Start + 16
                             if GuidString in self.UnDispatchedFfsDict:
                                 self.OrderedFfsDict[GuidString] = self.UnDispatchedFfsDict.pop(GuidString)
-                                self.LoadPpi(Db, GuidString)
+                                self.LoadPpi(GuidString)
 
-        self.DisPatchPei(Db)
+        self.DisPatchPei()
 
         # Parse DXE then
         if FfsDxeCoreGuid is not None:
             self.OrderedFfsDict[FfsDxeCoreGuid] = self.UnDispatchedFfsDict.pop(FfsDxeCoreGuid)
-            self.LoadProtocol(Db, FfsDxeCoreGuid)
+            self.LoadProtocol(FfsDxeCoreGuid)
             if FfsDxePrioriGuid is not None:
                 # Load PEIM described in priori file
                 FfsDxePriori = self.UnDispatchedFfsDict.pop(FfsDxePrioriGuid)
@@ -448,137 +475,117 @@ def Dispatch(self, Db=None):
                             Start = Start + 16
                             if GuidString in self.UnDispatchedFfsDict:
                                 self.OrderedFfsDict[GuidString] = self.UnDispatchedFfsDict.pop(GuidString)
-                                self.LoadProtocol(Db, GuidString)
-
-        self.DisPatchDxe(Db)
-
-    def LoadProtocol(self, Db, ModuleGuid):
-        SqlCommand = """select GuidValue from Report
-                        where SourceFileFullPath in
-                        (select Value1 from Inf where BelongsToFile =
-                        (select BelongsToFile from Inf
-                        where Value1 = 'FILE_GUID' and Value2 like '%s' and Model = %s)
-                        and Model = %s)
-                        and ItemType = 'Protocol' and ItemMode = 'Produced'""" \
-                        % (ModuleGuid, 5001, 3007)
-        RecordSet = Db.TblReport.Exec(SqlCommand)
-        for Record in RecordSet:
-            SqlCommand = """select Value2 from Inf where BelongsToFile =
-                            (select DISTINCT BelongsToFile from Inf
-                            where Value1 =
-                            (select SourceFileFullPath from Report
-                            where GuidValue like '%s' and ItemMode = 'Callback'))
-                            and Value1 = 'FILE_GUID'""" % Record[0]
-            CallBackSet = Db.TblReport.Exec(SqlCommand)
-            if CallBackSet != []:
-                EotGlobalData.gProtocolList[Record[0].lower()] = ModuleGuid
-            else:
-                EotGlobalData.gProtocolList[Record[0].lower()] = ModuleGuid
-
-    def LoadPpi(self, Db, ModuleGuid):
-        SqlCommand = """select GuidValue from Report
-                        where SourceFileFullPath in
-                        (select Value1 from Inf where BelongsToFile =
-                        (select BelongsToFile from Inf
-                        where Value1 = 'FILE_GUID' and Value2 like '%s' and Model = %s)
-                        and Model = %s)
-                        and ItemType = 'Ppi' and ItemMode = 'Produced'""" \
-                        % (ModuleGuid, 5001, 3007)
-        RecordSet = Db.TblReport.Exec(SqlCommand)
-        for Record in RecordSet:
-            EotGlobalData.gPpiList[Record[0].lower()] = ModuleGuid
+                                self.LoadProtocol(GuidString)
+
+        self.DisPatchDxe()
+
+    def LoadProtocol(self, ModuleGuid):
+        for Guid in self._Graph.GetProtocolList(ModuleGuid):
+            EotGlobalData.gProtocolList[Guid.lower()] = ModuleGuid
+            self._Notify(Guid)
+
+    def LoadPpi(self, ModuleGuid):
+        for Guid in self._Graph.GetPpiList(ModuleGuid):
+            EotGlobalData.gPpiList[Guid.lower()] = ModuleGuid
+            self._Notify(Guid)
+
+    ## Find the depex of a FFS, in its sections or in the encapsulated ones
+    def _GetDepex(self, Ffs, Type):
+        for Section in Ffs.Sections.values():
+            if Section.Type == Type:
+                return Section._SubImages[4]
+            if Section.Type == 0x01:
+                for CompressSection in Section._SubImages[4].Sections:
+                    if CompressSection.Type == Type:
+                        return CompressSection._SubImages[4]
+                    if CompressSection.Type == 0x02:
+                        for NewSection in CompressSection._SubImages[4].Sections:
+                            if NewSection.Type == Type:
+                                return NewSection._SubImages[4]
+        return None
 
-    def DisPatchDxe(self, Db):
-        IsInstalled = False
-        ScheduleList = sdict()
-        for FfsID in list(self.UnDispatchedFfsDict.keys()):
-            CouldBeLoaded = False
-            DepexString = ''
-            FileDepex = None
-            Ffs = self.UnDispatchedFfsDict[FfsID]
-            if Ffs.Type == 0x07:
-                # Get Depex
-                IsFoundDepex = False
-                for Section in Ffs.Sections.values():
-                    # Find Depex
-                    if Section.Type == 0x13:
-                        IsFoundDepex = True
-                        CouldBeLoaded, DepexString, FileDepex = self.ParseDepex(Section._SubImages[4], 'Protocol')
-                        break
-                    if Section.Type == 0x01:
-                        CompressSections = Section._SubImages[4]
-                        for CompressSection in CompressSections.Sections:
-                            if CompressSection.Type == 0x13:
-                                IsFoundDepex = True
-                                CouldBeLoaded, DepexString, FileDepex = self.ParseDepex(CompressSection._SubImages[4], 'Protocol')
-                                break
-                            if CompressSection.Type == 0x02:
-                                NewSections = CompressSection._SubImages[4]
-                                for NewSection in NewSections.Sections:
-                                    if NewSection.Type == 0x13:
-                                        IsFoundDepex = True
-                                        CouldBeLoaded, DepexString, FileDepex = self.ParseDepex(NewSection._SubImages[4], 'Protocol')
-                                        break
-
-                # Not find Depex
-                if not IsFoundDepex:
+    #
+    # The result of a depex only changes when one of the GUIDs in it is
+    # installed or dispatched. A FFS which cannot be loaded waits for these
+    # GUIDs, and is evaluated again only after one of them is notified.
+    #
+    def _StartPhase(self):
+        self._ReadySet = set(self.UnDispatchedFfsDict.keys())
+        self._WaitingDict = {}
+
+    def _Wait(self, FfsID, GuidList):
+        for Guid in GuidList:
+            self._WaitingDict.setdefault(Guid.lower(), set()).add(FfsID)
+
+    def _Notify(self, Guid):
+        self._ReadySet.update(self._WaitingDict.pop(Guid.lower(), ()))
+
+    def _IsReady(self, FfsID):
+        if FfsID not in self._ReadySet:
+            return False
+        self._ReadySet.remove(FfsID)
+        return True
+
+    @staticmethod
+    def _GetDepexGuids(Depex):
+        return [gGuidStringFormat % Token for Token in Depex.Expression if isinstance(Token, tuple)]
+
+    def DisPatchDxe(self):
+        self._StartPhase()
+        IsInstalled = True
+        while IsInstalled:
+            IsInstalled = False
+            ScheduleList = sdict()
+            for FfsID in list(self.UnDispatchedFfsDict.keys()):
+                if not self._IsReady(FfsID):
+                    continue
+                Ffs = self.UnDispatchedFfsDict[FfsID]
+                if Ffs.Type != 0x07:
+                    continue
+                Depex = self._GetDepex(Ffs, 0x13)
+                if Depex is not None:
+                    CouldBeLoaded, DepexString, FileDepex = self.ParseDepex(Depex, 'Protocol')
+                    GuidList = self._GetDepexGuids(Depex)
+                else:
+                    # Not find Depex
                     CouldBeLoaded = self.CheckArchProtocol()
                     DepexString = ''
-                    FileDepex = None
+                    GuidList = EotGlobalData.gArchProtocolGuids
 
                 # Append New Ffs
                 if CouldBeLoaded:
                     IsInstalled = True
                     NewFfs = self.UnDispatchedFfsDict.pop(FfsID)
                     NewFfs.Depex = DepexString
-                    if FileDepex is not None:
-                        ScheduleList.insert(FileDepex[1], FfsID, NewFfs, FileDepex[0])
-                    else:
-                        ScheduleList[FfsID] = NewFfs
+                    ScheduleList[FfsID] = NewFfs
                 else:
-                    self.UnDispatchedFfsDict[FfsID].Depex = DepexString
-
-        for FfsID in ScheduleList.keys():
-            NewFfs = ScheduleList.pop(FfsID)
-            FfsName = 'UnKnown'
-            self.OrderedFfsDict[FfsID] = NewFfs
-            self.LoadProtocol(Db, FfsID)
-
-            SqlCommand = """select Value2 from Inf
-                            where BelongsToFile = (select BelongsToFile from Inf where Value1 = 'FILE_GUID' and lower(Value2) = lower('%s') and Model = %s)
-                            and Model = %s and Value1='BASE_NAME'""" % (FfsID, 5001, 5001)
-            RecordSet = Db.TblReport.Exec(SqlCommand)
-            if RecordSet != []:
-                FfsName = RecordSet[0][0]
-
-        if IsInstalled:
-            self.DisPatchDxe(Db)
-
-    def DisPatchPei(self, Db):
-        IsInstalled = False
-        for FfsID in list(self.UnDispatchedFfsDict.keys()):
-            CouldBeLoaded = True
-            DepexString = ''
-            FileDepex = None
-            Ffs = self.UnDispatchedFfsDict[FfsID]
-            if Ffs.Type == 0x06 or Ffs.Type == 0x08:
-                # Get Depex
-                for Section in Ffs.Sections.values():
-                    if Section.Type == 0x1B:
-                        CouldBeLoaded, DepexString, FileDepex = self.ParseDepex(Section._SubImages[4], 'Ppi')
-                        break
-                    if Section.Type == 0x01:
-                        CompressSections = Section._SubImages[4]
-                        for CompressSection in CompressSections.Sections:
-                            if CompressSection.Type == 0x1B:
-                                CouldBeLoaded, DepexString, FileDepex = self.ParseDepex(CompressSection._SubImages[4], 'Ppi')
-                                break
-                            if CompressSection.Type == 0x02:
-                                NewSections = CompressSection._SubImages[4]
-                                for NewSection in NewSections.Sections:
-                                    if NewSection.Type == 0x1B:
-                                        CouldBeLoaded, DepexString, FileDepex = self.ParseDepex(NewSection._SubImages[4], 'Ppi')
-                                        break
+                    Ffs.Depex = DepexString
+                    self._Wait(FfsID, GuidList)
+
+            # the protocols are installed after all loadable FFS are found
+            for FfsID, NewFfs in ScheduleList.items():
+                self.OrderedFfsDict[FfsID] = NewFfs
+                self._Notify(FfsID)
+                self.LoadProtocol(FfsID)
+
+    def DisPatchPei(self):
+        self._StartPhase()
+        IsInstalled = True
+        while IsInstalled:
+            IsInstalled = False
+            for FfsID in list(self.UnDispatchedFfsDict.keys()):
+                if not self._IsReady(FfsID):
+                    continue
+                Ffs = self.UnDispatchedFfsDict[FfsID]
+                if Ffs.Type != 0x06 and Ffs.Type != 0x08:
+                    continue
+                CouldBeLoaded = True
+                DepexString = ''
+                GuidList = []
+                Depex = self._GetDepex(Ffs, 0x1B)
+                if Depex is not None:
+                    CouldBeLoaded, DepexString, FileDepex = self.ParseDepex(Depex, 'Ppi')
+                    GuidList = self._GetDepexGuids(Depex)
 
                 # Append New Ffs
                 if CouldBeLoaded:
@@ -586,13 +593,11 @@ def DisPatchPei(self, Db):
                     NewFfs = self.UnDispatchedFfsDict.pop(FfsID)
                     NewFfs.Depex = DepexString
                     self.OrderedFfsDict[FfsID] = NewFfs
-                    self.LoadPpi(Db, FfsID)
+                    self._Notify(FfsID)
+                    self.LoadPpi(FfsID)
                 else:
-                    self.UnDispatchedFfsDict[FfsID].Depex = DepexString
-
-        if IsInstalled:
-            self.DisPatchPei(Db)
-
+                    Ffs.Depex = DepexString
+                    self._Wait(FfsID, GuidList)
 
     def __str__(self):
         global gIndention
@@ -605,8 +610,7 @@ def __str__(self):
 
     def _Unpack(self):
         Size = self._LENGTH_.unpack_from(self._BUF_, self._OFF_)[0]
-        self.empty()
-        self.extend(self._BUF_[self._OFF_:self._OFF_ + Size])
+        self._DATA_ = self._BUF_[self._OFF_:self._OFF_ + Size]
 
         # traverse the FFS
         EndOfFv = Size
@@ -614,7 +618,7 @@ def _Unpack(self):
         LastFfsObj = None
         while FfsStartAddress < EndOfFv:
             FfsObj = Ffs()
-            FfsObj.frombuffer(self, FfsStartAddress)
+            FfsObj.frombuffer(self._DATA_, FfsStartAddress)
             FfsId = repr(FfsObj)
             if ((self.Attributes & 0x00000800) != 0 and len(FfsObj) == 0xFFFFFF) \
                 or ((self.Attributes & 0x00000800) == 0 and len(FfsObj) == 0):
@@ -638,6 +642,8 @@ def _Unpack(self):
             FfsStartAddress = (FfsStartAddress + 7) & (~7)
             LastFfsObj = FfsObj
 
+        return Size
+
     def _GetAttributes(self):
         return self.GetField(self._ATTR_, 0)[0]
 
@@ -677,6 +683,7 @@ class GuidDefinedImage(Image):
 
     def __init__(self, SectionDefinitionGuid=None, DataOffset=None, Attributes=None, Data=None):
         Image.__init__(self)
+        self._Sections = None
         if SectionDefinitionGuid is not None:
             self.SectionDefinitionGuid = SectionDefinitionGuid
         if DataOffset is not None:
@@ -692,12 +699,6 @@ def __str__(self):
             S += "\n" + str(Sec)
         return S
 
-    def _Unpack(self):
-        # keep header in this Image object
-        self.empty()
-        self.extend(self._BUF_[self._OFF_ : self._OFF_ + self._LEN_])
-        return len(self)
-
     def _SetAttribute(self, Attribute):
         self.SetField(self._ATTR_, 0, Attribute)
 
@@ -716,7 +717,10 @@ def _SetDataOffset(self, Offset):
     def _GetDataOffset(self):
         return self.GetField(self._DATA_OFFSET_)[0]
 
+    # the data is decompressed at the first access to the sections
     def _GetSections(self):
+        if self._Sections is not None:
+            return self._Sections
         SectionList = []
         Guid = gGuidStringFormat % self.SectionDefinitionGuid
         if Guid == self.CRC32_GUID:
@@ -725,7 +729,7 @@ def _GetSections(self):
             while Offset < len(self):
                 Sec = Section()
                 try:
-                    Sec.frombuffer(self, Offset)
+                    Sec.frombuffer(self._DATA_, Offset)
                     Offset += Sec.Size
                     # the section is aligned to 4-byte boundary
                     Offset = (Offset + 3) & (~3)
@@ -736,9 +740,7 @@ def _GetSections(self):
             try:
                 # skip the header
                 Offset = self.DataOffset - 4
-                TmpData = DeCompress('Framework', self[self.Offset:])
-                DecData = array('B')
-                DecData.fromstring(TmpData)
+                DecData = memoryview(DeCompress('Framework', self[Offset:]))
                 Offset = 0
                 while Offset < len(DecData):
                     Sec = Section()
@@ -757,9 +759,7 @@ def _GetSections(self):
                 # skip the header
                 Offset = self.DataOffset - 4
 
-                TmpData = DeCompress('Lzma', self[self.Offset:])
-                DecData = array('B')
-                DecData.fromstring(TmpData)
+                DecData = memoryview(DeCompress('Lzma', self[Offset:]))
                 Offset = 0
                 while Offset < len(DecData):
                     Sec = Section()
@@ -774,6 +774,7 @@ def _GetSections(self):
             except:
                 pass
 
+        self._Sections = SectionList
         return SectionList
 
     Attributes = property(_GetAttribute, _SetAttribute)
@@ -844,23 +845,22 @@ def __str__(self):
         return SectionInfo
 
     def _Unpack(self):
-        self.empty()
         Type, = self._TYPE_.unpack_from(self._BUF_, self._OFF_)
         Size1, Size2, Size3 = self._SIZE_.unpack_from(self._BUF_, self._OFF_)
         Size = Size1 + (Size2 << 8) + (Size3 << 16)
 
         if Type not in self._SectionSubImages:
             # no need to extract sub-image, keep all in this Image object
-            self.extend(self._BUF_[self._OFF_ : self._OFF_ + Size])
+            self._DATA_ = self._BUF_[self._OFF_ : self._OFF_ + Size]
         else:
             # keep header in this Image object
-            self.extend(self._BUF_[self._OFF_ : self._OFF_ + self._HEADER_SIZE_])
+            self._DATA_ = self._BUF_[self._OFF_ : self._OFF_ + self._HEADER_SIZE_]
             #
             # use new Image object to represent payload, which may be another kind
             # of image such as PE32
             #
             PayloadOffset = self._HEADER_SIZE_
-            PayloadLen = self.Size - self._HEADER_SIZE_
+            PayloadLen = Size - self._HEADER_SIZE_
             Payload = self._SectionSubImages[self.Type]()
             Payload.frombuffer(self._BUF_, self._OFF_ + self._HEADER_SIZE_, PayloadLen)
             self._SubImages[PayloadOffset] = Payload
@@ -983,8 +983,7 @@ def __repr__(self):
     def _Unpack(self):
         Size1, Size2, Size3 = self._SIZE_.unpack_from(self._BUF_, self._OFF_)
         Size = Size1 + (Size2 << 8) + (Size3 << 16)
-        self.empty()
-        self.extend(self._BUF_[self._OFF_ : self._OFF_ + Size])
+        self._DATA_ = self._BUF_[self._OFF_ : self._OFF_ + Size]
 
         # Pad FFS may use the same GUID. We need to avoid it.
         if self.Type == 0xf0:
@@ -998,7 +997,7 @@ def _Unpack(self):
             SectionStartAddress = self._HEADER_SIZE_
             while SectionStartAddress < EndOfFfs:
                 SectionObj = Section()
-                SectionObj.frombuffer(self, SectionStartAddress)
+                SectionObj.frombuffer(self._DATA_, SectionStartAddress)
                 #f = open(repr(SectionObj), 'wb')
                 #SectionObj.Size = 0
                 #SectionObj.tofile(f)
@@ -1007,6 +1006,8 @@ def _Unpack(self):
                 SectionStartAddress += len(SectionObj)
                 SectionStartAddress = (SectionStartAddress + 3) & (~3)
 
+        return Size
+
     def Pack(self):
         pass
 
@@ -1085,15 +1086,8 @@ def __init__(self, FvList):
         FirmwareVolume.__init__(self)
         self.BasicInfo = []
         for FvPath in FvList:
-            Fd = None
             FvName = os.path.splitext(os.path.split(FvPath)[1])[0]
-            if FvPath.strip():
-                Fd = open(FvPath, 'rb')
-            Buf = array('B')
-            try:
-                Buf.fromfile(Fd, os.path.getsize(FvPath))
-            except EOFError:
-                pass
+            Buf = MapFile(FvPath)
 
             Fv = FirmwareVolume(FvName)
             Fv.frombuffer(Buf, 0, len(Buf))
@@ -1571,11 +1565,14 @@ def BuildDatabase(self):
 
         # Build database
         if self.IsInit:
+            # the C parser needs antlr4, which FV parsing and dispatch don't
+            from edk2basetools.Eot import c
             self.BuildMetaDataFileDatabase(EotGlobalData.gINF_FILES)
             EdkLogger.quiet("Building database for source code ...")
             c.CreateCCodeDB(EotGlobalData.gSOURCE_FILES)
             EdkLogger.quiet("Building database for source code done!")
 
+        EotGlobalData.gDb.CreateIndexes()
         EotGlobalData.gIdentifierTableList = GetTableList((MODEL_FILE_C, MODEL_FILE_H), 'Identifier', EotGlobalData.gDb)
 
     ## BuildMetaDataFileDatabase() method
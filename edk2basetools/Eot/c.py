@@ -368,6 +368,7 @@ def CreateCCodeDB(FileNameList):
         Db.InsertOneFile(file)
 
     Db.UpdateIdentifierBelongsToFunction()
+    Db.Conn.commit()
 
 ##
 #
@@ -43,12 +43,33 @@ class BinaryProduct():
     ## Use GuidTool to decompress data.
     def DeCompressData(self, GuidTool, Section_Data: bytes, FileName) -> bytes:
         guidtool = GUIDTools().__getitem__(struct2stream(GuidTool))
-        if not guidtool.ifexist:
+        if not guidtool.ifexist and not guidtool.inprocess:
             logger.error("GuidTool {} is not found when decompressing {} file.\n".format(guidtool.command, FileName))
             raise Exception("Process Failed: GuidTool not found!")
         DecompressedData = guidtool.unpack(Section_Data)
         return DecompressedData
 
+    ## Start decompressing the guided sections of Ffs files in parallel.
+    #  The sections are found decompressed when they get parsed later.
+    def PrefetchSections(self, Ffs_Data_List: list) -> None:
+        Sections = []
+        for Ffs_Data in Ffs_Data_List:
+            Rel_Offset = 0
+            try:
+                while Rel_Offset < len(Ffs_Data):
+                    Section_Info = SectionNode(Ffs_Data[Rel_Offset:])
+                    if Section_Info.Header.Type == 0 or Section_Info.Size == 0:
+                        break
+                    if Section_Info.Header.Type == 0x02:
+                        Sections.append((struct2stream(Section_Info.ExtHeader.SectionDefinitionGuid),
+                                         Ffs_Data[Rel_Offset+Section_Info.ExtHeader.DataOffset: Rel_Offset+Section_Info.Size]))
+                    Rel_Offset += Section_Info.Size + GetPadSize(Section_Info.Size, SECTION_COMMON_ALIGNMENT)
+            except Exception:
+                # Not sections, e.g. raw file. They are reported when parsed.
+                continue
+        if len(Sections) > 1:
+            GUIDTools().prefetch(Sections)
+
     def ParserData():
         pass
 
@@ -250,6 +271,7 @@ def ParserData(self, ParTree, Whole_Data: bytes, Rel_Whole_Offset: int=0) -> Non
                 Rel_Offset += Ffs_Info.Size + Pad_Size
                 Ffs_Tree.Data = Ffs_Info
                 ParTree.insertChild(Ffs_Tree)
+        self.PrefetchSections([Child.Data.Data for Child in ParTree.Child if Child.type == FFS_TREE])
 
 class FdProduct(BinaryProduct):
     type = [ROOT_FV_TREE, ROOT_TREE]
@@ -4,20 +4,81 @@
 # Copyright (c) 2021-, Intel Corporation. All rights reserved.<BR>
 # SPDX-License-Identifier: BSD-2-Clause-Patent
 ##
+import atexit
 import glob
+import hashlib
 import logging
+import lzma
 import os
 import shutil
 import sys
 import tempfile
+import threading
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from FirmwareStorageFormat.Common import *
 from utils.FmmtLogger import FmmtLogger as logger
 import subprocess
 
+LZMA_GUID = "ee4e5898-3914-4259-9d6e-dc7bd79403cf"
+
 def ExecuteCommand(cmd: list) -> None:
     subprocess.run(cmd,stdout=subprocess.DEVNULL)
 
+def LzmaDecompress(buffer: bytes) -> bytes:
+    """
+    Decompress the data made by LzmaCompress, which is in LZMA alone format:
+    5 bytes of properties and 8 bytes of uncompressed size, then the stream.
+    """
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_ALONE)
+    res_buffer = decompressor.decompress(buffer)
+    if not decompressor.eof:
+        raise lzma.LZMAError("Compressed data ended before the end of stream")
+    return res_buffer
+
+# The decompressors which do not need the external tool.
+InProcessDecompressors = {
+    LZMA_GUID: LzmaDecompress,
+}
+
+class _ScratchDir:
+    """
+    A single temporary directory shared by all the external tool calls,
+    removed when the process exits.
+    """
+    lock = threading.Lock()
+    path = None
+
+    @classmethod
+    def NewFile(cls, name: str) -> str:
+        with cls.lock:
+            if cls.path is None:
+                cls.path = tempfile.mkdtemp(dir=os.environ.get('tmp'))
+                atexit.register(shutil.rmtree, cls.path, True)
+        return os.path.join(cls.path, "%s_%s" % (uuid.uuid4().hex, name))
+
+# Decompressed data of sections, keyed by the GuidTool GUID and the digest of
+# compressed data. Values are futures, so that a section being decompressed by
+# one thread is waited for by the others rather than decompressed again.
+_UnpackCache = {}
+_UnpackCacheLock = threading.Lock()
+_UnpackPool = None
+
+def ClearUnpackCache() -> None:
+    """
+    Drop the decompressed data of sections, called at the end of each FMMT
+    operation so that the cache does not grow for the life of the process.
+    """
+    with _UnpackCacheLock:
+        _UnpackCache.clear()
+
+def _GetUnpackPool() -> ThreadPoolExecutor:
+    global _UnpackPool
+    with _UnpackCacheLock:
+        if _UnpackPool is None:
+            _UnpackPool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        return _UnpackPool
+
 class GUIDTool:
     def __init__(self, guid: str, short_name: str, command: str) -> None:
         self.guid: str = guid
@@ -31,63 +92,90 @@ def pack(self, buffer: bytes) -> bytes:
         """
         tool = self.command
         if tool:
-            tmp = tempfile.mkdtemp(dir=os.environ.get('tmp'))
-            ToolInputFile = os.path.join(tmp, "pack_uncompress_sec_file")
-            ToolOuputFile = os.path.join(tmp, "pack_sec_file")
-            try:
-                file = open(ToolInputFile, "wb")
-                file.write(buffer)
-                file.close()
-                command = [tool, '-e', '-o', ToolOuputFile,
-                                  ToolInputFile]
-                ExecuteCommand(command)
-                buf = open(ToolOuputFile, "rb")
-                res_buffer = buf.read()
-            except Exception as msg:
-                logger.error(msg)
+            res_buffer = self.RunTool('-e', buffer)
+            if res_buffer is None:
                 return ""
-            else:
-                buf.close()
-                if os.path.exists(tmp):
-                    shutil.rmtree(tmp)
-                return res_buffer
+            # The compressed data is known to decompress to the input.
+            with _UnpackCacheLock:
+                _UnpackCache.setdefault(self.CacheKey(res_buffer), _DoneFuture(buffer))
+            return res_buffer
         else:
             logger.error(
                 "Error parsing section: EFI_SECTION_GUID_DEFINED cannot be parsed at this time.")
             logger.info("Its GUID is: %s" % self.guid)
             return ""
 
+    def RunTool(self, option: str, buffer: bytes) -> bytes:
+        """
+        Run the external tool on buffer, return None if it fails.
+        """
+        ToolInputFile = _ScratchDir.NewFile("input")
+        ToolOuputFile = _ScratchDir.NewFile("output")
+        try:
+            with open(ToolInputFile, "wb") as file:
+                file.write(buffer)
+            command = [self.command, option, '-o', ToolOuputFile, ToolInputFile]
+            ExecuteCommand(command)
+            with open(ToolOuputFile, "rb") as buf:
+                return buf.read()
+        except Exception as msg:
+            logger.error(msg)
+            return None
+        finally:
+            for File in (ToolInputFile, ToolOuputFile):
+                if os.path.exists(File):
+                    os.remove(File)
+
+    def CacheKey(self, buffer: bytes) -> tuple:
+        return (self.guid.lower(), hashlib.sha1(buffer).digest())
+
+    @property
+    def inprocess(self) -> bool:
+        """
+        Whether the section can be decompressed without the external tool.
+        """
+        return self.guid.lower() in InProcessDecompressors
 
     def unpack(self, buffer: bytes) -> bytes:
         """
         buffer: remove common header
         uncompress file
         """
-        tool = self.command
-        if tool:
-            tmp = tempfile.mkdtemp(dir=os.environ.get('tmp'))
-            ToolInputFile = os.path.join(tmp, "unpack_sec_file")
-            ToolOuputFile = os.path.join(tmp, "unpack_uncompress_sec_file")
-            try:
-                file = open(ToolInputFile, "wb")
-                file.write(buffer)
-                file.close()
-                command = [tool, '-d', '-o', ToolOuputFile, ToolInputFile]
-                ExecuteCommand(command)
-                buf = open(ToolOuputFile, "rb")
-                res_buffer = buf.read()
-            except Exception as msg:
-                logger.error(msg)
-                return ""
-            else:
-                buf.close()
-                if os.path.exists(tmp):
-                    shutil.rmtree(tmp)
-                return res_buffer
-        else:
+        if not self.command and not self.inprocess:
             logger.error("Error parsing section: EFI_SECTION_GUID_DEFINED cannot be parsed at this time.")
             logger.info("Its GUID is: %s" % self.guid)
             return ""
+        key = self.CacheKey(buffer)
+        with _UnpackCacheLock:
+            future = _UnpackCache.get(key)
+            owner = future is None
+            if owner:
+                future = _UnpackCache[key] = Future()
+        if not owner:
+            return future.result()
+        res_buffer = None
+        try:
+            if self.inprocess:
+                try:
+                    res_buffer = InProcessDecompressors[self.guid.lower()](buffer)
+                except lzma.LZMAError as msg:
+                    logger.debug("In-process decompression failed: %s, fall back to %s" % (msg, self.command))
+            if res_buffer is None and self.command:
+                res_buffer = self.RunTool('-d', buffer)
+        finally:
+            if res_buffer is None:
+                # Do not keep the failure, the section may be retried.
+                with _UnpackCacheLock:
+                    if _UnpackCache.get(key) is future:
+                        del _UnpackCache[key]
+                res_buffer = ""
+            future.set_result(res_buffer)
+        return res_buffer
+
+def _DoneFuture(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
 
 class GUIDTools:
     '''
@@ -126,25 +214,18 @@ def VerifyTools(self, guidtool) -> None:
         path_env_list = list(set(path_env_list))
         cmd = guidtool.command
         if os.path.isabs(cmd):
-            if not os.path.exists(cmd):
-                if guidtool not in self.default_tools:
-                    logger.error("Tool Not found %s, which causes compress/uncompress process error." % cmd)
-                    logger.error("Please goto edk2 repo in current console, run 'edksetup.bat rebuild' command, and try again.\n")
-                else:
-                    logger.error("Tool Not found %s, which causes compress/uncompress process error." % cmd)
-            else:
-                guidtool.ifexist = True
+            guidtool.ifexist = os.path.exists(cmd)
         else:
             for syspath in path_env_list:
                 if glob.glob(os.path.join(syspath, cmd+"*")):
                     guidtool.ifexist = True
                     break
-            else:
-                if guidtool not in self.default_tools:
-                    logger.error("Tool Not found %s, which causes compress/uncompress process error." % cmd)
-                    logger.error("Please goto edk2 repo in current console, run 'edksetup.bat rebuild' command, and try again.\n")
-                else:
-                    logger.error("Tool Not found %s, which causes compress/uncompress process error." % cmd)
+        # The sections decompressed in process do not need the tool, it is
+        # reported missing when packing.
+        if not guidtool.ifexist and not guidtool.inprocess:
+            logger.error("Tool Not found %s, which causes compress/uncompress process error." % cmd)
+            if guidtool not in self.default_tools:
+                logger.error("Please goto edk2 repo in current console, run 'edksetup.bat rebuild' command, and try again.\n")
 
     def LoadingTools(self) -> None:
         self.SetConfigFile()
@@ -164,6 +245,20 @@ def LoadingTools(self) -> None:
         else:
             self.tooldef.update(self.default_tools)
 
+    def prefetch(self, sections: list) -> None:
+        """
+        Start decompressing the guided sections in the background, so that
+        they are found in cache when the sections get parsed.
+        sections: list of (GUID in stream format, compressed data)
+        """
+        if not self.tooldef:
+            self.LoadingTools()
+        pool = _GetUnpackPool()
+        for guid, buffer in sections:
+            guid_tool = self.tooldef.get(guid)
+            if guid_tool and (guid_tool.inprocess or shutil.which(guid_tool.command)):
+                pool.submit(guid_tool.unpack, buffer)
+
     def __getitem__(self, guid):
         if not self.tooldef:
             self.LoadingTools()
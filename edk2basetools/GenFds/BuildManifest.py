@@ -0,0 +1,151 @@
+## @file
+# Manifest of the images generated by GenFds, for incremental build
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+import mmap
+import os
+
+import edk2basetools.Common.GlobalData as GlobalData
+from edk2basetools.Common.LongFilePathSupport import LongFilePath, OpenLongFilePath as open
+from edk2basetools.Common.PersistentStore import FileStamp, LoadStore, SaveStore
+from edk2basetools.AutoGen.FileHashStore import FileHashStore
+from .FdImage import CopyFileRange
+
+## Manifest of the sections, FFS files, FV images and FD images of platform
+#
+#   For each output file, the command generating it, the digests of its input
+# files and the digest of the output itself are recorded. A step is skipped
+# if all of them are unchanged since the last build, no matter what the time
+# stamps of the files are. The digests of the input files are taken before
+# the tool is run, since some tools modify their inputs.
+#
+#   For an FD image, the digest of each region is recorded, so that only the
+# changed regions are copied into the existing FD file.
+#
+# @param StoreFile          Path of the file keeping the manifest, or None
+#
+class BuildManifest(object):
+    # bump it whenever the layout of entries changes
+    _VERSION_ = 1
+
+    def __init__(self, StoreFile=None):
+        self.StoreFile = StoreFile
+        self._Entries = {}
+        self._Pending = {}
+        self._Updated = False
+        if GlobalData.gFileHashStore is not None:
+            self._HashStore = GlobalData.gFileHashStore
+            self._OwnHashStore = False
+        else:
+            self._HashStore = FileHashStore(StoreFile + '.hash' if StoreFile else None, GlobalData.gHashAlgorithm)
+            self._OwnHashStore = True
+        self._Load()
+
+    ## Load the entries saved by previous build
+    def _Load(self):
+        Entries = LoadStore(self.StoreFile, (self._VERSION_, self._HashStore.Algorithm), "GenFds manifest")
+        if Entries is not None:
+            self._Entries = Entries
+
+    ## Check if an output file needs to be generated again
+    #
+    #   If so, the inputs are remembered until Update() is called for the
+    # output file.
+    #
+    #   @param  Output          Path of output file
+    #   @param  InputList       Paths of input files
+    #   @param  Command         The command generating output file, or None
+    #
+    #   @retval True            The output file doesn't exist, or it, any input or the command is changed
+    #   @retval False           The output file is up to date
+    #
+    def NeedsUpdate(self, Output, InputList, Command=None):
+        Inputs = []
+        for File in InputList:
+            Digest = self._HashStore.Digest(File)
+            # always update output if any input doesn't exist
+            if Digest is None:
+                self._Pending.pop(Output, None)
+                return True
+            Inputs.append((File, Digest))
+        Entry = (tuple(Command) if Command else None, tuple(Inputs))
+        Saved = self._Entries.get(Output)
+        if Saved is not None and Saved[:2] == Entry and Saved[2] == self._HashStore.Digest(Output):
+            return False
+        self._Pending[Output] = Entry
+        return True
+
+    ## Record an output file generated after NeedsUpdate() returned True
+    #
+    #   @param  Output          Path of output file
+    #
+    def Update(self, Output):
+        Entry = self._Pending.pop(Output, None)
+        if Entry is None:
+            return
+        Digest = self._HashStore.Digest(Output)
+        if Digest is None:
+            self._Entries.pop(Output, None)
+        else:
+            self._Entries[Output] = Entry + (Digest,)
+        self._Updated = True
+
+    ## Write an FD image, only the regions changed since the last build if possible
+    #
+    #   The image file is moved to the FD file if the FD file can't be
+    # patched, otherwise it is removed.
+    #
+    #   @param  FdFile          Path of FD file
+    #   @param  ImageFile       Path of the file the FD image is assembled in
+    #   @param  RegionList      List of (offset, size) of the regions in FD image
+    #
+    def WriteFd(self, FdFile, ImageFile, RegionList):
+        with open(ImageFile, 'rb') as Image:
+            ImageSize = os.fstat(Image.fileno()).st_size
+            Digests = self._RegionDigests(Image, ImageSize, RegionList)
+            Entry = (tuple(RegionList), Digests)
+            Saved = self._Entries.get(FdFile)
+            Changed = None
+            if Saved is not None and Saved[0] == Entry[0] and Saved[2] == FileStamp(FdFile):
+                Changed = [Index for Index in range(len(RegionList)) if Saved[1][Index] != Digests[Index]]
+            if Changed:
+                with open(FdFile, 'r+b') as Fd:
+                    for Index in Changed:
+                        Offset, Size = RegionList[Index]
+                        CopyFileRange(Image, Fd, Size, Offset, Offset)
+                    Fd.truncate(ImageSize)
+        if Changed is None:
+            os.replace(LongFilePath(ImageFile), LongFilePath(FdFile))
+        else:
+            os.remove(LongFilePath(ImageFile))
+            if not Changed:
+                return
+        self._Entries[FdFile] = Entry + (FileStamp(FdFile),)
+        self._Updated = True
+
+    ## Get the digests of the regions, reading the image through memory map
+    def _RegionDigests(self, Image, ImageSize, RegionList):
+        if ImageSize == 0:
+            return tuple(self._HashStore.NewHash().hexdigest() for Region in RegionList)
+        Digests = []
+        with mmap.mmap(Image.fileno(), 0, access=mmap.ACCESS_READ) as Map:
+            with memoryview(Map) as View:
+                for Offset, Size in RegionList:
+                    with View[Offset:Offset + Size] as Data:
+                        Digests.append(self._HashStore.NewHash(Data).hexdigest())
+        return tuple(Digests)
+
+    ## Save the manifest to store file
+    def Save(self):
+        if self._OwnHashStore:
+            self._HashStore.Save()
+        if not self.StoreFile or not self._Updated:
+            return
+        if SaveStore(self.StoreFile, (self._VERSION_, self._HashStore.Algorithm), self._Entries, "GenFds manifest"):
+            self._Updated = False
@@ -20,7 +20,8 @@
 from edk2basetools.CommonDataClass.FdfClass import FDClassObject
 from edk2basetools.Common import EdkLogger
 from edk2basetools.Common.BuildToolError import *
-from edk2basetools.Common.Misc import SaveFileOnChange
+from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
+from .FdImage import UpdateFile
 from edk2basetools.Common.DataType import BINARY_FILE_TYPE_FV
 
 ## generate FD
@@ -60,13 +61,57 @@ def GenFd (self, Flag = False):
         for FvObj in GenFdsGlobalVariable.FdfParser.Profile.FvDict:
             GenFdsGlobalVariable.VerboseLogger(FvObj)
 
+        #
+        # The regions are written into a preallocated image file, which
+        # replaces or patches the FD file at last
+        #
+        if Flag:
+            with BytesIO() as FdBuffer:
+                self._AddRegionsToBuffer(FdBuffer, Flag)
+        else:
+            FdImageName = FdFileName + '.tmp'
+            FdBuffer = open(FdImageName, 'w+b')
+            Done = False
+            try:
+                if self.RegionList:
+                    FdBuffer.truncate(max(RegionObj.Offset + RegionObj.Size for RegionObj in self.RegionList))
+                FdRegionList = self._AddRegionsToBuffer(FdBuffer, Flag)
+                FdBuffer.truncate(FdBuffer.tell())
+                Done = True
+            finally:
+                # don't leave the preallocated image behind if any region fails
+                FdBuffer.close()
+                if not Done:
+                    os.remove(FdImageName)
+            #
+            # Write the buffer contents to Fd file
+            #
+            GenFdsGlobalVariable.VerboseLogger('Write the buffer contents to Fd file')
+            if GenFdsGlobalVariable.Manifest is not None:
+                GenFdsGlobalVariable.Manifest.WriteFd(FdFileName, FdImageName, FdRegionList)
+            else:
+                UpdateFile(FdFileName, FdImageName)
+        GenFdsGlobalVariable.ImageBinDict[self.FdUiName.upper() + 'fd'] = FdFileName
+        return FdFileName
+
+    ## Add the images of regions to the buffer of FD image
+    #
+    #   @param  self        The object pointer
+    #   @param  FdBuffer    The buffer of FD image
+    #   @param  Flag        True if only the makefiles of modules are generated
+    #
+    #   @retval list        List of (offset, size) of the regions in FD image
+    #
+    def _AddRegionsToBuffer(self, FdBuffer, Flag):
         HasCapsuleRegion = False
         for RegionObj in self.RegionList:
             if RegionObj.RegionType == 'CAPSULE':
                 HasCapsuleRegion = True
                 break
         if HasCapsuleRegion:
-            TempFdBuffer = BytesIO()
+            # the images of regions are written into the same buffer, then
+            # overwritten after the capsules are generated
+            TempFdBuffer = FdBuffer
             PreviousRegionStart = -1
             PreviousRegionSize = 1
 
@@ -95,7 +140,9 @@ def GenFd (self, Flag = False):
                 GenFdsGlobalVariable.VerboseLogger('Call each region\'s AddToBuffer function')
                 RegionObj.AddToBuffer (TempFdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFdsGlobalVariable.ImageBinDict, self.DefineVarDict)
 
-        FdBuffer = BytesIO()
+            FdBuffer.seek(0)
+
+        FdRegionList = []
         PreviousRegionStart = -1
         PreviousRegionSize = 1
         for RegionObj in self.RegionList :
@@ -115,6 +162,7 @@ def GenFd (self, Flag = False):
                 PadRegion.Size = RegionObj.Offset - PadRegion.Offset
                 if not Flag:
                     PadRegion.AddToBuffer(FdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFdsGlobalVariable.ImageBinDict, self.DefineVarDict)
+                    FdRegionList.append((PadRegion.Offset, PadRegion.Size))
             PreviousRegionStart = RegionObj.Offset
             PreviousRegionSize = RegionObj.Size
             #
@@ -129,15 +177,8 @@ def GenFd (self, Flag = False):
             #
             GenFdsGlobalVariable.VerboseLogger('Call each region\'s AddToBuffer function')
             RegionObj.AddToBuffer (FdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFdsGlobalVariable.ImageBinDict, self.DefineVarDict, Flag=Flag)
-        #
-        # Write the buffer contents to Fd file
-        #
-        GenFdsGlobalVariable.VerboseLogger('Write the buffer contents to Fd file')
-        if not Flag:
-            SaveFileOnChange(FdFileName, FdBuffer.getvalue())
-        FdBuffer.close()
-        GenFdsGlobalVariable.ImageBinDict[self.FdUiName.upper() + 'fd'] = FdFileName
-        return FdFileName
+            FdRegionList.append((RegionObj.Offset, RegionObj.Size))
+        return FdRegionList
 
     ## generate flash map file
     #
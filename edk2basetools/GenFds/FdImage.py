@@ -0,0 +1,108 @@
+## @file
+# Copy the images of regions into FD file without reading them into memory
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+import filecmp
+import io
+import os
+import shutil
+
+from edk2basetools.Common.LongFilePathSupport import LongFilePath, OpenLongFilePath as open
+
+# size of the chunks copied when the kernel can't copy files
+_CHUNK_SIZE_ = 0x100000
+
+## Copy a range of file into another file
+#
+#   The data is copied by the kernel with copy_file_range() or sendfile()
+# where available, otherwise through a small buffer. The file positions of
+# both files are undefined after the copy.
+#
+#   @param  Src             The source file object
+#   @param  Dst             The destination file object
+#   @param  Count           Number of bytes to copy
+#   @param  SrcOffset       Offset of the range in source file
+#   @param  DstOffset       Offset of the range in destination file
+#
+def CopyFileRange(Src, Dst, Count, SrcOffset, DstOffset):
+    Dst.flush()
+    SrcFd = Src.fileno()
+    DstFd = Dst.fileno()
+    for Method in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, Method):
+            continue
+        try:
+            while Count > 0:
+                if Method == 'copy_file_range':
+                    Copied = os.copy_file_range(SrcFd, DstFd, Count, SrcOffset, DstOffset)
+                else:
+                    os.lseek(DstFd, DstOffset, os.SEEK_SET)
+                    Copied = os.sendfile(DstFd, SrcFd, SrcOffset, Count)
+                if Copied <= 0:
+                    break
+                Count -= Copied
+                SrcOffset += Copied
+                DstOffset += Copied
+        except OSError:
+            # not supported between the files, e.g. on different file systems
+            pass
+        if Count <= 0:
+            return
+
+    Src.seek(SrcOffset)
+    Dst.seek(DstOffset)
+    while Count > 0:
+        Data = Src.read(min(Count, _CHUNK_SIZE_))
+        if not Data:
+            raise EOFError("%d bytes are missing in %s" % (Count, getattr(Src, 'name', Src)))
+        Dst.write(Data)
+        Count -= len(Data)
+    Dst.flush()
+
+## Append the content of a file to buffer
+#
+#   If the buffer is a real file, the content is copied with CopyFileRange().
+#
+#   @param  Buffer          The buffer, a file object or BytesIO
+#   @param  FileName        Path of the file
+#
+#   @retval int             The size of the file
+#
+def AppendFile(Buffer, FileName):
+    with open(FileName, 'rb') as Src:
+        Size = os.fstat(Src.fileno()).st_size
+        try:
+            Buffer.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            shutil.copyfileobj(Src, Buffer, _CHUNK_SIZE_)
+            return Size
+        Offset = Buffer.tell()
+        CopyFileRange(Src, Buffer, Size, 0, Offset)
+        Buffer.seek(Offset + Size)
+    return Size
+
+## Replace a file with a new one, unless their contents are the same
+#
+#   The file is left untouched and the new file is removed if their contents
+# are the same, so that the time stamp of the file is kept.
+#
+#   @param  FileName        Path of the file
+#   @param  NewFile         Path of the new file
+#
+#   @retval True            The file is replaced
+#   @retval False           The contents are the same
+#
+def UpdateFile(FileName, NewFile):
+    FileName = LongFilePath(FileName)
+    NewFile = LongFilePath(NewFile)
+    if os.path.isfile(FileName) and filecmp.cmp(FileName, NewFile, shallow=False):
+        os.remove(NewFile)
+        return False
+    os.replace(NewFile, FileName)
+    return True
@@ -13,9 +13,11 @@
 import edk2basetools.Common.LongFilePathOs as os
 import subprocess
 from io import BytesIO
+from functools import partial
 from struct import *
 from . import FfsFileStatement
 from .GenFdsGlobalVariable import GenFdsGlobalVariable
+from .FdImage import AppendFile
 from edk2basetools.Common.Misc import SaveFileOnChange, PackGUID
 from edk2basetools.Common.LongFilePathSupport import CopyLongFilePath
 from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
@@ -94,7 +96,7 @@ def AddToBuffer (self, Buffer, BaseAddress=None, BlockSize= None, BlockNum=None,
                                 GenFdsGlobalVariable.ErrorLogger("Capsule %s in FD region can't contain a FV %s in FD region." % (self.CapsuleName, self.UiFvName.upper()))
         if not Flag:
             GenFdsGlobalVariable.InfLogger( "\nGenerating %s FV" %self.UiFvName)
-        GenFdsGlobalVariable.LargeFileInFvFlags.append(False)
+        GenFdsGlobalVariable.GetLargeFileInFvFlags().append(False)
         FFSGuid = None
 
         if self.FvBaseAddress is not None:
@@ -118,13 +120,16 @@ def AddToBuffer (self, Buffer, BaseAddress=None, BlockSize= None, BlockNum=None,
                                             TAB_LINE_BREAK)
 
         # Process Modules in FfsList
+        TaskList = []
         for FfsFile in self.FfsList:
             if Flag:
                 if isinstance(FfsFile, FfsFileStatement.FileStatement):
                     continue
             if GenFdsGlobalVariable.EnableGenfdsMultiThread and GenFdsGlobalVariable.ModuleFile and GenFdsGlobalVariable.ModuleFile.Path.find(os.path.normpath(FfsFile.InfFileName)) == -1:
                 continue
-            FileName = FfsFile.GenFfs(MacroDict, FvParentAddr=BaseAddress, IsMakefile=Flag, FvName=self.UiFvName)
+            TaskList.append((not isinstance(FfsFile, FfsFileStatement.FileStatement),
+                             partial(FfsFile.GenFfs, MacroDict, FvParentAddr=BaseAddress, IsMakefile=Flag, FvName=self.UiFvName)))
+        for FileName in GenFdsGlobalVariable.RunFfsTasks(TaskList):
             FfsFileList.append(FileName)
             if not Flag:
                 self.FvInfFile.append("EFI_FILE_NAME = " + \
@@ -152,7 +157,7 @@ def AddToBuffer (self, Buffer, BaseAddress=None, BlockSize= None, BlockNum=None,
             OrigFvInfo = None
             if os.path.exists (FvInfoFileName):
                 OrigFvInfo = open(FvInfoFileName, 'r').read()
-            if GenFdsGlobalVariable.LargeFileInFvFlags[-1]:
+            if GenFdsGlobalVariable.GetLargeFileInFvFlags()[-1]:
                 FFSGuid = GenFdsGlobalVariable.EFI_FIRMWARE_FILE_SYSTEM3_GUID
             GenFdsGlobalVariable.GenerateFirmwareVolume(
                                     FvOutputFile,
@@ -181,10 +186,11 @@ def AddToBuffer (self, Buffer, BaseAddress=None, BlockSize= None, BlockNum=None,
 
                 if FvChildAddr != []:
                     # Update Ffs again
-                    for FfsFile in self.FfsList:
-                        FileName = FfsFile.GenFfs(MacroDict, FvChildAddr, BaseAddress, IsMakefile=Flag, FvName=self.UiFvName)
+                    GenFdsGlobalVariable.RunFfsTasks([(not isinstance(FfsFile, FfsFileStatement.FileStatement),
+                                                       partial(FfsFile.GenFfs, MacroDict, FvChildAddr, BaseAddress, IsMakefile=Flag, FvName=self.UiFvName))
+                                                      for FfsFile in self.FfsList])
 
-                    if GenFdsGlobalVariable.LargeFileInFvFlags[-1]:
+                    if GenFdsGlobalVariable.GetLargeFileInFvFlags()[-1]:
                         FFSGuid = GenFdsGlobalVariable.EFI_FIRMWARE_FILE_SYSTEM3_GUID;
                     #Update GenFv again
                     GenFdsGlobalVariable.GenerateFirmwareVolume(
@@ -208,8 +214,7 @@ def AddToBuffer (self, Buffer, BaseAddress=None, BlockSize= None, BlockNum=None,
                     GenFdsGlobalVariable.VerboseLogger("\nGenerate %s FV Successfully" % self.UiFvName)
                     GenFdsGlobalVariable.SharpCounter = 0
 
-                    FvFileObj.seek(0)
-                    Buffer.write(FvFileObj.read())
+                    AppendFile(Buffer, FvOutputFile)
                     # FV alignment position.
                     FvAlignmentValue = 1 << (ord(FvHeaderBuffer[0x2E:0x2F]) & 0x1F)
                     if FvAlignmentValue >= 0x400:
@@ -226,7 +231,7 @@ def AddToBuffer (self, Buffer, BaseAddress=None, BlockSize= None, BlockNum=None,
                         self.FvAlignment = str (FvAlignmentValue)
                     FvFileObj.close()
                     GenFdsGlobalVariable.ImageBinDict[self.UiFvName.upper() + 'fv'] = FvOutputFile
-                    GenFdsGlobalVariable.LargeFileInFvFlags.pop()
+                    GenFdsGlobalVariable.GetLargeFileInFvFlags().pop()
                 else:
                     GenFdsGlobalVariable.ErrorLogger("Invalid FV file %s." % self.UiFvName)
             else:
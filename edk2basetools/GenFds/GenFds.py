@@ -18,6 +18,7 @@
 from struct import unpack
 from linecache import getlines
 from io import BytesIO
+from multiprocessing import cpu_count
 
 import edk2basetools.Common.LongFilePathOs as os
 from edk2basetools.Common.TargetTxtClassObject import TargetTxtDict,gDefaultTargetTxtFile
@@ -34,6 +35,7 @@
 
 from .FdfParser import FdfParser, Warning
 from .GenFdsGlobalVariable import GenFdsGlobalVariable
+from .BuildManifest import BuildManifest
 from .FfsFileStatement import FileStatement
 import edk2basetools.Common.DataType as DataType
 from struct import Struct
@@ -94,6 +96,9 @@ def resetFdsGlobalVariable():
     GenFdsGlobalVariable.CopyList   = []
     GenFdsGlobalVariable.ModuleFile = ''
     GenFdsGlobalVariable.EnableGenfdsMultiThread = True
+    GenFdsGlobalVariable.ThreadNumber = 1
+    GenFdsGlobalVariable.EnableGenfdsInProcess = False
+    GenFdsGlobalVariable.Manifest = None
 
     GenFdsGlobalVariable.LargeFileInFvFlags = []
     GenFdsGlobalVariable.EFI_FIRMWARE_FILE_SYSTEM3_GUID = '5473C07A-3DCB-4dca-BD6F-1E9689E7349A'
@@ -142,6 +147,12 @@ def GenFdsApi(FdsCommandDict, WorkSpaceDataBase=None):
                 GenFdsGlobalVariable.EnableGenfdsMultiThread = True
             else:
                 GenFdsGlobalVariable.EnableGenfdsMultiThread = False
+        if FdsCommandDict.get("GenfdsInProcess"):
+            GenFdsGlobalVariable.EnableGenfdsInProcess = True
+        if FdsCommandDict.get("thread_number"):
+            GenFdsGlobalVariable.ThreadNumber = FdsCommandDict.get("thread_number")
+        else:
+            GenFdsGlobalVariable.ThreadNumber = cpu_count()
         os.chdir(GenFdsGlobalVariable.WorkSpaceDir)
 
         # set multiple workspace
@@ -396,6 +407,9 @@ def GenFdsApi(FdsCommandDict, WorkSpaceDataBase=None):
         EdkLogger.quiet(traceback.format_exc())
         ReturnCode = CODE_ERROR
     finally:
+        # the outputs recorded so far are still valid if GenFds failed
+        if GenFdsGlobalVariable.Manifest is not None:
+            GenFdsGlobalVariable.Manifest.Save()
         ClearDuplicatedInf()
     return ReturnCode
 
@@ -407,6 +421,8 @@ def OptionsToCommandDict(Options):
     FdsCommandDict["debug"] = Options.debug
     FdsCommandDict["Workspace"] = Options.Workspace
     FdsCommandDict["GenfdsMultiThread"] = not Options.NoGenfdsMultiThread
+    FdsCommandDict["thread_number"] = Options.ThreadNumber
+    FdsCommandDict["GenfdsInProcess"] = Options.GenfdsInProcess
     FdsCommandDict["fdf_file"] = [PathClass(Options.filename)] if Options.filename else []
     FdsCommandDict["build_target"] = Options.BuildTarget
     FdsCommandDict["toolchain_tag"] = Options.ToolChain
@@ -465,6 +481,10 @@ def myOptionParser():
     Parser.add_option("--pcd", action="append", dest="OptionPcd", help="Set PCD value by command line. Format: \"PcdName=Value\" ")
     Parser.add_option("--genfds-multi-thread", action="store_true", dest="GenfdsMultiThread", default=True, help="Enable GenFds multi thread to generate ffs file.")
     Parser.add_option("--no-genfds-multi-thread", action="store_true", dest="NoGenfdsMultiThread", default=False, help="Disable GenFds multi thread to generate ffs file.")
+    Parser.add_option("--genfds-in-process", action="store_true", dest="GenfdsInProcess", default=False,
+                      help="Generate the common sections and FFS files in process instead of calling GenSec and GenFfs. Experimental.")
+    Parser.add_option("-n", "--thread-number", action="store", type="int", dest="ThreadNumber",
+                      help="Build the FFS files of an FV with specified number of threads. Less than 2 means no parallel. Defaults to the number of processors.")
 
     Options, _ = Parser.parse_args()
     return Options
@@ -492,6 +512,7 @@ class GenFds(object):
     @staticmethod
     def GenFd (OutputDir, FdfParserObject, WorkSpace, ArchList):
         GenFdsGlobalVariable.SetDir ('', FdfParserObject, WorkSpace, ArchList)
+        GenFdsGlobalVariable.Manifest = BuildManifest(os.path.join(GenFdsGlobalVariable.FvDir, 'GenFds.manifest'))
 
         GenFdsGlobalVariable.VerboseLogger(" Generate all Fd images and their required FV and Capsule images!")
         if GenFds.OnlyGenerateThisCap is not None and GenFds.OnlyGenerateThisCap.upper() in GenFdsGlobalVariable.FdfParser.Profile.CapsuleDict:
@@ -14,7 +14,9 @@
 
 import edk2basetools.Common.LongFilePathOs as os
 import sys
+import threading
 from sys import stdout
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import PIPE,Popen
 from struct import Struct
 from array import array
@@ -33,6 +35,7 @@
 import edk2basetools.Common.GlobalData as GlobalData
 from edk2basetools.Common.BuildToolError import *
 from edk2basetools.AutoGen.AutoGen import CalculatePriorityValue
+from . import GenSecFfs
 
 ## Global variables
 #
@@ -82,6 +85,7 @@ class GenFdsGlobalVariable:
     # and EFI_FIRMWARE_FILE_SYSTEM3_GUID is passed to C GenFv.
     # At the end of generation of FV, pop the flag.
     # List is used as a stack to handle nested FV generation.
+    # The FFS tasks run concurrently have their own lists, see GetLargeFileInFvFlags().
     #
     LargeFileInFvFlags = []
     EFI_FIRMWARE_FILE_SYSTEM3_GUID = '5473C07A-3DCB-4dca-BD6F-1E9689E7349A'
@@ -92,6 +96,19 @@ class GenFdsGlobalVariable:
     # FvName, FdName, CapName in FDF, Image file name
     ImageBinDict = {}
 
+    #
+    # The maximum number of FFS files generated concurrently. The GenFds code
+    # of FFS tasks is run by one thread at a time, holding the task lock,
+    # which is released only while the external tools are running.
+    #
+    ThreadNumber = 1
+    # generate the common sections and FFS files in process instead of calling GenSec and GenFfs
+    EnableGenfdsInProcess = False
+    # the manifest of generated files, or None to compare the time stamps of files
+    Manifest = None
+    _TaskLock = threading.Lock()
+    _TaskLocal = threading.local()
+
     ## LoadBuildRule
     #
     @staticmethod
@@ -404,14 +421,20 @@ def ReplaceWorkspaceMacro(String):
 
     ## Check if the input files are newer than output files
     #
+    #   If the manifest of generated files is loaded, the contents of files
+    # and the command are compared instead of the time stamps.
+    #
     #   @param  Output          Path of output file
     #   @param  Input           Path list of input files
+    #   @param  Command         The command generating output file
     #
     #   @retval True            if Output doesn't exist, or any Input is newer
     #   @retval False           if all Input is older than Output
     #
     @staticmethod
-    def NeedsUpdate(Output, Input):
+    def NeedsUpdate(Output, Input, Command=None):
+        if GenFdsGlobalVariable.Manifest is not None:
+            return GenFdsGlobalVariable.Manifest.NeedsUpdate(Output, Input, Command)
         if not os.path.exists(Output):
             return True
         # always update "Output" if no "Input" given
@@ -432,6 +455,15 @@ def NeedsUpdate(Output, Input):
                 return True
         return False
 
+    ## Record the output file generated after NeedsUpdate() returned True
+    #
+    #   @param  Output          Path of output file
+    #
+    @staticmethod
+    def UpdateManifest(Output):
+        if GenFdsGlobalVariable.Manifest is not None:
+            GenFdsGlobalVariable.Manifest.Update(Output)
+
     @staticmethod
     def GenerateSection(Output, Input, Type=None, CompressionType=None, Guid=None,
                         GuidHdrLen=None, GuidAttr=[], Ui=None, Ver=None, InputAlign=[], BuildNumber=None, DummyFile=None, IsMakefile=False):
@@ -499,9 +531,16 @@ def GenerateSection(Output, Input, Type=None, CompressionType=None, Guid=None,
                 if ' '.join(Cmd).strip() not in GenFdsGlobalVariable.SecCmdList:
                     GenFdsGlobalVariable.SecCmdList.append(' '.join(Cmd).strip())
             else:
-                if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
+                if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile], Cmd):
                     return
-                GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+                SectionData = None
+                if GenFdsGlobalVariable.EnableGenfdsInProcess:
+                    SectionData = GenSecFfs.GenVersionSection(Ver, BuildNumber)
+                if SectionData is None:
+                    GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+                else:
+                    GenFdsGlobalVariable.SaveToolOutput(Output, SectionData)
+                GenFdsGlobalVariable.UpdateManifest(Output)
         else:
             Cmd += ("-o", Output)
             Cmd += Input
@@ -514,12 +553,19 @@ def GenerateSection(Output, Input, Type=None, CompressionType=None, Guid=None,
                     Cmd = ['-test', '-e', Input[0], "&&"] + Cmd
                 if ' '.join(Cmd).strip() not in GenFdsGlobalVariable.SecCmdList:
                     GenFdsGlobalVariable.SecCmdList.append(' '.join(Cmd).strip())
-            elif GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
+            elif GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile], Cmd):
                 GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-                GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
-                if (os.path.getsize(Output) >= GenFdsGlobalVariable.LARGE_FILE_SIZE and
-                    GenFdsGlobalVariable.LargeFileInFvFlags):
-                    GenFdsGlobalVariable.LargeFileInFvFlags[-1] = True
+                SectionData = None
+                if GenFdsGlobalVariable.EnableGenfdsInProcess and not (Guid or GuidHdrLen or GuidAttr or DummyFile):
+                    SectionData = GenSecFfs.GenSection(Type, Input, CompressionType, InputAlign)
+                if SectionData is None:
+                    GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+                else:
+                    GenFdsGlobalVariable.SaveToolOutput(Output, SectionData)
+                GenFdsGlobalVariable.UpdateManifest(Output)
+                LargeFileInFvFlags = GenFdsGlobalVariable.GetLargeFileInFvFlags()
+                if os.path.getsize(Output) >= GenFdsGlobalVariable.LARGE_FILE_SIZE and LargeFileInFvFlags:
+                    LargeFileInFvFlags[-1] = True
 
     @staticmethod
     def GetAlignment (AlignString):
@@ -570,17 +616,33 @@ def GenerateFfs(Output, Input, Type, Guid, Fixed=False, CheckSum=False, Align=No
             GenFdsGlobalVariable.SecCmdList = []
             GenFdsGlobalVariable.CopyList = []
         else:
-            if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
+            if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile], Cmd):
                 return
-            GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate FFS")
+            FfsData = None
+            if GenFdsGlobalVariable.EnableGenfdsInProcess:
+                FfsData = GenSecFfs.GenFfs(Type, Guid, Input, Fixed, CheckSum, Align, SectionAlign)
+            if FfsData is None:
+                GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate FFS")
+            else:
+                GenFdsGlobalVariable.SaveToolOutput(Output, FfsData)
+            GenFdsGlobalVariable.UpdateManifest(Output)
+
+    ## Save the section or FFS file generated without calling the tool
+    #
+    #   @param  Output          Path of output file
+    #   @param  Data            The content of output file
+    #
+    @staticmethod
+    def SaveToolOutput(Output, Data):
+        try:
+            with open(Output, "wb") as Fd:
+                Fd.write(Data)
+        except IOError as X:
+            EdkLogger.error("GenFds", FILE_CREATE_FAILURE, ExtraData='IOError %s' % X)
 
     @staticmethod
     def GenerateFirmwareVolume(Output, Input, BaseAddress=None, ForceRebase=None, Capsule=False, Dump=False,
                                AddressFile=None, MapFile=None, FfsList=[], FileSystemGuid=None):
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input+FfsList):
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-
         Cmd = ["GenFv"]
         if BaseAddress:
             Cmd += ("-r", BaseAddress)
@@ -604,16 +666,23 @@ def GenerateFirmwareVolume(Output, Input, BaseAddress=None, ForceRebase=None, Ca
         for I in Input:
             Cmd += ("-i", I)
 
+        InputList = Input + FfsList
+        # the address file is copied before each run of GenFv, which adds the
+        # addresses of child FV images to it, so only the manifest can tell
+        # whether its content is changed
+        if AddressFile and GenFdsGlobalVariable.Manifest is not None:
+            InputList = InputList + [AddressFile]
+        if not GenFdsGlobalVariable.NeedsUpdate(Output, InputList, Cmd):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
+
         GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate FV")
+        GenFdsGlobalVariable.UpdateManifest(Output)
 
     @staticmethod
     def GenerateFirmwareImage(Output, Input, Type="efi", SubType=None, Zero=False,
                               Strip=False, Replace=False, TimeStamp=None, Join=False,
                               Align=None, Padding=None, Convert=False, IsMakefile=False):
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input) and not IsMakefile:
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-
         Cmd = ["GenFw"]
         if Type.lower() == "te":
             Cmd.append("-t")
@@ -637,11 +706,16 @@ def GenerateFirmwareImage(Output, Input, Type="efi", SubType=None, Zero=False,
             Cmd.append("-m")
         Cmd += ("-o", Output)
         Cmd += Input
+        if not IsMakefile and not GenFdsGlobalVariable.NeedsUpdate(Output, Input, Cmd):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
+
         if IsMakefile:
             if " ".join(Cmd).strip() not in GenFdsGlobalVariable.SecCmdList:
                 GenFdsGlobalVariable.SecCmdList.append(" ".join(Cmd).strip())
         else:
             GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate firmware image")
+            GenFdsGlobalVariable.UpdateManifest(Output)
 
     @staticmethod
     def GenerateOptionRom(Output, EfiInput, BinaryInput, Compress=False, ClassCode=None,
@@ -665,11 +739,6 @@ def GenerateOptionRom(Output, EfiInput, BinaryInput, Compress=False, ClassCode=N
                 Cmd.append(BinFile)
                 InputList.append (BinFile)
 
-        # Check List
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, InputList) and not IsMakefile:
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, InputList))
-
         if ClassCode:
             Cmd += ("-l", ClassCode)
         if Revision:
@@ -680,27 +749,108 @@ def GenerateOptionRom(Output, EfiInput, BinaryInput, Compress=False, ClassCode=N
             Cmd += ("-f", VendorId)
 
         Cmd += ("-o", Output)
+        # Check List
+        if not IsMakefile and not GenFdsGlobalVariable.NeedsUpdate(Output, InputList, Cmd):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, InputList))
+
         if IsMakefile:
             if " ".join(Cmd).strip() not in GenFdsGlobalVariable.SecCmdList:
                 GenFdsGlobalVariable.SecCmdList.append(" ".join(Cmd).strip())
         else:
             GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate option rom")
+            GenFdsGlobalVariable.UpdateManifest(Output)
 
     @staticmethod
     def GuidTool(Output, Input, ToolPath, Options='', returnValue=[], IsMakefile=False):
-        if not GenFdsGlobalVariable.NeedsUpdate(Output, Input) and not IsMakefile:
-            return
-        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-
         Cmd = [ToolPath, ]
         Cmd += Options.split(' ')
         Cmd += ("-o", Output)
         Cmd += Input
+        if not IsMakefile and not GenFdsGlobalVariable.NeedsUpdate(Output, Input, Cmd):
+            return
+        GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
+
         if IsMakefile:
             if " ".join(Cmd).strip() not in GenFdsGlobalVariable.SecCmdList:
                 GenFdsGlobalVariable.SecCmdList.append(" ".join(Cmd).strip())
         else:
             GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to call " + ToolPath, returnValue)
+            GenFdsGlobalVariable.UpdateManifest(Output)
+
+    ## Run the tasks generating FFS files of an FV
+    #
+    #   The FFS files of an FV don't depend on each other. The concurrent tasks
+    # are run by a pool of threads, so that the tools they call run at the
+    # same time, while the others, which may generate nested FV images, are
+    # run by the calling thread in advance. All tasks are run in order by the
+    # calling thread if GenFds generates the commands of FFS files for the
+    # makefiles of modules, or if it is run by an FFS task already.
+    #
+    #   @param  TaskList        List of (True if the task can run concurrently, task function)
+    #
+    #   @retval list            The return values of the tasks, in the order of TaskList
+    #
+    @staticmethod
+    def RunFfsTasks(TaskList):
+        Concurrent = GenFdsGlobalVariable.ThreadNumber > 1 and not GenFdsGlobalVariable.EnableGenfdsMultiThread \
+                     and not getattr(GenFdsGlobalVariable._TaskLocal, 'InTask', False)
+        ResultList = [None] * len(TaskList)
+        PoolTaskList = []
+        for Index, (IsConcurrent, Task) in enumerate(TaskList):
+            if Concurrent and IsConcurrent:
+                PoolTaskList.append((Index, Task))
+            else:
+                ResultList[Index] = Task()
+        if not PoolTaskList:
+            return ResultList
+
+        Pool = ThreadPoolExecutor(max_workers=min(GenFdsGlobalVariable.ThreadNumber, len(PoolTaskList)))
+        LargeFile = False
+        try:
+            FutureList = [(Index, Pool.submit(GenFdsGlobalVariable._RunTask, Task)) for Index, Task in PoolTaskList]
+            for Index, Future in FutureList:
+                ResultList[Index], TaskLargeFile = Future.result()
+                LargeFile = LargeFile or TaskLargeFile
+        finally:
+            Pool.shutdown(wait=True, cancel_futures=True)
+        # the large files generated by the tasks are in the FV of calling thread
+        LargeFileInFvFlags = GenFdsGlobalVariable.GetLargeFileInFvFlags()
+        if LargeFile and LargeFileInFvFlags:
+            LargeFileInFvFlags[-1] = True
+        return ResultList
+
+    ## Run a task in a thread of pool
+    #
+    #   The task has its own stack of large file flags, so that the flags of
+    # the nested FV images generated by concurrent tasks are not mixed.
+    #
+    #   @param  Task            The task function
+    #
+    #   @retval tuple           (return value of the task, True if it generates a large file)
+    #
+    @staticmethod
+    def _RunTask(Task):
+        with GenFdsGlobalVariable._TaskLock:
+            GenFdsGlobalVariable._TaskLocal.InTask = True
+            GenFdsGlobalVariable._TaskLocal.LargeFileInFvFlags = [False]
+            try:
+                Result = Task()
+                return Result, GenFdsGlobalVariable._TaskLocal.LargeFileInFvFlags[0]
+            finally:
+                GenFdsGlobalVariable._TaskLocal.InTask = False
+                GenFdsGlobalVariable._TaskLocal.LargeFileInFvFlags = None
+
+    ## Get the stack of large file flags of the FV images being generated
+    #
+    #   @retval list            The stack of the current FFS task, or the global one
+    #
+    @staticmethod
+    def GetLargeFileInFvFlags():
+        LargeFileInFvFlags = getattr(GenFdsGlobalVariable._TaskLocal, 'LargeFileInFvFlags', None)
+        if LargeFileInFvFlags is None:
+            return GenFdsGlobalVariable.LargeFileInFvFlags
+        return LargeFileInFvFlags
 
     @staticmethod
     def CallExternalTool (cmd, errorMess, returnValue=[]):
@@ -722,11 +872,19 @@ def CallExternalTool (cmd, errorMess, returnValue=[]):
             if GenFdsGlobalVariable.SharpCounter % GenFdsGlobalVariable.SharpNumberPerLine == 0:
                 stdout.write('\n')
 
+        # let other FFS tasks run while the tool is running
+        InTask = getattr(GenFdsGlobalVariable._TaskLocal, 'InTask', False)
+        if InTask:
+            GenFdsGlobalVariable._TaskLock.release()
         try:
-            PopenObject = Popen(' '.join(cmd), stdout=PIPE, stderr=PIPE, shell=True)
-        except Exception as X:
-            EdkLogger.error("GenFds", COMMAND_FAILURE, ExtraData="%s: %s" % (str(X), cmd[0]))
-        (out, error) = PopenObject.communicate()
+            try:
+                PopenObject = Popen(' '.join(cmd), stdout=PIPE, stderr=PIPE, shell=True)
+            except Exception as X:
+                EdkLogger.error("GenFds", COMMAND_FAILURE, ExtraData="%s: %s" % (str(X), cmd[0]))
+            (out, error) = PopenObject.communicate()
+        finally:
+            if InTask:
+                GenFdsGlobalVariable._TaskLock.acquire()
 
         while PopenObject.returncode is None:
             PopenObject.wait()
@@ -0,0 +1,366 @@
+## @file
+# Generate the common sections and FFS files without calling GenSec and GenFfs
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+import re
+from struct import pack, unpack_from
+from uuid import UUID
+
+from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
+
+#
+#   The functions below produce the same bytes as the GenSec and GenFfs tools
+# for the given command line arguments. They return None for the arguments
+# they don't support, or for the input files they cannot read, and then the
+# tools have to be called, which will also report the errors.
+#
+#   GenFds calls them only if --genfds-in-process is given, until their
+# outputs are validated against the tools, see tests/GenFds/GenSecFfs.
+#
+
+# a section or FFS file of the size or larger needs the extended size header
+MAX_SECTION_SIZE = 0x1000000
+MAX_FFS_SIZE = 0x1000000
+
+EFI_COMMON_SECTION_HEADER_SIZE = 4
+EFI_COMMON_SECTION_HEADER2_SIZE = 8
+EFI_FFS_FILE_HEADER_SIZE = 24
+EFI_FFS_FILE_HEADER2_SIZE = 32
+EFI_TE_IMAGE_HEADER_SIZE = 40
+EFI_TE_IMAGE_HEADER_SIGNATURE = 0x5A56
+EFI_GUIDED_SECTION_PROCESSING_REQUIRED = 0x01
+
+FFS_ATTRIB_LARGE_FILE = 0x01
+FFS_ATTRIB_DATA_ALIGNMENT2 = 0x02
+FFS_ATTRIB_FIXED = 0x04
+FFS_ATTRIB_CHECKSUM = 0x40
+FFS_FIXED_CHECKSUM = 0xAA
+# EFI_FILE_HEADER_CONSTRUCTION | EFI_FILE_HEADER_VALID | EFI_FILE_DATA_VALID
+FFS_FILE_STATE = 0x07
+
+SECTION_TYPE_VALUE = {
+    'EFI_SECTION_COMPRESSION'               : 0x01,
+    'EFI_SECTION_GUID_DEFINED'              : 0x02,
+    'EFI_SECTION_PE32'                      : 0x10,
+    'EFI_SECTION_PIC'                       : 0x11,
+    'EFI_SECTION_TE'                        : 0x12,
+    'EFI_SECTION_DXE_DEPEX'                 : 0x13,
+    'EFI_SECTION_VERSION'                   : 0x14,
+    'EFI_SECTION_USER_INTERFACE'            : 0x15,
+    'EFI_SECTION_COMPATIBILITY16'           : 0x16,
+    'EFI_SECTION_FIRMWARE_VOLUME_IMAGE'     : 0x17,
+    'EFI_SECTION_FREEFORM_SUBTYPE_GUID'     : 0x18,
+    'EFI_SECTION_RAW'                       : 0x19,
+    'EFI_SECTION_PEI_DEPEX'                 : 0x1B,
+    'EFI_SECTION_SMM_DEPEX'                 : 0x1C,
+}
+
+# the section types GenSec puts the content of one input file in
+LEAF_SECTION_TYPES = {
+    'EFI_SECTION_PE32', 'EFI_SECTION_PIC', 'EFI_SECTION_TE', 'EFI_SECTION_DXE_DEPEX',
+    'EFI_SECTION_COMPATIBILITY16', 'EFI_SECTION_FIRMWARE_VOLUME_IMAGE', 'EFI_SECTION_RAW',
+    'EFI_SECTION_PEI_DEPEX', 'EFI_SECTION_SMM_DEPEX'
+}
+
+# the compression types GenSec supports without a compressor
+COMPRESSION_TYPE_VALUE = {
+    'PI_NONE'   : 0x00,
+}
+
+FFS_FILE_TYPE_VALUE = {
+    'EFI_FV_FILETYPE_RAW'                   : 0x01,
+    'EFI_FV_FILETYPE_FREEFORM'              : 0x02,
+    'EFI_FV_FILETYPE_SECURITY_CORE'         : 0x03,
+    'EFI_FV_FILETYPE_PEI_CORE'              : 0x04,
+    'EFI_FV_FILETYPE_DXE_CORE'              : 0x05,
+    'EFI_FV_FILETYPE_PEIM'                  : 0x06,
+    'EFI_FV_FILETYPE_DRIVER'                : 0x07,
+    'EFI_FV_FILETYPE_COMBINED_PEIM_DRIVER'  : 0x08,
+    'EFI_FV_FILETYPE_APPLICATION'           : 0x09,
+    'EFI_FV_FILETYPE_SMM'                   : 0x0A,
+    'EFI_FV_FILETYPE_FIRMWARE_VOLUME_IMAGE' : 0x0B,
+    'EFI_FV_FILETYPE_COMBINED_SMM_DXE'      : 0x0C,
+    'EFI_FV_FILETYPE_SMM_CORE'              : 0x0D,
+    'EFI_FV_FILETYPE_MM_STANDALONE'         : 0x0E,
+    'EFI_FV_FILETYPE_MM_CORE_STANDALONE'    : 0x0F,
+}
+
+# the FFS file types GenFfs checks the number of PE/TE sections of
+FFS_CORE_FILE_TYPES = {'EFI_FV_FILETYPE_SECURITY_CORE', 'EFI_FV_FILETYPE_PEI_CORE', 'EFI_FV_FILETYPE_DXE_CORE'}
+FFS_NO_IMAGE_FILE_TYPES = {'EFI_FV_FILETYPE_RAW', 'EFI_FV_FILETYPE_FREEFORM', 'EFI_FV_FILETYPE_FIRMWARE_VOLUME_IMAGE'}
+
+# the section types GenFfs counts as PE/TE sections
+FFS_IMAGE_SECTION_TYPES = {0x01, 0x02, 0x10, 0x12, 0x17}
+
+# the names of the FFS alignments of GenFfs, in the order of the alignment
+# values in FFS file attributes
+FFS_ALIGNMENT_NAMES = ["8", "16", "128", "512", "1K", "4K", "32K", "64K", "128K", "256K",
+                       "512K", "1M", "2M", "4M", "8M", "16M"]
+FFS_ALIGNMENT_VALUES = [0, 8, 16, 128, 512, 1024, 4096, 32768, 65536, 131072, 262144,
+                        524288, 1048576, 2097152, 4194304, 8388608, 16777216]
+
+# an argument GenFds passes to the tools through shell, kept as is by both
+# sh and cmd.exe, once the surrounding double quotes are removed
+_QuotedArgPattern = re.compile(r'^"([^"\\$`%!]*)"$')
+_PlainArgPattern = re.compile(r'^[A-Za-z0-9_.,:/+=@-]+$')
+_DecimalPattern = re.compile(r'^\d+$')
+_AlignmentPattern = re.compile(r'^(\d+)([KM]?)$', re.IGNORECASE)
+_GuidPattern = re.compile(r'^[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}$')
+
+## Get the argument a tool receives for an argument in shell command line
+#
+#   @param  Arg             The argument in command line
+#
+#   @retval str             The argument the tool receives
+#   @retval None            The argument could be changed by shell
+#
+def _ToolArgument(Arg):
+    Match = _QuotedArgPattern.match(Arg)
+    if Match:
+        return Match.group(1)
+    if _PlainArgPattern.match(Arg):
+        return Arg
+    return None
+
+## Get the value of a decimal number argument, the only form GenSec accepts
+def _Number(Arg, Max):
+    if not _DecimalPattern.match(Arg):
+        return None
+    Value = int(Arg, 10)
+    if Value > Max:
+        return None
+    return Value
+
+## Get the value of a section alignment argument: 1, 2, 4 ... 16M
+def _Alignment(Arg):
+    if Arg is None or Arg == '':
+        return 1
+    Match = _AlignmentPattern.match(Arg)
+    if not Match:
+        return None
+    # 1, 2, 4 ... 512, 1K ... 512K, 1M ... 16M, while 0 makes the tools read
+    # the alignment from the image
+    Value = int(Match.group(1))
+    if Value == 0 or Value & (Value - 1) or Value > 512 or (Match.group(2) == 'M' and Value > 16):
+        return None
+    return Value << {'': 0, 'K': 10, 'M': 20}[Match.group(2).upper()]
+
+def _ReadFile(FileName):
+    try:
+        with open(FileName, 'rb') as Fd:
+            return Fd.read()
+    except (IOError, OSError):
+        return None
+
+def _SectionHeader(Type, Size):
+    if Size >= MAX_SECTION_SIZE:
+        return pack('<3BBI', 0xFF, 0xFF, 0xFF, Type, Size)
+    return pack('<3BB', Size & 0xFF, (Size >> 8) & 0xFF, (Size >> 16) & 0xFF, Type)
+
+## Concatenate the sections in input files, as the section data of GenSec and GenFfs
+#
+#   Each section starts at a 4-byte boundary. If a section needs its data
+# aligned at a larger boundary, a raw section is inserted as pad before it.
+#
+#   @param  InputList       The input section files
+#   @param  AlignList       The alignment of each input section file
+#
+#   @retval tuple           (section data, max alignment, number of PE/TE sections)
+#   @retval None            Any input file cannot be read
+#
+def _SectionContents(InputList, AlignList):
+    Buffer = bytearray()
+    MaxAlignment = 0
+    PeSectionNum = 0
+    for Index, FileName in enumerate(InputList):
+        Buffer.extend(b'\0' * (-len(Buffer) & 0x03))
+        Alignment = AlignList[Index]
+        MaxAlignment = max(MaxAlignment, Alignment)
+        Data = _ReadFile(FileName)
+        if Data is None:
+            return None
+
+        TeOffset = 0
+        # a section of 16M or larger has 0xFFFFFF in the size field of its
+        # common header, followed by the extended size
+        if Data[:3] == b'\xff\xff\xff':
+            HeaderSize = EFI_COMMON_SECTION_HEADER2_SIZE
+        else:
+            HeaderSize = EFI_COMMON_SECTION_HEADER_SIZE
+        Type = Data[3] if len(Data) >= 4 else None
+        if Type in FFS_IMAGE_SECTION_TYPES:
+            PeSectionNum += 1
+        if Type == 0x12 and len(Data) >= HeaderSize + EFI_TE_IMAGE_HEADER_SIZE:
+            Signature, = unpack_from('<H', Data, HeaderSize)
+            if Signature == EFI_TE_IMAGE_HEADER_SIGNATURE:
+                StrippedSize, = unpack_from('<H', Data, HeaderSize + 6)
+                TeOffset = (StrippedSize - EFI_TE_IMAGE_HEADER_SIZE) & 0xFFFFFFFF
+        elif Type == 0x02 and len(Data) >= HeaderSize + 20:
+            # DataOffset and Attributes follow the common header and SectionDefinitionGuid
+            DataOffset, Attributes = unpack_from('<HH', Data, HeaderSize + 16)
+            if not Attributes & EFI_GUIDED_SECTION_PROCESSING_REQUIRED:
+                HeaderSize = DataOffset
+        if TeOffset != 0:
+            TeOffset = (Alignment - TeOffset % Alignment) % Alignment
+
+        Size = len(Buffer)
+        if (Size + HeaderSize + TeOffset) % Alignment != 0:
+            Offset = (Size + EFI_COMMON_SECTION_HEADER_SIZE + HeaderSize + TeOffset + Alignment - 1) & ~(Alignment - 1)
+            Offset = Offset - Size - HeaderSize - TeOffset
+            Buffer.extend(_SectionHeader(SECTION_TYPE_VALUE['EFI_SECTION_RAW'], Offset))
+            Buffer.extend(b'\0' * (Offset - EFI_COMMON_SECTION_HEADER_SIZE))
+        Buffer.extend(Data)
+    return Buffer, MaxAlignment, PeSectionNum
+
+## Generate a section as "GenSec -s Type [-c CompressionType] [--sectionalign Align]... Input..."
+#
+#   @param  Type            The section type, or None for the sections in input files
+#   @param  InputList       The input files
+#   @param  CompressionType The compression type of compression section
+#   @param  AlignList       The alignment of each input file
+#
+#   @retval bytes           The content of the section file
+#   @retval None            The section is not supported
+#
+def GenSection(Type, InputList, CompressionType=None, AlignList=None):
+    if AlignList:
+        if len(AlignList) != len(InputList):
+            return None
+        AlignList = [_Alignment(Align) for Align in AlignList]
+        if None in AlignList:
+            return None
+    else:
+        AlignList = [1] * len(InputList)
+
+    if Type in LEAF_SECTION_TYPES:
+        if len(InputList) != 1:
+            return None
+        Data = _ReadFile(InputList[0])
+        if Data is None:
+            return None
+        Size = EFI_COMMON_SECTION_HEADER_SIZE + len(Data)
+        if Size >= MAX_SECTION_SIZE:
+            Size = EFI_COMMON_SECTION_HEADER2_SIZE + len(Data)
+        return bytes(_SectionHeader(SECTION_TYPE_VALUE[Type], Size) + Data)
+
+    if Type is None or Type == 'EFI_SECTION_COMPRESSION':
+        if Type is not None and CompressionType not in COMPRESSION_TYPE_VALUE:
+            return None
+        Contents = _SectionContents(InputList, AlignList)
+        if Contents is None:
+            return None
+        Data = Contents[0]
+        if Type is None:
+            return bytes(Data)
+        # EFI_COMPRESSION_SECTION(2): header, UncompressedLength, CompressionType
+        Size = EFI_COMMON_SECTION_HEADER_SIZE + 5 + len(Data)
+        if Size >= MAX_SECTION_SIZE:
+            Size = EFI_COMMON_SECTION_HEADER2_SIZE + 5 + len(Data)
+        return bytes(_SectionHeader(SECTION_TYPE_VALUE[Type], Size) +
+                     pack('<IB', len(Data), COMPRESSION_TYPE_VALUE[CompressionType]) + Data)
+    return None
+
+## Generate a version section as "GenSec -s EFI_SECTION_VERSION -n Ver [-j BuildNumber]"
+#
+#   @param  Ver             The version string argument
+#   @param  BuildNumber     The build number argument
+#
+#   @retval bytes           The content of the section file
+#   @retval None            The arguments are not supported
+#
+def GenVersionSection(Ver, BuildNumber=None):
+    Ver = _ToolArgument(Ver)
+    if Ver is None or not Ver.isascii():
+        return None
+    Number = 0
+    if BuildNumber:
+        Number = _Number(BuildNumber, 0xFFFF)
+        if Number is None:
+            return None
+    VersionString = Ver.encode('utf-16-le') + b'\0\0'
+    Size = EFI_COMMON_SECTION_HEADER_SIZE + 2 + len(VersionString)
+    return bytes(_SectionHeader(SECTION_TYPE_VALUE['EFI_SECTION_VERSION'], Size) +
+                 pack('<H', Number) + VersionString)
+
+## Generate an FFS file as "GenFfs -t Type -g Guid [-x] [-s] [-a Align] (-i Input [-n SectionAlign])..."
+#
+#   @param  Type            The FFS file type
+#   @param  Guid            The FFS file GUID
+#   @param  InputList       The input section files
+#   @param  Fixed           The file is fixed
+#   @param  CheckSum        The file data is checksummed
+#   @param  Align           The alignment of the file
+#   @param  SectionAlign    The alignment of each input section file
+#
+#   @retval bytes           The content of the FFS file
+#   @retval None            The FFS file is not supported
+#
+def GenFfs(Type, Guid, InputList, Fixed=False, CheckSum=False, Align=None, SectionAlign=None):
+    if Type not in FFS_FILE_TYPE_VALUE or not InputList:
+        return None
+    if not Guid or not _GuidPattern.match(Guid):
+        return None
+    GuidBytes = UUID(Guid).bytes_le
+
+    FfsAlign = 0
+    if Align:
+        if Align in FFS_ALIGNMENT_NAMES:
+            FfsAlign = FFS_ALIGNMENT_NAMES.index(Align)
+        elif Align not in ("1", "2", "4"):
+            return None
+    AlignList = []
+    for Index in range(len(InputList)):
+        Alignment = _Alignment(SectionAlign[Index] if SectionAlign and Index < len(SectionAlign) else None)
+        if Alignment is None:
+            return None
+        AlignList.append(Alignment)
+
+    Contents = _SectionContents(InputList, AlignList)
+    if Contents is None:
+        return None
+    Data, MaxAlignment, PeSectionNum = Contents
+    # let GenFfs report the missing or extra PE/TE sections
+    if Type in FFS_CORE_FILE_TYPES and PeSectionNum != 1:
+        return None
+    if Type not in FFS_NO_IMAGE_FILE_TYPES and PeSectionNum < 1:
+        return None
+
+    # the file is aligned at the max alignment of its sections at least
+    for Index in range(len(FFS_ALIGNMENT_VALUES) - 1):
+        if FFS_ALIGNMENT_VALUES[Index] < MaxAlignment <= FFS_ALIGNMENT_VALUES[Index + 1]:
+            break
+    FfsAlign = max(FfsAlign, Index)
+
+    Attributes = 0
+    if Fixed:
+        Attributes |= FFS_ATTRIB_FIXED
+    if CheckSum:
+        Attributes |= FFS_ATTRIB_CHECKSUM
+    if FfsAlign < 8:
+        Attributes |= FfsAlign << 3
+    else:
+        Attributes |= ((FfsAlign & 0x7) << 3) | FFS_ATTRIB_DATA_ALIGNMENT2
+
+    Size = EFI_FFS_FILE_HEADER_SIZE + len(Data)
+    if Size >= MAX_FFS_SIZE:
+        Size = EFI_FFS_FILE_HEADER2_SIZE + len(Data)
+        Attributes |= FFS_ATTRIB_LARGE_FILE
+        Header = bytearray(GuidBytes + pack('<BBBB3BBQ', 0, 0, FFS_FILE_TYPE_VALUE[Type], Attributes, 0, 0, 0, 0, Size))
+    else:
+        Header = bytearray(GuidBytes + pack('<BBBB3BB', 0, 0, FFS_FILE_TYPE_VALUE[Type], Attributes,
+                                            Size & 0xFF, (Size >> 8) & 0xFF, (Size >> 16) & 0xFF, 0))
+
+    # the checksums and state are zero while the header checksum is calculated
+    Header[16] = -sum(Header) & 0xFF
+    if Attributes & FFS_ATTRIB_CHECKSUM:
+        Header[17] = -sum(Data) & 0xFF
+    else:
+        Header[17] = FFS_FIXED_CHECKSUM
+    Header[23] = FFS_FILE_STATE
+    return bytes(Header + Data)
@@ -12,15 +12,14 @@
 from __future__ import absolute_import
 from struct import *
 from .GenFdsGlobalVariable import GenFdsGlobalVariable
-from io import BytesIO
 import string
 import edk2basetools.Common.LongFilePathOs as os
 from stat import *
 from edk2basetools.Common import EdkLogger
 from edk2basetools.Common.BuildToolError import *
-from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
 from edk2basetools.Common.MultipleWorkspace import MultipleWorkspace as mws
 from edk2basetools.Common.DataType import BINARY_FILE_TYPE_FV
+from .FdImage import AppendFile
 
 ## generate Region
 #
@@ -56,8 +55,11 @@ def PadBuffer(self, Buffer, ErasePolarity, Size):
                 PadByte = pack('B', 0xFF)
             else:
                 PadByte = pack('B', 0)
-            for i in range(0, Size):
-                Buffer.write(PadByte)
+            PadData = PadByte * min(Size, 0x100000)
+            while Size > len(PadData):
+                Buffer.write(PadData)
+                Size -= len(PadData)
+            Buffer.write(PadData[:Size])
 
     ## AddToBuffer()
     #
@@ -127,24 +129,21 @@ def AddToBuffer(self, Buffer, BaseAddress, BlockSizeList, ErasePolarity, ImageBi
                         if self.FvAddress % FvAlignValue != 0:
                             EdkLogger.error("GenFds", GENFDS_ERROR,
                                             "FV (%s) is NOT %s Aligned!" % (FvObj.UiFvName, FvObj.FvAlignment))
-                        FvBuffer = BytesIO()
                         FvBaseAddress = '0x%X' % self.FvAddress
                         BlockSize = None
                         BlockNum = None
-                        FvObj.AddToBuffer(FvBuffer, FvBaseAddress, BlockSize, BlockNum, ErasePolarity, Flag=Flag)
+                        #
+                        # Put the generated image into FD buffer.
+                        #
+                        FvStart = Buffer.tell()
+                        FvObj.AddToBuffer(Buffer, FvBaseAddress, BlockSize, BlockNum, ErasePolarity, Flag=Flag)
                         if Flag:
                             continue
 
-                        FvBufferLen = len(FvBuffer.getvalue())
+                        FvBufferLen = Buffer.tell() - FvStart
                         if FvBufferLen > Size:
-                            FvBuffer.close()
                             EdkLogger.error("GenFds", GENFDS_ERROR,
                                             "Size of FV (%s) is larger than Region Size 0x%X specified." % (RegionData, Size))
-                        #
-                        # Put the generated image into FD buffer.
-                        #
-                        Buffer.write(FvBuffer.getvalue())
-                        FvBuffer.close()
                         FvOffset = FvOffset + FvBufferLen
                         Size = Size - FvBufferLen
                         continue
@@ -160,9 +159,7 @@ def AddToBuffer(self, Buffer, BaseAddress, BlockSizeList, ErasePolarity, ImageBi
                             EdkLogger.error("GenFds", GENFDS_ERROR,
                                             "Size of FV File (%s) is larger than Region Size 0x%X specified." \
                                             % (RegionData, Size))
-                        BinFile = open(FileName, 'rb')
-                        Buffer.write(BinFile.read())
-                        BinFile.close()
+                        AppendFile(Buffer, FileName)
                         Size = Size - FileLength
             #
             # Pad the left buffer
@@ -214,9 +211,7 @@ def AddToBuffer(self, Buffer, BaseAddress, BlockSizeList, ErasePolarity, ImageBi
                     EdkLogger.error("GenFds", GENFDS_ERROR,
                                     "Size 0x%X of Capsule File (%s) is larger than Region Size 0x%X specified." \
                                     % (FileLength, RegionData, Size))
-                BinFile = open(FileName, 'rb')
-                Buffer.write(BinFile.read())
-                BinFile.close()
+                AppendFile(Buffer, FileName)
                 Size = Size - FileLength
             #
             # Pad the left buffer
@@ -246,9 +241,7 @@ def AddToBuffer(self, Buffer, BaseAddress, BlockSizeList, ErasePolarity, ImageBi
                                     "Size of File (%s) is larger than Region Size 0x%X specified." \
                                     % (RegionData, Size))
                 GenFdsGlobalVariable.InfLogger('   Region File Name = %s' % RegionData)
-                BinFile = open(RegionData, 'rb')
-                Buffer.write(BinFile.read())
-                BinFile.close()
+                AppendFile(Buffer, RegionData)
                 Size = Size - FileLength
             #
             # Pad the left buffer
@@ -0,0 +1,77 @@
+## @file
+# This file is used to open the SQLite databases of ECC and EOT tools
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+import sqlite3
+import time
+
+## TimedCursor
+#
+# This class defined a cursor accumulating the time spent in executing
+# statements and fetching their results
+#
+# @param object:       Inherited from sqlite3.Cursor class
+#
+class TimedCursor(sqlite3.Cursor):
+    def __init__(self, *Args):
+        sqlite3.Cursor.__init__(self, *Args)
+        self.ElapsedTime = 0.0
+
+    def execute(self, *Args):
+        Start = time.perf_counter()
+        try:
+            return sqlite3.Cursor.execute(self, *Args)
+        finally:
+            self.ElapsedTime += time.perf_counter() - Start
+
+    def executemany(self, *Args):
+        Start = time.perf_counter()
+        try:
+            return sqlite3.Cursor.executemany(self, *Args)
+        finally:
+            self.ElapsedTime += time.perf_counter() - Start
+
+    def fetchall(self):
+        Start = time.perf_counter()
+        try:
+            return sqlite3.Cursor.fetchall(self)
+        finally:
+            self.ElapsedTime += time.perf_counter() - Start
+
+## Connect a database
+#
+# The database is written in WAL mode without waiting for data to be flushed
+# to disk, since it can always be rebuilt from the source tree
+#
+# @param DbPath:       The file path of the database
+# @param PageSize:     The page size of the database
+#
+# @retval Conn:        Connection of the database
+# @retval Cur:         TimedCursor of the connection
+#
+def Connect(DbPath, PageSize):
+    Conn = sqlite3.connect(DbPath, isolation_level = 'DEFERRED')
+    Conn.execute("PRAGMA page_size=%d" % PageSize)
+    Conn.execute("PRAGMA journal_mode=WAL")
+    Conn.execute("PRAGMA synchronous=OFF")
+    Conn.execute("PRAGMA temp_store=MEMORY")
+    Conn.execute("PRAGMA cache_size=-65536")
+    # to avoid non-ascii character conversion error
+    Conn.text_factory = str
+    return Conn, Conn.cursor(TimedCursor)
+
+## Create indexes
+#
+# @param Cursor:       Cursor of the database
+# @param IndexList:    List of (table name, column names) to be indexed
+#
+def CreateIndexes(Cursor, IndexList):
+    for TableName, Columns in IndexList:
+        SqlCommand = """create index IF NOT EXISTS Index_%s_%s on %s (%s)""" % \
+                     (TableName, '_'.join(Columns), TableName, ', '.join(Columns))
+        Cursor.execute(SqlCommand)
@@ -41,6 +41,26 @@ def Create(self, SqlCommand):
     def Insert(self, SqlCommand):
         self.Exec(SqlCommand)
 
+    ## Insert records
+    #
+    # Insert records into a table with one statement, IDs are generated
+    #
+    # @param RecordList:  List of records, each one has all columns but ID
+    #
+    # @retval IdList:     List of the IDs of the records
+    #
+    def InsertMany(self, RecordList):
+        IdList = []
+        ValueList = []
+        for Record in RecordList:
+            self.ID = self.ID + 1
+            IdList.append(self.ID)
+            ValueList.append((self.ID,) + tuple(Record))
+        if ValueList:
+            SqlCommand = """insert into %s values(%s)""" % (self.Table, ', '.join('?' * len(ValueList[0])))
+            self.Cur.executemany(SqlCommand, ValueList)
+        return IdList
+
     ## Query table
     #
     # Query all records of the table
@@ -93,10 +113,14 @@ def GenerateID(self, ID):
 
     ## Init the ID of the table
     #
-    # Init the ID of the table
+    # Init the ID of the table, after the largest one in use in case records
+    # have been deleted
     #
     def InitID(self):
-        self.ID = self.GetCount()
+        SqlCommand = """select max(ID) from %s""" % self.Table
+        self.Cur.execute(SqlCommand)
+        for Item in self.Cur:
+            self.ID = Item[0] or 0
 
     ## Exec
     #
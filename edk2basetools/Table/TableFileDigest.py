@@ -0,0 +1,54 @@
+## @file
+# This file is used to create/update/query/erase table for file digests
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+from edk2basetools.Table.Table import Table
+
+## TableFileDigest
+#
+# This class defined a table keeping the content digest of the files in
+# table File, so that a file touched but not changed needn't be parsed again
+#
+# @param object:       Inherited from object class
+#
+class TableFileDigest(Table):
+    def __init__(self, Cursor):
+        Table.__init__(self, Cursor)
+        self.Table = 'FileDigest'
+
+    ## Create table
+    #
+    # Create table FileDigest
+    #
+    # @param ID:        ID of the file in table File
+    # @param Digest:    Hex digest of the file content
+    #
+    def Create(self):
+        SqlCommand = """create table IF NOT EXISTS %s (ID INTEGER PRIMARY KEY,
+                                                       Digest VARCHAR NOT NULL
+                                                      )""" % self.Table
+        Table.Create(self, SqlCommand)
+
+    ## Insert table
+    #
+    # Insert or replace the digest of a file
+    #
+    # @param ID:        ID of the file in table File
+    # @param Digest:    Hex digest of the file content
+    #
+    def Insert(self, ID, Digest):
+        SqlCommand = """insert or replace into %s values(%s, '%s')""" % (self.Table, ID, Digest)
+        Table.Insert(self, SqlCommand)
+
+    ## Get the digests of all files
+    #
+    # @retval dict      The dict of file ID to hex digest
+    #
+    def GetDigests(self):
+        return dict(self.Exec("select ID, Digest from %s" % self.Table))
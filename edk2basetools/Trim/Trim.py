@@ -21,6 +21,7 @@
 from edk2basetools.Common.BuildVersion import gBUILD_VERSION
 import edk2basetools.Common.EdkLogger as EdkLogger
 from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
+from edk2basetools.Common.PersistentStore import FileEntryStore
 
 # Version and Copyright
 __version_number__ = ("0.10" + " " + gBUILD_VERSION)
@@ -248,6 +249,188 @@ def TrimPreprocessedVfr(Source, Target):
     except:
         EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=Target)
 
+## Cache of the ASL/ASM files read by DoInclude
+#
+#   A file is read and its include statements are located only once as long
+# as it is unchanged. The lines and include statements of files can be kept
+# in a file across Trim invocations, so that the headers shared by the
+# ASL/ASM sources of all modules are read once.
+#
+#   The expansion of a file is reused whenever the file is included again
+# with the same search paths, as long as no error was found in expanding it.
+#
+# @param StoreFile          Path of the file keeping the cache, or None
+#
+class IncludeCache(FileEntryStore):
+    # bump it whenever the layout of entries changes
+    _VERSION_ = 2
+    _NAME_ = 'include cache'
+
+    def __init__(self, StoreFile=None):
+        FileEntryStore.__init__(self, StoreFile)
+        self._Resolved = {}
+        self._Expanded = {}
+
+    ## Find an included file in search paths
+    #
+    # @param  Source            The included file name
+    # @param  SearchPathList    The directories to search in order
+    #
+    # @retval str               The absolute path of the file found
+    # @retval None              The file is not found
+    #
+    def Resolve(self, Source, SearchPathList):
+        Key = (Source, tuple(SearchPathList))
+        if Key not in self._Resolved:
+            self._Resolved[Key] = None
+            for IncludePath in SearchPathList:
+                IncludeFile = os.path.join(IncludePath, Source)
+                if os.path.isfile(IncludeFile):
+                    self._Resolved[Key] = os.path.abspath(os.path.normpath(IncludeFile))
+                    break
+        return self._Resolved[Key]
+
+    ## Get the lines and the include statements of a file
+    #
+    #   The include statements are kept in a dict of line index to tuple of
+    # (indent, included file name, True if included file is searched in the
+    # directory of the file first).
+    #
+    # @param  IncludeFile       The absolute path of the file
+    # @param  FileType          "ASL" or "ASM"
+    #
+    # @retval tuple             (lines, include statements)
+    # @retval None              The file cannot be read
+    #
+    def GetFile(self, IncludeFile, FileType):
+        Entry = self.GetEntry(IncludeFile, FileType)
+        if Entry is None:
+            return None
+        return Entry[1:]
+
+    def _GetFileEntry(self, IncludeFile, Stamp, FileType):
+        if Stamp is None:
+            return None
+        try:
+            try:
+                with open(IncludeFile, "r") as File:
+                    Lines = File.readlines()
+            except:
+                with codecs.open(IncludeFile, "r", encoding='utf-8') as File:
+                    Lines = File.readlines()
+        except:
+            return None
+        Includes = {}
+        for Index, Line in enumerate(Lines):
+            if FileType == "ASL":
+                Result = gAslIncludePattern.findall(Line)
+                if len(Result) != 0:
+                    Includes[Index] = (Result[0][0], Result[0][1], False)
+                    continue
+                Result = gAslCIncludePattern.findall(Line)
+                if len(Result) != 0 and os.path.splitext(Result[0][1])[1].lower() in [".asl", ".asi"]:
+                    #
+                    # We should first search the local directory if current file are using pattern #include "XXX"
+                    #
+                    Includes[Index] = (Result[0][0], Result[0][1], Result[0][2] == '"')
+            elif FileType == "ASM":
+                Result = gIncludePattern.findall(Line)
+                if len(Result) != 0:
+                    Includes[Index] = ('', os.path.normpath(Result[0].strip()), False)
+        return (Stamp, Lines, Includes)
+
+    ## Expand the include statements of a file, recursively
+    #
+    #   The expansion is a tree, so that the expansion of an included file is
+    # shared by all files including it. It is a tuple of (items, files
+    # expanded, no error found). An item is either a list of lines of the file
+    # or a tuple of (indent, expansion of included file or None, included file)
+    # standing for an include statement.
+    #
+    # @param  IncludeFile       The absolute path of the file
+    # @param  IncludePathList   The list of external include file
+    # @param  FileType          "ASL" or "ASM"
+    #
+    # @retval tuple             The expansion of file
+    # @retval None              The file cannot be read, or is included circularly
+    #
+    def Expand(self, IncludeFile, IncludePathList, FileType):
+        Key = (IncludeFile, FileType, tuple(IncludePathList))
+        Expansion = self._Expanded.get(Key)
+        if Expansion is not None and Expansion[1].isdisjoint(gIncludedAslFile):
+            return Expansion
+
+        # avoid A "include" B and B "include" A
+        if IncludeFile in gIncludedAslFile:
+            EdkLogger.warn("Trim", "Circular include",
+                           ExtraData= "%s -> %s" % (" -> ".join(gIncludedAslFile), IncludeFile))
+            return None
+        File = self.GetFile(IncludeFile, FileType)
+        if File is None:
+            EdkLogger.warn("Trim", FILE_OPEN_FAILURE, ExtraData=IncludeFile)
+            return None
+        Lines, Includes = File
+
+        ItemList = []
+        FileSet = set([IncludeFile])
+        Clean = True
+        Start = 0
+        gIncludedAslFile.append(IncludeFile)
+        for Index in sorted(Includes):
+            if Start < Index:
+                ItemList.append(Lines[Start:Index])
+            Start = Index + 1
+            Indent, Source, SearchLocal = Includes[Index]
+            if SearchLocal:
+                SearchPathList = [os.path.dirname(IncludeFile)] + IncludePathList
+            else:
+                SearchPathList = IncludePathList
+            SubFile = self.Resolve(Source, SearchPathList)
+            SubExpansion = None
+            if SubFile is None:
+                EdkLogger.warn("Trim", "Failed to find include file %s" % Source)
+            else:
+                SubExpansion = self.Expand(SubFile, IncludePathList, FileType)
+            if SubExpansion is None:
+                Clean = False
+            else:
+                FileSet.update(SubExpansion[1])
+                Clean = Clean and SubExpansion[2]
+            ItemList.append((Indent, SubExpansion, SubFile))
+        if Start < len(Lines):
+            ItemList.append(Lines[Start:])
+        gIncludedAslFile.pop()
+
+        Expansion = (ItemList, FileSet, Clean)
+        if Clean:
+            self._Expanded[Key] = Expansion
+        return Expansion
+
+    ## Get the lines and the included files of an expansion
+    #
+    # @param  Expansion         The expansion of file
+    # @param  IncludeFile       The absolute path of the file
+    # @param  Indent            Spaces before the lines of file
+    # @param  Content           The list to append the lines to
+    # @param  IncludeFileList   The list to append the included files to
+    #
+    @staticmethod
+    def Flatten(Expansion, IncludeFile, Indent, Content, IncludeFileList):
+        IncludeFileList.append(IncludeFile)
+        for Item in Expansion[0]:
+            if type(Item) is list:
+                if Indent:
+                    Content.extend(Indent + Line for Line in Item)
+                else:
+                    Content.extend(Item)
+                continue
+            SubIndent, SubExpansion, SubFile = Item
+            if SubExpansion is not None:
+                IncludeCache.Flatten(SubExpansion, SubFile, Indent + SubIndent, Content, IncludeFileList)
+            Content.append("\n")
+
+gIncludeCache = IncludeCache()
+
 ## Read the content  ASL file, including ASL included, recursively
 #
 # @param  Source            File to be read
@@ -258,77 +441,25 @@ def TrimPreprocessedVfr(Source, Target):
 #                           in the IncludePathList will be searched.
 #
 def DoInclude(Source, Indent='', IncludePathList=[], LocalSearchPath=None, IncludeFileList = None, filetype=None):
-    NewFileContent = []
     if IncludeFileList is None:
         IncludeFileList = []
-    try:
-        #
-        # Search LocalSearchPath first if it is specified.
-        #
-        if LocalSearchPath:
-            SearchPathList = [LocalSearchPath] + IncludePathList
-        else:
-            SearchPathList = IncludePathList
-
-        for IncludePath in SearchPathList:
-            IncludeFile = os.path.join(IncludePath, Source)
-            if os.path.isfile(IncludeFile):
-                try:
-                    with open(IncludeFile, "r") as File:
-                        F = File.readlines()
-                except:
-                    with codecs.open(IncludeFile, "r", encoding='utf-8') as File:
-                        F = File.readlines()
-                break
-        else:
-            EdkLogger.warn("Trim", "Failed to find include file %s" % Source)
-            return []
-    except:
-        EdkLogger.warn("Trim", FILE_OPEN_FAILURE, ExtraData=Source)
+    #
+    # Search LocalSearchPath first if it is specified.
+    #
+    if LocalSearchPath:
+        SearchPathList = [LocalSearchPath] + IncludePathList
+    else:
+        SearchPathList = IncludePathList
+    IncludeFile = gIncludeCache.Resolve(Source, SearchPathList)
+    if IncludeFile is None:
+        EdkLogger.warn("Trim", "Failed to find include file %s" % Source)
         return []
 
-
-    # avoid A "include" B and B "include" A
-    IncludeFile = os.path.abspath(os.path.normpath(IncludeFile))
-    if IncludeFile in gIncludedAslFile:
-        EdkLogger.warn("Trim", "Circular include",
-                       ExtraData= "%s -> %s" % (" -> ".join(gIncludedAslFile), IncludeFile))
+    Expansion = gIncludeCache.Expand(IncludeFile, IncludePathList, filetype)
+    if Expansion is None:
         return []
-    gIncludedAslFile.append(IncludeFile)
-    IncludeFileList.append(IncludeFile.strip())
-    for Line in F:
-        LocalSearchPath = None
-        if filetype == "ASL":
-            Result = gAslIncludePattern.findall(Line)
-            if len(Result) == 0:
-                Result = gAslCIncludePattern.findall(Line)
-                if len(Result) == 0 or os.path.splitext(Result[0][1])[1].lower() not in [".asl", ".asi"]:
-                    NewFileContent.append("%s%s" % (Indent, Line))
-                    continue
-                #
-                # We should first search the local directory if current file are using pattern #include "XXX"
-                #
-                if Result[0][2] == '"':
-                    LocalSearchPath = os.path.dirname(IncludeFile)
-            CurrentIndent = Indent + Result[0][0]
-            IncludedFile = Result[0][1]
-            NewFileContent.extend(DoInclude(IncludedFile, CurrentIndent, IncludePathList, LocalSearchPath,IncludeFileList,filetype))
-            NewFileContent.append("\n")
-        elif filetype == "ASM":
-            Result = gIncludePattern.findall(Line)
-            if len(Result) == 0:
-                NewFileContent.append("%s%s" % (Indent, Line))
-                continue
-
-            IncludedFile = Result[0]
-
-            IncludedFile = IncludedFile.strip()
-            IncludedFile = os.path.normpath(IncludedFile)
-            NewFileContent.extend(DoInclude(IncludedFile, '', IncludePathList, LocalSearchPath,IncludeFileList,filetype))
-            NewFileContent.append("\n")
-
-    gIncludedAslFile.pop()
-
+    NewFileContent = []
+    IncludeCache.Flatten(Expansion, IncludeFile, Indent, NewFileContent, IncludeFileList)
     return NewFileContent
 
 
@@ -523,6 +654,8 @@ def Options():
                           help="Remove postfix of long number"),
         make_option("-i", "--include-path-file", dest="IncludePathFile",
                           help="The input file is include path list to search for ASL include file"),
+        make_option("--include-cache", dest="IncludeCacheFile",
+                          help="The file to keep the ASL/ASM files read across Trim invocations"),
         make_option("-o", "--output", dest="OutputFile",
                           help="File to store the trimmed content"),
         make_option("--ModuleName", dest="ModuleName", help="The module's BASE_NAME"),
@@ -538,7 +671,7 @@ def Options():
     ]
 
     # use clearer usage to override default usage message
-    UsageString = "%prog [-s|-r|-a|--Vfr-Uni-Offset] [-c] [-v|-d <debug_level>|-q] [-i <include_path_file>] [-o <output_file>] [--ModuleName <ModuleName>] [--DebugDir <DebugDir>] [<input_file>]"
+    UsageString = "%prog [-s|-r|-a|--Vfr-Uni-Offset] [-c] [-v|-d <debug_level>|-q] [-i <include_path_file>] [--include-cache <cache_file>] [-o <output_file>] [--ModuleName <ModuleName>] [--DebugDir <DebugDir>] [<input_file>]"
 
     Parser = OptionParser(description=__copyright__, version=__version__, option_list=OptionList, usage=UsageString)
     Parser.set_defaults(FileType="Vfr")
@@ -571,6 +704,7 @@ def Options():
 # @retval 1     Tool failed
 #
 def Main():
+    global gIncludeCache
     try:
         EdkLogger.Initialize()
         CommandOptions, InputFile = Options()
@@ -582,6 +716,7 @@ def Main():
         return 1
 
     try:
+        gIncludeCache = IncludeCache(CommandOptions.IncludeCacheFile)
         if CommandOptions.FileType == "Vfr":
             if CommandOptions.OutputFile is None:
                 CommandOptions.OutputFile = os.path.splitext(InputFile)[0] + '.iii'
@@ -590,10 +725,12 @@ def Main():
             if CommandOptions.OutputFile is None:
                 CommandOptions.OutputFile = os.path.splitext(InputFile)[0] + '.iii'
             TrimAslFile(InputFile, CommandOptions.OutputFile, CommandOptions.IncludePathFile,CommandOptions.AslDeps)
+            gIncludeCache.Save()
         elif CommandOptions.FileType == "VfrOffsetBin":
             GenerateVfrBinSec(CommandOptions.ModuleName, CommandOptions.DebugDir, CommandOptions.OutputFile)
         elif CommandOptions.FileType == "Asm":
             TrimAsmFile(InputFile, CommandOptions.OutputFile, CommandOptions.IncludePathFile)
+            gIncludeCache.Save()
         else :
             if CommandOptions.OutputFile is None:
                 CommandOptions.OutputFile = os.path.splitext(InputFile)[0] + '.iii'
@@ -33,7 +33,9 @@
 from edk2basetools.Common.VariableAttributes import VariableAttributes
 import edk2basetools.Common.GlobalData as GlobalData
 import subprocess
+import hashlib
 from functools import reduce
+from edk2basetools.Common.PersistentStore import LoadStore, SaveStore
 from edk2basetools.Common.Misc import SaveFileOnChange
 from edk2basetools.Workspace.BuildClassObject import PlatformBuildClassObject, StructurePcd, PcdClassObject, ModuleBuildClassObject
 from collections import OrderedDict, defaultdict
@@ -56,6 +58,9 @@ def _IsFieldValueAnArray (Value):
 
 PcdValueInitName = 'PcdValueInit'
 PcdValueCommonName = 'PcdValueCommon'
+PcdValueCacheName = 'PcdValueCache.bin'
+# bump it whenever the layout of the PCD value cache changes
+PcdValueCacheVersion = 1
 
 PcdMainCHeader = '''
 /**
@@ -136,7 +141,7 @@ def GetDependencyList(FileStack, SearchPathList):
             CurrentFileDependencyList = DepDb[F]
         else:
             try:
-                Fd = open(F, 'r')
+                Fd = open(F, 'rb')
                 FileContent = Fd.read()
             except BaseException as X:
                 EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=F + "\n\t" + str(X))
@@ -2757,85 +2762,14 @@ def GenerateByteArrayValue (self, StructuredPcds):
         if not StructuredPcds:
             return
 
-        InitByteValue = ""
-        CApp = PcdMainCHeader
-
-        IncludeFiles = set()
+        IncludeFiles = OrderedDict()
         for PcdName in StructuredPcds:
             Pcd = StructuredPcds[PcdName]
             for IncludeFile in Pcd.StructuredPcdIncludeFile:
-                if IncludeFile not in IncludeFiles:
-                    IncludeFiles.add(IncludeFile)
-                    CApp = CApp + '#include <%s>\n' % (IncludeFile)
-        CApp = CApp + '\n'
-        for Pcd in StructuredPcds.values():
-            CApp = CApp + self.GenerateArrayAssignment(Pcd)
+                IncludeFiles[IncludeFile] = None
+        PcdCode = OrderedDict()
         for PcdName in sorted(StructuredPcds.keys()):
-            Pcd = StructuredPcds[PcdName]
-
-            #create void void Cal_tocken_cname_Size functions
-            CApp = CApp + self.GenerateSizeFunction(Pcd)
-
-            #create void Assign_ functions
-
-            # From DEC
-            CApp = CApp + self.GenerateDefaultValueAssignFunction(Pcd)
-            # From Fdf
-            CApp = CApp + self.GenerateFdfValue(Pcd)
-            # From CommandLine
-            CApp = CApp + self.GenerateCommandLineValue(Pcd)
-
-            # From Dsc Global setting
-            if self.SkuOverrideValuesEmpty(Pcd.SkuOverrideValues) or Pcd.Type in [self._PCD_TYPE_STRING_[MODEL_PCD_FIXED_AT_BUILD],
-                        self._PCD_TYPE_STRING_[MODEL_PCD_PATCHABLE_IN_MODULE]]:
-                CApp = CApp + self.GenerateInitValueFunction(Pcd, self.SkuIdMgr.SystemSkuId, TAB_DEFAULT_STORES_DEFAULT)
-            else:
-                for SkuName in self.SkuIdMgr.SkuOverrideOrder():
-                    if SkuName not in Pcd.SkuOverrideValues:
-                        continue
-                    for DefaultStoreName in Pcd.SkuOverrideValues[SkuName]:
-                        CApp = CApp + self.GenerateInitValueFunction(Pcd, SkuName, DefaultStoreName)
-
-            # From Dsc module scope setting
-            CApp = CApp + self.GenerateModuleScopeValue(Pcd)
-
-            #create Initialize_ functions
-            if self.SkuOverrideValuesEmpty(Pcd.SkuOverrideValues) or Pcd.Type in [self._PCD_TYPE_STRING_[MODEL_PCD_FIXED_AT_BUILD],
-                        self._PCD_TYPE_STRING_[MODEL_PCD_PATCHABLE_IN_MODULE]]:
-                InitByteValue, CApp = self.GenerateInitializeFunc(self.SkuIdMgr.SystemSkuId, TAB_DEFAULT_STORES_DEFAULT, Pcd, InitByteValue, CApp)
-                InitByteValue, CApp =  self.GenerateModuleScopeInitializeFunc(self.SkuIdMgr.SystemSkuId,Pcd,InitByteValue,CApp)
-            else:
-                for SkuName in self.SkuIdMgr.SkuOverrideOrder():
-                    if SkuName not in Pcd.SkuOverrideValues:
-                        continue
-                    for DefaultStoreName in Pcd.DefaultStoreName:
-                        Pcd = StructuredPcds[PcdName]
-                        InitByteValue, CApp = self.GenerateInitializeFunc(SkuName, DefaultStoreName, Pcd, InitByteValue, CApp)
-
-        CApp = CApp + 'VOID\n'
-        CApp = CApp + 'PcdEntryPoint(\n'
-        CApp = CApp + '  VOID\n'
-        CApp = CApp + '  )\n'
-        CApp = CApp + '{\n'
-        for Pcd in StructuredPcds.values():
-            if self.SkuOverrideValuesEmpty(Pcd.SkuOverrideValues) or Pcd.Type in [self._PCD_TYPE_STRING_[MODEL_PCD_FIXED_AT_BUILD], self._PCD_TYPE_STRING_[MODEL_PCD_PATCHABLE_IN_MODULE]]:
-                CApp = CApp + '  Initialize_%s_%s_%s_%s();\n' % (self.SkuIdMgr.SystemSkuId, TAB_DEFAULT_STORES_DEFAULT, Pcd.TokenSpaceGuidCName, Pcd.TokenCName)
-                for ModuleGuid in Pcd.PcdFiledValueFromDscComponent:
-                    CApp += "  Initialize_%s_%s_%s_%s();\n" % (ModuleGuid,TAB_DEFAULT_STORES_DEFAULT ,Pcd.TokenSpaceGuidCName, Pcd.TokenCName)
-            else:
-                for SkuName in self.SkuIdMgr.SkuOverrideOrder():
-                    if SkuName not in self.SkuIdMgr.AvailableSkuIdSet:
-                        continue
-                    for DefaultStoreName in Pcd.SkuOverrideValues[SkuName]:
-                        CApp = CApp + '  Initialize_%s_%s_%s_%s();\n' % (SkuName, DefaultStoreName, Pcd.TokenSpaceGuidCName, Pcd.TokenCName)
-        CApp = CApp + '}\n'
-
-        CApp = CApp + PcdMainCEntry + '\n'
-
-        if not os.path.exists(self.OutputPath):
-            os.makedirs(self.OutputPath)
-        CAppBaseFileName = os.path.join(self.OutputPath, PcdValueInitName)
-        SaveFileOnChange(CAppBaseFileName + '.c', CApp, False)
+            PcdCode[PcdName] = self.GenerateStructuredPcdCode(StructuredPcds[PcdName])
 
         # start generating makefile
         MakeApp = PcdMakefileHeader
@@ -2934,12 +2868,16 @@ def GenerateByteArrayValue (self, StructuredPcds):
         else:
             MakeApp = MakeApp + AppTarget % ("""\tcp -p $(APPLICATION) $(APPFILE) """)
         MakeApp = MakeApp + '\n'
+        # the digest shared by all PCDs covers the compiler flags and include paths
+        CommonHash = hashlib.md5(MakeApp.encode('utf-8'))
         IncludeFileFullPaths = []
+        IncludeFilePathMap = {}
         for includefile in IncludeFiles:
             for includepath in IncSearchList:
                 includefullpath = os.path.join(str(includepath), includefile)
                 if os.path.exists(includefullpath):
                     IncludeFileFullPaths.append(os.path.normpath(includefullpath))
+                    IncludeFilePathMap[includefile] = os.path.normpath(includefullpath)
                     break
         SearchPathList = []
         SearchPathList.append(os.path.normpath(mws.join(GlobalData.gGlobalDefines["EDK_TOOLS_PATH"], "BaseTools/Source/C/Include")))
@@ -2958,6 +2896,152 @@ def GenerateByteArrayValue (self, StructuredPcds):
             MakeApp = MakeApp + '\tcp -p -f %s %s/PcdValueCommon.c\n' % (PcdValueCommonPath, self.OutputPath)
         MakeFileName = os.path.join(self.OutputPath, 'Makefile')
         MakeApp += "$(OBJECTS) : %s\n" % MakeFileName
+
+        #
+        # The value of a PCD only depends on its code, the headers it includes and
+        # the compiler flags, so the values of the unchanged PCDs are got from cache
+        # and only the changed ones are compiled into the value tool.
+        #
+        CommonHash.update(self.GetFileListDigest([PcdValueCommonPath]).encode('utf-8'))
+        IncludeDigests = {}
+        for IncludeFile in IncludeFiles:
+            FullPaths = [IncludeFilePathMap[IncludeFile]] if IncludeFile in IncludeFilePathMap else []
+            IncludeDigests[IncludeFile] = self.GetFileListDigest(GetDependencyList(FullPaths, SearchPathList))
+        PcdHash = {}
+        for PcdName, Code in PcdCode.items():
+            Hash = CommonHash.copy()
+            for Item in Code:
+                Hash.update(Item.encode('utf-8'))
+            for IncludeFile in StructuredPcds[PcdName].StructuredPcdIncludeFile:
+                Hash.update(IncludeDigests[IncludeFile].encode('utf-8'))
+            PcdHash[PcdName] = Hash.hexdigest()
+
+        PcdValueCacheFile = os.path.join(self.OutputPath, PcdValueCacheName)
+        PcdValueCache = LoadStore(PcdValueCacheFile, PcdValueCacheVersion, "structure PCD value cache") or {}
+        PcdValues = OrderedDict((PcdName, PcdValueCache.get(PcdHash[PcdName])) for PcdName in PcdCode)
+        ChangedPcds = [PcdName for PcdName in PcdCode if PcdValues[PcdName] is None]
+        EdkLogger.verbose("%d of %d structure PCD values are got from cache" % (len(PcdCode) - len(ChangedPcds), len(PcdCode)))
+        if ChangedPcds:
+            for Line in self.RunPcdValueTool(StructuredPcds, PcdCode, ChangedPcds, IncludeFiles, MakeFileName, MakeApp):
+                PcdInfo = Line.split('|')[0].split('.')
+                PcdName = (PcdInfo[3], PcdInfo[2])
+                if PcdName in PcdValues:
+                    if PcdValues[PcdName] is None:
+                        PcdValues[PcdName] = []
+                    PcdValues[PcdName].append(Line)
+            NewPcdValueCache = dict((PcdHash[PcdName], Lines) for PcdName, Lines in PcdValues.items() if Lines is not None)
+            SaveStore(PcdValueCacheFile, PcdValueCacheVersion, NewPcdValueCache, "structure PCD value cache")
+
+        StructurePcdSet = []
+        for Lines in PcdValues.values():
+            for Pcd in Lines or []:
+                PcdValue = Pcd.split ('|')
+                PcdInfo = PcdValue[0].split ('.')
+                StructurePcdSet.append((PcdInfo[0], PcdInfo[1], PcdInfo[2], PcdInfo[3], PcdValue[2].strip()))
+        return StructurePcdSet
+
+    ## Get the digest of the content of files
+    @staticmethod
+    def GetFileListDigest(FileList):
+        Hash = hashlib.md5()
+        for File in sorted(FileList):
+            Hash.update(File.encode('utf-8'))
+            try:
+                with open(File, 'rb') as Fd:
+                    Hash.update(Fd.read())
+            except IOError:
+                pass
+        return Hash.hexdigest()
+
+    ## Generate the C code and the tool input of one structure PCD
+    #
+    #   @retval (ArrayCode, FuncCode, InitByteValue, EntryCode)
+    #
+    def GenerateStructuredPcdCode(self, Pcd):
+        InitByteValue = ""
+        ArrayCode = self.GenerateArrayAssignment(Pcd)
+
+        #create void void Cal_tocken_cname_Size functions
+        CApp = self.GenerateSizeFunction(Pcd)
+
+        #create void Assign_ functions
+
+        # From DEC
+        CApp = CApp + self.GenerateDefaultValueAssignFunction(Pcd)
+        # From Fdf
+        CApp = CApp + self.GenerateFdfValue(Pcd)
+        # From CommandLine
+        CApp = CApp + self.GenerateCommandLineValue(Pcd)
+
+        # From Dsc Global setting
+        if self.SkuOverrideValuesEmpty(Pcd.SkuOverrideValues) or Pcd.Type in [self._PCD_TYPE_STRING_[MODEL_PCD_FIXED_AT_BUILD],
+                    self._PCD_TYPE_STRING_[MODEL_PCD_PATCHABLE_IN_MODULE]]:
+            CApp = CApp + self.GenerateInitValueFunction(Pcd, self.SkuIdMgr.SystemSkuId, TAB_DEFAULT_STORES_DEFAULT)
+        else:
+            for SkuName in self.SkuIdMgr.SkuOverrideOrder():
+                if SkuName not in Pcd.SkuOverrideValues:
+                    continue
+                for DefaultStoreName in Pcd.SkuOverrideValues[SkuName]:
+                    CApp = CApp + self.GenerateInitValueFunction(Pcd, SkuName, DefaultStoreName)
+
+        # From Dsc module scope setting
+        CApp = CApp + self.GenerateModuleScopeValue(Pcd)
+
+        #create Initialize_ functions
+        EntryCode = ""
+        if self.SkuOverrideValuesEmpty(Pcd.SkuOverrideValues) or Pcd.Type in [self._PCD_TYPE_STRING_[MODEL_PCD_FIXED_AT_BUILD],
+                    self._PCD_TYPE_STRING_[MODEL_PCD_PATCHABLE_IN_MODULE]]:
+            InitByteValue, CApp = self.GenerateInitializeFunc(self.SkuIdMgr.SystemSkuId, TAB_DEFAULT_STORES_DEFAULT, Pcd, InitByteValue, CApp)
+            InitByteValue, CApp =  self.GenerateModuleScopeInitializeFunc(self.SkuIdMgr.SystemSkuId,Pcd,InitByteValue,CApp)
+            EntryCode = EntryCode + '  Initialize_%s_%s_%s_%s();\n' % (self.SkuIdMgr.SystemSkuId, TAB_DEFAULT_STORES_DEFAULT, Pcd.TokenSpaceGuidCName, Pcd.TokenCName)
+            for ModuleGuid in Pcd.PcdFiledValueFromDscComponent:
+                EntryCode += "  Initialize_%s_%s_%s_%s();\n" % (ModuleGuid,TAB_DEFAULT_STORES_DEFAULT ,Pcd.TokenSpaceGuidCName, Pcd.TokenCName)
+        else:
+            for SkuName in self.SkuIdMgr.SkuOverrideOrder():
+                if SkuName not in Pcd.SkuOverrideValues:
+                    continue
+                for DefaultStoreName in Pcd.DefaultStoreName:
+                    InitByteValue, CApp = self.GenerateInitializeFunc(SkuName, DefaultStoreName, Pcd, InitByteValue, CApp)
+            for SkuName in self.SkuIdMgr.SkuOverrideOrder():
+                if SkuName not in self.SkuIdMgr.AvailableSkuIdSet:
+                    continue
+                for DefaultStoreName in Pcd.SkuOverrideValues[SkuName]:
+                    EntryCode = EntryCode + '  Initialize_%s_%s_%s_%s();\n' % (SkuName, DefaultStoreName, Pcd.TokenSpaceGuidCName, Pcd.TokenCName)
+        return ArrayCode, CApp, InitByteValue, EntryCode
+
+    ## Build and run the C application calculating the values of the given structure PCDs
+    #
+    #   @retval list    The lines of tool output
+    #
+    def RunPcdValueTool(self, StructuredPcds, PcdCode, PcdNameList, IncludeFiles, MakeFileName, MakeApp):
+        CApp = PcdMainCHeader
+        for IncludeFile in IncludeFiles:
+            CApp = CApp + '#include <%s>\n' % (IncludeFile)
+        CApp = CApp + '\n'
+        for PcdName in StructuredPcds:
+            if PcdName in PcdNameList:
+                CApp = CApp + PcdCode[PcdName][0]
+        InitByteValue = ""
+        for PcdName in PcdNameList:
+            CApp = CApp + PcdCode[PcdName][1]
+            InitByteValue = InitByteValue + PcdCode[PcdName][2]
+
+        CApp = CApp + 'VOID\n'
+        CApp = CApp + 'PcdEntryPoint(\n'
+        CApp = CApp + '  VOID\n'
+        CApp = CApp + '  )\n'
+        CApp = CApp + '{\n'
+        for PcdName in StructuredPcds:
+            if PcdName in PcdNameList:
+                CApp = CApp + PcdCode[PcdName][3]
+        CApp = CApp + '}\n'
+
+        CApp = CApp + PcdMainCEntry + '\n'
+
+        if not os.path.exists(self.OutputPath):
+            os.makedirs(self.OutputPath)
+        CAppBaseFileName = os.path.join(self.OutputPath, PcdValueInitName)
+        SaveFileOnChange(CAppBaseFileName + '.c', CApp, False)
         SaveFileOnChange(MakeFileName, MakeApp, False)
 
         # start generating input file
@@ -3046,13 +3130,7 @@ def GenerateByteArrayValue (self, StructuredPcds):
         File = open (OutputValueFile, 'r')
         FileBuffer = File.readlines()
         File.close()
-
-        StructurePcdSet = []
-        for Pcd in FileBuffer:
-            PcdValue = Pcd.split ('|')
-            PcdInfo = PcdValue[0].split ('.')
-            StructurePcdSet.append((PcdInfo[0], PcdInfo[1], PcdInfo[2], PcdInfo[3], PcdValue[2].strip()))
-        return StructurePcdSet
+        return FileBuffer
 
     @staticmethod
     def NeedUpdateOutput(OutputFile, ValueCFile, StructureInput):
@@ -0,0 +1,109 @@
+## @file
+# This file is used to keep the parsed meta-file tables across build invocations
+#
+# SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+
+##
+# Import Modules
+#
+from __future__ import absolute_import
+import os
+from hashlib import md5
+
+import edk2basetools.Common.GlobalData as GlobalData
+from edk2basetools.Common.LongFilePathSupport import OpenLongFilePath as open
+from edk2basetools.Common.PersistentStore import LoadStore, SaveStore
+
+## Persistent cache of raw meta-file tables
+#
+#   The raw records of every INF/DEC/DSC file parsed in a build are saved in a
+# single file at the end of the build, and loaded in bulk at the first lookup
+# of the next one. A record set is reused only if the file size and time stamp
+# are unchanged (or the content digest still matches) and the global macros
+# are the same as the ones active when the file was parsed.
+#
+# @param CacheFile          Path of the cache file
+#
+class MetaFileCache(object):
+    # bump it whenever the layout of table records changes
+    _VERSION_ = 1
+
+    def __init__(self, CacheFile):
+        self.CacheFile = CacheFile
+        self._Entries = None
+        self._Restored = set()
+        self._Stamps = {}
+
+    ## Load all entries saved by previous build
+    def _Load(self):
+        self._Entries = LoadStore(self.CacheFile, self._VERSION_, "meta-file cache") or {}
+
+    @staticmethod
+    def _Macros():
+        return tuple(sorted(GlobalData.gGlobalDefines.items()))
+
+    @staticmethod
+    def _Digest(FilePath):
+        with open(FilePath, 'rb') as Fd:
+            return md5(Fd.read()).hexdigest()
+
+    ## Fill the table with records from cache
+    #
+    # @param Table:      MetaFileTable object which has not been filled yet
+    #
+    # @retval True       The table has been restored from cache
+    # @retval False      No valid cache for the file
+    #
+    def Restore(self, Table):
+        if self._Entries is None:
+            self._Load()
+        FilePath = Table.MetaFile.Path
+        try:
+            Stat = os.stat(FilePath)
+        except OSError:
+            return False
+        # remember the state of file before parsing, in case it's changed during build
+        self._Stamps[FilePath] = (Stat.st_size, Stat.st_mtime_ns)
+        Entry = self._Entries.get(FilePath)
+        if Entry is None:
+            return False
+        FileType, Size, MTime, Digest, Macros, RecordList = Entry
+        if FileType != type(Table).__name__ or Macros != self._Macros() or Stat.st_size != Size:
+            return False
+        if Stat.st_mtime_ns != MTime and self._Digest(FilePath) != Digest:
+            return False
+        Table.Restore(RecordList)
+        self._Restored.add(FilePath)
+        return True
+
+    ## Save the tables to cache file
+    #
+    #   Tables restored from cache are kept as they are, tables changed after
+    # parsing (e.g. component disabled by FILE_GUID override) are not saved.
+    #
+    # @param TableList:  MetaFileTable objects of the files parsed in this build
+    #
+    def Save(self, TableList):
+        if self._Entries is None:
+            self._Load()
+        Macros = self._Macros()
+        Updated = False
+        for Table in TableList:
+            FilePath = Table.MetaFile.Path
+            if FilePath in self._Restored or not Table.IsIntegrity():
+                continue
+            RecordList = [list(Record) for Record in Table.CurrentContent[:-1]]
+            if any(Record[-1] < 0 for Record in RecordList):
+                continue
+            try:
+                Stat = os.stat(FilePath)
+                if self._Stamps.get(FilePath) != (Stat.st_size, Stat.st_mtime_ns):
+                    continue
+                Digest = self._Digest(FilePath)
+            except OSError:
+                continue
+            self._Entries[FilePath] = (type(Table).__name__, Stat.st_size, Stat.st_mtime_ns, Digest, Macros, RecordList)
+            Updated = True
+        if Updated:
+            SaveStore(self.CacheFile, self._VERSION_, self._Entries, "meta-file cache")
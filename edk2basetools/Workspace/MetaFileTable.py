@@ -10,6 +10,9 @@
 #
 from __future__ import absolute_import
 import uuid
+from array import array
+from collections import defaultdict
+from sys import intern
 
 import edk2basetools.Common.EdkLogger as EdkLogger
 from edk2basetools.Common.BuildToolError import FORMAT_INVALID
@@ -18,10 +21,83 @@
                                       MODEL_FILE_OTHERS
 from edk2basetools.Common.DataType import *
 
+## Compact storage of table records
+#
+#   Records are kept column by column instead of one list per record: integer
+# columns in typed arrays, and string columns in lists of interned strings so
+# that repeated values like 'COMMON' are stored once. It supports the list
+# operations tables and parsers use, and a record is read or changed through
+# a RecordView.
+#
+#   @param      ColumnTypes     Type of each column, array type code or 's' for string
+#
+class RecordStore(object):
+    def __init__(self, ColumnTypes):
+        self.Columns = [[] if Type == 's' else array(Type) for Type in ColumnTypes]
+        self._Appenders = [(Column.append, Type == 's') for Column, Type in zip(self.Columns, ColumnTypes)]
+        self._Length = 0
+
+    def append(self, Record):
+        for (Append, IsString), Value in zip(self._Appenders, Record):
+            Append(intern(Value) if IsString else Value)
+        self._Length += 1
+
+    def __len__(self):
+        return self._Length
+
+    def __getitem__(self, Index):
+        if isinstance(Index, slice):
+            return [RecordView(self, Item) for Item in range(*Index.indices(self._Length))]
+        if Index < 0:
+            Index += self._Length
+        if Index < 0 or Index >= self._Length:
+            raise IndexError("record index out of range")
+        return RecordView(self, Index)
+
+    def __iter__(self):
+        for Index in range(self._Length):
+            yield RecordView(self, Index)
+
+    ## Get the values of given columns for each record, as a list of lists
+    def Select(self, IndexList, ColumnList):
+        Columns = [self.Columns[Column] for Column in ColumnList]
+        return [[Values[Index] for Values in Columns] for Index in IndexList]
+
+## One record in RecordStore, which can be used like the list of column values
+class RecordView(object):
+    __slots__ = ('_Columns', '_Index')
+
+    def __init__(self, Store, Index):
+        self._Columns = Store.Columns
+        self._Index = Index
+
+    def __getitem__(self, Column):
+        if isinstance(Column, slice):
+            return [Values[self._Index] for Values in self._Columns[Column]]
+        return self._Columns[Column][self._Index]
+
+    def __setitem__(self, Column, Value):
+        self._Columns[Column][self._Index] = Value
+
+    def __len__(self):
+        return len(self._Columns)
+
+    def __iter__(self):
+        for Values in self._Columns:
+            yield Values[self._Index]
+
+    def __eq__(self, Other):
+        return list(self) == list(Other)
+
+    def __repr__(self):
+        return repr(list(self))
+
 class MetaFileTable():
     # TRICK: use file ID as the part before '.'
     _ID_STEP_ = 1
     _ID_MAX_ = 99999999
+    # column types of RecordStore, no compact storage if it's empty
+    _COLUMN_TYPE_ = ''
 
     ## Constructor
     def __init__(self, DB, MetaFile, FileType, Temporary, FromItem=None):
@@ -30,7 +106,15 @@ def __init__(self, DB, MetaFile, FileType, Temporary, FromItem=None):
         self.DB = DB
         self._NumpyTab = None
 
-        self.CurrentContent = []
+        if self._COLUMN_TYPE_:
+            self.CurrentContent = RecordStore(self._COLUMN_TYPE_)
+        else:
+            self.CurrentContent = []
+        # indexes of records in CurrentContent, to avoid scanning the whole table for each query
+        self._ModelIndex = defaultdict(list)    # Model : [index]
+        self._ScopeIndex = defaultdict(list)    # (Model, Scope1) : [index]
+        self._OwnerIndex = defaultdict(list)    # BelongsToItem : [index]
+        self._IdIndex = {}                      # ID : index
         DB.TblFile.append([MetaFile.Name,
                         MetaFile.Ext,
                         MetaFile.Dir,
@@ -61,9 +145,59 @@ def IsIntegrity(self):
     def SetEndFlag(self):
         self.CurrentContent.append(self._DUMMY_)
 
+    ## Append a record to table and update the indexes
+    def _AddRecord(self, Record):
+        Index = len(self.CurrentContent)
+        self.CurrentContent.append(Record)
+        self._ModelIndex[Record[1]].append(Index)
+        self._ScopeIndex[(Record[1], Record[5])].append(Index)
+        Owner = Record[self._OWNER_COLUMN_]
+        if Owner >= 0:
+            self._OwnerIndex[Owner].append(Index)
+        self._IdIndex[Record[0]] = Index
+
+    ## Get the records of given Model, using the index which gives the least records
+    #
+    # @param Model:          The Model of Record
+    # @param Scope1:         Arch of Record, None or COMMON for all
+    # @param BelongsToItem:  The owner of Record, None or -1 for all
+    #
+    # @retval:       Indexes of the records in CurrentContent, in the order of insertion
+    #
+    def _GetCandidates(self, Model, Scope1=None, BelongsToItem=None):
+        Columns = self.CurrentContent.Columns
+        if Scope1 is not None and Scope1 != TAB_ARCH_COMMON:
+            ArchList = {TAB_ARCH_COMMON, Scope1}
+        else:
+            ArchList = None
+        if BelongsToItem is not None and BelongsToItem >= 0:
+            return [Index for Index in self._OwnerIndex.get(BelongsToItem, [])
+                    if Columns[1][Index] == Model and (ArchList is None or Columns[5][Index] in ArchList)]
+        if ArchList is None:
+            return self._ModelIndex.get(Model, [])
+        IndexList = self._ScopeIndex.get((Model, TAB_ARCH_COMMON), []) + self._ScopeIndex.get((Model, Scope1), [])
+        IndexList.sort()
+        return IndexList
+
     def GetAll(self):
         return [item for item in self.CurrentContent if item[0] >= 0 and item[-1]>=0]
 
+    ## Re-insert records of a file parsed in a previous build
+    #
+    #   Record IDs are re-generated by Insert() so that they are unique in the
+    # current database, and the owner IDs are remapped accordingly.
+    #
+    # @param RecordList:     Records in the layout of CurrentContent, without end flag
+    #
+    def Restore(self, RecordList):
+        IdMapping = {-1:-1}
+        OwnerIndex = self._OWNER_COLUMN_ - 1
+        for Record in RecordList:
+            ValueList = Record[1:]
+            ValueList[OwnerIndex] = IdMapping.get(ValueList[OwnerIndex], ValueList[OwnerIndex])
+            IdMapping[Record[0]] = self.Insert(*ValueList)
+        self.SetEndFlag()
+
 ## Python class representation of table storing module data
 class ModuleTable(MetaFileTable):
     _COLUMN_ = '''
@@ -83,6 +217,9 @@ class ModuleTable(MetaFileTable):
         '''
     # used as table end flag, in case the changes to database is not committed to db file
     _DUMMY_ = [-1, -1, '====', '====', '====', '====', '====', -1, -1, -1, -1, -1, -1]
+    # column index of BelongsToItem
+    _OWNER_COLUMN_ = 7
+    _COLUMN_TYPE_ = 'qlsssssqllllb'
 
     ## Constructor
     def __init__(self, Db, MetaFile, Temporary):
@@ -125,7 +262,7 @@ def Insert(self, Model, Value1, Value2, Value3, Scope1=TAB_ARCH_COMMON, Scope2=T
                 EndColumn,
                 Enabled
             ]
-        self.CurrentContent.append(row)
+        self._AddRecord(row)
         return self.ID
 
     ## Query table
@@ -138,24 +275,18 @@ def Insert(self, Model, Value1, Value2, Value3, Scope1=TAB_ARCH_COMMON, Scope2=T
     #
     def Query(self, Model, Arch=None, Platform=None, BelongsToItem=None):
 
-        QueryTab = self.CurrentContent
-        result = [item for item in QueryTab if item[1] == Model and item[-1]>=0 ]
-
-        if Arch is not None and Arch != TAB_ARCH_COMMON:
-            ArchList = set(['COMMON'])
-            ArchList.add(Arch)
-            result = [item for item in result if item[5] in ArchList]
+        Columns = self.CurrentContent.Columns
+        result = [Index for Index in self._GetCandidates(Model, Arch, BelongsToItem) if Columns[-1][Index]>=0 ]
 
         if Platform is not None and Platform != TAB_COMMON:
             Platformlist = set( ['COMMON','DEFAULT'])
             Platformlist.add(Platform)
-            result = [item for item in result if item[6] in Platformlist]
+            result = [Index for Index in result if Columns[6][Index] in Platformlist]
 
         if BelongsToItem is not None:
-            result = [item for item in result if item[7] == BelongsToItem]
+            result = [Index for Index in result if Columns[7][Index] == BelongsToItem]
 
-        result = [ [r[2],r[3],r[4],r[5],r[6],r[0],r[8]] for r in result ]
-        return result
+        return self.CurrentContent.Select(result, (2, 3, 4, 5, 6, 0, 8))
 
 ## Python class representation of table storing package data
 class PackageTable(MetaFileTable):
@@ -176,10 +307,18 @@ class PackageTable(MetaFileTable):
         '''
     # used as table end flag, in case the changes to database is not committed to db file
     _DUMMY_ = [-1, -1, '====', '====', '====', '====', '====', -1, -1, -1, -1, -1, -1]
+    # column index of BelongsToItem
+    _OWNER_COLUMN_ = 7
+    _COLUMN_TYPE_ = 'qlsssssqllllb'
 
     ## Constructor
     def __init__(self, Cursor, MetaFile, Temporary):
         MetaFileTable.__init__(self, Cursor, MetaFile, MODEL_FILE_DEC, Temporary)
+        self._PcdIndex = defaultdict(list)      # (TokenSpaceGuid, PcdCName) : [index]
+
+    def _AddRecord(self, Record):
+        MetaFileTable._AddRecord(self, Record)
+        self._PcdIndex[(Record[3], Record[4])].append(len(self.CurrentContent) - 1)
 
     ## Insert table
     #
@@ -217,7 +356,7 @@ def Insert(self, Model, Value1, Value2, Value3, Scope1=TAB_ARCH_COMMON, Scope2=T
                 EndColumn,
                 Enabled
             ]
-        self.CurrentContent.append(row)
+        self._AddRecord(row)
         return self.ID
 
     ## Query table
@@ -229,20 +368,14 @@ def Insert(self, Model, Value1, Value2, Value3, Scope1=TAB_ARCH_COMMON, Scope2=T
     #
     def Query(self, Model, Arch=None):
 
-        QueryTab = self.CurrentContent
-        result = [item for item in QueryTab if item[1] == Model and item[-1]>=0 ]
+        Columns = self.CurrentContent.Columns
+        result = [Index for Index in self._GetCandidates(Model, Arch) if Columns[-1][Index]>=0 ]
 
-        if Arch is not None and Arch != TAB_ARCH_COMMON:
-            ArchList = set(['COMMON'])
-            ArchList.add(Arch)
-            result = [item for item in result if item[5] in ArchList]
-
-        return [[r[2], r[3], r[4], r[5], r[6], r[0], r[8]] for r in result]
+        return self.CurrentContent.Select(result, (2, 3, 4, 5, 6, 0, 8))
 
     def GetValidExpression(self, TokenSpaceGuid, PcdCName):
 
-        QueryTab = self.CurrentContent
-        result = [[item[2], item[8]] for item in QueryTab if item[3] == TokenSpaceGuid and item[4] == PcdCName]
+        result = self.CurrentContent.Select(self._PcdIndex.get((TokenSpaceGuid, PcdCName), []), (2, 8))
         validateranges = []
         validlists = []
         expressions = []
@@ -297,6 +430,9 @@ class PlatformTable(MetaFileTable):
         '''
     # used as table end flag, in case the changes to database is not committed to db file
     _DUMMY_ = [-1, -1, '====', '====', '====', '====', '====','====', -1, -1, -1, -1, -1, -1, -1]
+    # column index of BelongsToItem
+    _OWNER_COLUMN_ = 8
+    _COLUMN_TYPE_ = 'qlssssssqqllllb'
 
     ## Constructor
     def __init__(self, Cursor, MetaFile, Temporary, FromItem=0):
@@ -341,7 +477,7 @@ def Insert(self, Model, Value1, Value2, Value3, Scope1=TAB_ARCH_COMMON, Scope2=T
                 EndColumn,
                 Enabled
             ]
-        self.CurrentContent.append(row)
+        self._AddRecord(row)
         return self.ID
 
 
@@ -357,12 +493,8 @@ def Insert(self, Model, Value1, Value2, Value3, Scope1=TAB_ARCH_COMMON, Scope2=T
     #
     def Query(self, Model, Scope1=None, Scope2=None, BelongsToItem=None, FromItem=None):
 
-        QueryTab = self.CurrentContent
-        result = [item for item in QueryTab if item[1] == Model and item[-1]>0 ]
-        if Scope1 is not None and Scope1 != TAB_ARCH_COMMON:
-            Sc1 = set(['COMMON'])
-            Sc1.add(Scope1)
-            result = [item for item in result if item[5] in Sc1]
+        Columns = self.CurrentContent.Columns
+        result = [Index for Index in self._GetCandidates(Model, Scope1, BelongsToItem) if Columns[-1][Index]>0 ]
         Sc2 = set( ['COMMON','DEFAULT'])
         if Scope2 and Scope2 != TAB_COMMON:
             if '.' in Scope2:
@@ -370,22 +502,24 @@ def Query(self, Model, Scope1=None, Scope2=None, BelongsToItem=None, FromItem=No
                 NewScope = TAB_COMMON + Scope2[Index:]
                 Sc2.add(NewScope)
             Sc2.add(Scope2)
-            result = [item for item in result if item[6] in Sc2]
+            result = [Index for Index in result if Columns[6][Index] in Sc2]
 
         if BelongsToItem is not None:
-            result = [item for item in result if item[8] == BelongsToItem]
+            result = [Index for Index in result if Columns[8][Index] == BelongsToItem]
         else:
-            result = [item for item in result if item[8] < 0]
+            result = [Index for Index in result if Columns[8][Index] < 0]
         if FromItem is not None:
-            result = [item for item in result if item[9] == FromItem]
+            result = [Index for Index in result if Columns[9][Index] == FromItem]
 
-        result = [ [r[2],r[3],r[4],r[5],r[6],r[7],r[0],r[10]] for r in result ]
-        return result
+        return self.CurrentContent.Select(result, (2, 3, 4, 5, 6, 7, 0, 10))
 
     def DisableComponent(self,comp_id):
-        for item in self.CurrentContent:
-            if item[0] == comp_id or item[8] == comp_id:
-                item[-1] = -1
+        IndexList = list(self._OwnerIndex.get(comp_id, []))
+        if comp_id in self._IdIndex:
+            IndexList.append(self._IdIndex[comp_id])
+        Enabled = self.CurrentContent.Columns[-1]
+        for Index in IndexList:
+            Enabled[Index] = -1
 
 ## Factory class to produce different storage for different type of meta-file
 class MetaFileStorage(object):
@@ -14,10 +14,12 @@
 from edk2basetools.Common.DataType import *
 from edk2basetools.Common.Misc import *
 from types import *
+import edk2basetools.Common.GlobalData as GlobalData
 
 from .MetaDataTable import *
 from .MetaFileTable import *
 from .MetaFileParser import *
+from .MetaFileCache import MetaFileCache
 
 from edk2basetools.Workspace.DecBuildData import DecBuildData
 from edk2basetools.Workspace.DscBuildData import DscBuildData
@@ -112,12 +114,17 @@ def CreateBuildObject(self,FilePath, Arch, Target, Toolchain):
             if FileType not in self._GENERATOR_:
                 return None
 
+            # reuse the records parsed in previous build if they're still valid
+            Table = MetaFileStorage(self.WorkspaceDb, FilePath, FileType)
+            if self.WorkspaceDb.MetaFileCache and not Table.IsIntegrity():
+                self.WorkspaceDb.MetaFileCache.Restore(Table)
+
             # get the parser ready for this file
             MetaFile = self._FILE_PARSER_[FileType](
                                 FilePath,
                                 FileType,
                                 Arch,
-                                MetaFileStorage(self.WorkspaceDb, FilePath, FileType)
+                                Table
                                 )
             # always do post-process, in case of macros change
             MetaFile.DoPostProcess()
@@ -153,12 +160,28 @@ def __init__(self):
         self.TblDataModel = DataClass.MODEL_LIST
         self.TblFile = []
         self.Platform = None
+        self._MetaFileCache = None
 
         # conversion object for build or file format conversion purpose
         self.BuildObject = WorkspaceDatabase.BuildObjectFactory(self)
         self.TransformObject = WorkspaceDatabase.TransformObjectFactory(self)
 
 
+    ## Persistent cache of parsed meta-files, None if it's not enabled
+    @property
+    def MetaFileCache(self):
+        if self._MetaFileCache is None and GlobalData.gMetaFileCache:
+            self._MetaFileCache = MetaFileCache(GlobalData.gMetaFileCache)
+        return self._MetaFileCache
+
+    ## Save the meta-files parsed in this build for later builds
+    def SaveMetaFileCache(self):
+        if not self.MetaFileCache:
+            return
+        TableList = [Table for (Path, FileType, Temporary, FromItem), Table in MetaFileStorage._ObjectCache.items()
+                     if not Temporary and FileType in self.BuildObjectFactory._GENERATOR_]
+        self.MetaFileCache.Save(TableList)
+
     ## Summarize all packages in the database
     def GetPackageList(self, Platform, Arch, TargetName, ToolChainTag):
         self.Platform = Platform
@@ -22,11 +22,14 @@
 import subprocess
 import threading
 import json
+import filecmp
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
 from edk2basetools.Common import EdkLogger
 from edk2basetools.Common.Misc import SaveFileOnChange
+from edk2basetools.Common.Misc import CreateDirectory
 from edk2basetools.Common.Misc import GuidStructureByteArrayToGuidString
 from edk2basetools.Common.Misc import GuidStructureStringToGuidString
 from edk2basetools.Common.BuildToolError import FILE_WRITE_FAILURE
@@ -44,6 +47,7 @@
 from edk2basetools.Common.Expression import *
 from edk2basetools.GenFds.AprioriSection import DXE_APRIORI_GUID, PEI_APRIORI_GUID
 from edk2basetools.AutoGen.IncludesAutoGen import IncludesAutoGen
+from edk2basetools.Eot.DispatchGraph import DispatchGraph
 
 ## Pattern to extract contents in EDK DXS files
 gDxsDependencyPattern = re.compile(r"DEPENDENCY_START(.+)DEPENDENCY_END", re.DOTALL)
@@ -124,8 +128,14 @@
 ## The look up table of the supported opcode in the dependency expression binaries
 gOpCodeList = ["BEFORE", "AFTER", "PUSH", "AND", "OR", "NOT", "TRUE", "FALSE", "END", "SOR"]
 
+## Usages of PPIs/Protocols in INF files telling they are produced by module
+gProducedUsages = {"PRODUCES", "PRODUCED", "ALWAYS_PRODUCES", "ALWAYS_PRODUCED", "SOMETIMES_PRODUCES",
+                   "SOMETIMES_PRODUCED", "BY_START"}
+
 ## Save VPD Pcd
 VPDPcdList = []
+## VPD Pcd found by the thread generating a module section, merged into VPDPcdList in module order
+gModuleVPDPcd = threading.local()
 
 ##
 # Writes a string to the file object.
@@ -229,7 +239,6 @@ def FindIncludeFiles(Source, IncludePathList, IncludeFiles):
 #
 def FileLinesSplit(Content=None, MaxLength=None):
     ContentList = Content.split(TAB_LINE_BREAK)
-    NewContent = ''
     NewContentList = []
     for Line in ContentList:
         while len(Line.rstrip()) > MaxLength:
@@ -244,13 +253,59 @@ def FileLinesSplit(Content=None, MaxLength=None):
             Line = Line[LineBreakIndex:]
         if Line:
             NewContentList.append(Line)
-    for NewLine in NewContentList:
-        NewContent += NewLine + TAB_LINE_BREAK
+    NewContent = ''.join(NewLine + TAB_LINE_BREAK for NewLine in NewContentList)
 
     NewContent = NewContent.replace(gEndOfLine, TAB_LINE_BREAK).replace('\r\r\n', gEndOfLine)
     return NewContent
 
+## Report file written section by section
+#
+#  FileWrite() appends the strings of a section to the writer. Flush() splits
+#  the long lines of the section and writes it to a temporary file, which
+#  replaces the report file at last if its content is changed.
+#
+#  @param      FileName          The file name to save report file
+#
+class ReportFileWriter(object):
+    def __init__(self, FileName):
+        self.FileName = FileName
+        self._TempFile = "%s.%d.tmp" % (FileName, os.getpid())
+        CreateDirectory(os.path.dirname(FileName))
+        self._Fd = open(self._TempFile, "w")
+        self._Buffer = []
+
+    def append(self, String):
+        self._Buffer.append(String)
+
+    def extend(self, StringList):
+        self._Buffer.extend(StringList)
+
+    ## Write the strings appended so far, ending with a line break, to file
+    def Flush(self):
+        if self._Buffer:
+            self._Fd.write(FileLinesSplit(''.join(self._Buffer), gLineMaxLength))
+            self._Buffer = []
+
+    ## Close the file and replace the report file if its content is changed
+    #
+    #  @retval     True              The report file is replaced
+    #
+    def Close(self):
+        try:
+            self.Flush()
+        finally:
+            self._Fd.close()
+        if os.path.isfile(self.FileName) and filecmp.cmp(self._TempFile, self.FileName, shallow=False):
+            os.remove(self._TempFile)
+            return False
+        os.replace(self._TempFile, self.FileName)
+        return True
 
+    ## Close the file and remove it, keeping the report file untouched
+    def Discard(self):
+        self._Fd.close()
+        if os.path.exists(self._TempFile):
+            os.remove(self._TempFile)
 
 ##
 # Parse binary dependency expression section
@@ -608,6 +663,62 @@ def __init__(self, M, ReportType):
             self.BuildFlagsReport = BuildFlagsReport(M)
 
 
+    ##
+    # Get the SHA1 hash of module image rebased at zero
+    #
+    # The hash is saved along with the digest of the image, so that GenFw is
+    # not run again as long as the image is unchanged.
+    #
+    # @param self                   The object pointer
+    # @param OutputDir              The output directory of module
+    # @param EfiFile                The module image
+    #
+    # @retval str                   The hex digest of the rebased image
+    # @retval 0                     The rebased image is not generated
+    #
+    def _GetImageHash(self, OutputDir, EfiFile):
+        HashFile = os.path.join(OutputDir, self.ModuleName + ".efi.sha1")
+        Digest = None
+        if GlobalData.gFileHashStore is not None:
+            Digest = GlobalData.gFileHashStore.Digest(EfiFile)
+        if Digest and os.path.isfile(HashFile):
+            try:
+                with open(HashFile) as Fd:
+                    SavedDigest, Hash = Fd.read().split()
+                if SavedDigest == Digest:
+                    return Hash
+            except (IOError, ValueError):
+                pass
+
+        Hash = 0
+        Tempfile = os.path.join(OutputDir, self.ModuleName + "_hash.tmp")
+        # rebase the efi image since its base address may not zero
+        cmd = ["GenFw", "--rebase", str(0), "-o", Tempfile, EfiFile]
+        try:
+            PopenObject = subprocess.Popen(' '.join(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
+        except Exception as X:
+            EdkLogger.error("GenFw", COMMAND_FAILURE, ExtraData="%s: %s" % (str(X), cmd[0]))
+        EndOfProcedure = threading.Event()
+        EndOfProcedure.clear()
+        if PopenObject.stderr:
+            StdErrThread = threading.Thread(target=ReadMessage, args=(PopenObject.stderr, EdkLogger.quiet, EndOfProcedure))
+            StdErrThread.setName("STDERR-Redirector")
+            StdErrThread.setDaemon(False)
+            StdErrThread.start()
+        # waiting for program exit
+        PopenObject.wait()
+        if PopenObject.stderr:
+            StdErrThread.join()
+        if PopenObject.returncode != 0:
+            EdkLogger.error("GenFw", COMMAND_FAILURE, "Failed to generate firmware hash image for %s" % (EfiFile))
+        if os.path.isfile(Tempfile):
+            with open(Tempfile, 'rb') as Fd:
+                Hash = hashlib.sha1(Fd.read()).hexdigest()
+            os.remove(Tempfile)
+            if Digest:
+                SaveFileOnChange(HashFile, "%s %s\n" % (Digest, Hash), False)
+        return Hash
+
     ##
     # Generate report for module information
     #
@@ -642,33 +753,7 @@ def GenerateReport(self, File, GlobalPcdReport, GlobalPredictionReport, GlobalDe
             OutputDir = os.path.join(self._BuildDir, "OUTPUT")
             DefaultEFIfile = os.path.join(OutputDir, self.ModuleName + ".efi")
             if os.path.isfile(DefaultEFIfile):
-                Tempfile = os.path.join(OutputDir, self.ModuleName + "_hash.tmp")
-                # rebase the efi image since its base address may not zero
-                cmd = ["GenFw", "--rebase", str(0), "-o", Tempfile, DefaultEFIfile]
-                try:
-                    PopenObject = subprocess.Popen(' '.join(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
-                except Exception as X:
-                    EdkLogger.error("GenFw", COMMAND_FAILURE, ExtraData="%s: %s" % (str(X), cmd[0]))
-                EndOfProcedure = threading.Event()
-                EndOfProcedure.clear()
-                if PopenObject.stderr:
-                    StdErrThread = threading.Thread(target=ReadMessage, args=(PopenObject.stderr, EdkLogger.quiet, EndOfProcedure))
-                    StdErrThread.setName("STDERR-Redirector")
-                    StdErrThread.setDaemon(False)
-                    StdErrThread.start()
-                # waiting for program exit
-                PopenObject.wait()
-                if PopenObject.stderr:
-                    StdErrThread.join()
-                if PopenObject.returncode != 0:
-                    EdkLogger.error("GenFw", COMMAND_FAILURE, "Failed to generate firmware hash image for %s" % (DefaultEFIfile))
-                if os.path.isfile(Tempfile):
-                    self.Hash = hashlib.sha1()
-                    buf = open(Tempfile, 'rb').read()
-                    if self.Hash.update(buf):
-                        self.Hash = self.Hash.update(buf)
-                    self.Hash = self.Hash.hexdigest()
-                    os.remove(Tempfile)
+                self.Hash = self._GetImageHash(OutputDir, DefaultEFIfile)
 
         FileWrite(File, "Module Summary")
         FileWrite(File, "Module Name:          %s" % self.ModuleName)
@@ -1442,17 +1527,20 @@ def PrintPcdValue(self, File, Pcd, PcdTokenCName, TypeName, IsStructure, DscMatc
                     if TypeName in ('DYNVPD', 'DEXVPD'):
                         FileWrite(File, '%*s' % (self.MaxLen + 4, SkuInfo.VpdOffset))
                         VPDPcdItem = (Pcd.TokenSpaceGuidCName + '.' + PcdTokenCName, SkuIdName, SkuInfo.VpdOffset, Pcd.MaxDatumSize, SkuInfo.DefaultValue)
-                        if VPDPcdItem not in VPDPcdList:
+                        FoundVPDPcdList = getattr(gModuleVPDPcd, 'List', None)
+                        if FoundVPDPcdList is None:
+                            FoundVPDPcdList = VPDPcdList
+                        if VPDPcdItem not in FoundVPDPcdList:
                             PcdGuidList = self.UnusedPcds.get(Pcd.TokenSpaceGuidCName)
                             if PcdGuidList:
                                 PcdList = PcdGuidList.get(Pcd.Type)
                                 if not PcdList:
-                                    VPDPcdList.append(VPDPcdItem)
+                                    FoundVPDPcdList.append(VPDPcdItem)
                                 for VpdPcd in PcdList:
                                     if PcdTokenCName == VpdPcd.TokenCName:
                                         break
                                 else:
-                                    VPDPcdList.append(VPDPcdItem)
+                                    FoundVPDPcdList.append(VPDPcdItem)
                     if IsStructure:
                         FiledOverrideFlag = False
                         OverrideValues = Pcd.SkuOverrideValues.get(Sku)
@@ -1548,57 +1636,38 @@ class PredictionReport(object):
     def __init__(self, Wa):
         self._MapFileName = os.path.join(Wa.BuildDir, Wa.Name + ".map")
         self._MapFileParsed = False
-        self._EotToolInvoked = False
+        self._ExecutionOrderPredicted = False
         self._FvDir = Wa.FvDir
-        self._EotDir = Wa.BuildDir
         self._FfsEntryPoint = {}
-        self._GuidMap = {}
-        self._SourceList = []
+        self._ModuleInfo = {}
+        self._DispatchGraph = DispatchGraph()
         self.FixedMapDict = {}
         self.ItemList = []
         self.MaxLen = 0
 
         #
-        # Collect all platform reference source files and GUID C Name
+        # Collect the PPIs/Protocols produced by all platform modules, which
+        # are declared in their INF files and the ones of their libraries
         #
         for Pa in Wa.AutoGenObjectList:
-            for Module in Pa.LibraryAutoGenList + Pa.ModuleAutoGenList:
-                #
-                # BASE typed modules are EFI agnostic, so we need not scan
-                # their source code to find PPI/Protocol produce or consume
-                # information.
-                #
-                if Module.ModuleType == SUP_MODULE_BASE:
+            for Module in Pa.ModuleAutoGenList:
+                if not Module.Guid:
                     continue
-                #
-                # Add module referenced source files
-                #
-                self._SourceList.append(str(Module))
-                IncludeList = {}
-                for Source in Module.SourceFileList:
-                    if os.path.splitext(str(Source))[1].lower() == ".c":
-                        self._SourceList.append("  " + str(Source))
-                        FindIncludeFiles(Source.Path, Module.IncludePathList, IncludeList)
-                for IncludeFile in IncludeList.values():
-                    self._SourceList.append("  " + IncludeFile)
-
-                for Guid in Module.PpiList:
-                    self._GuidMap[Guid] = GuidStructureStringToGuidString(Module.PpiList[Guid])
-                for Guid in Module.ProtocolList:
-                    self._GuidMap[Guid] = GuidStructureStringToGuidString(Module.ProtocolList[Guid])
-                for Guid in Module.GuidList:
-                    self._GuidMap[Guid] = GuidStructureStringToGuidString(Module.GuidList[Guid])
+                ModuleDataList = [Module.Module] + list(Module.DependentLibraryList)
+                PpiList = self._GetProducedGuids(Module.PpiList, [Data.PpiComments for Data in ModuleDataList])
+                ProtocolList = self._GetProducedGuids(Module.ProtocolList, [Data.ProtocolComments for Data in ModuleDataList])
+                self._DispatchGraph.AddModule(Module.Guid, PpiList, ProtocolList)
+                self._ModuleInfo[Module.Guid.upper()] = (Module.Name, Module.MetaFile.Path)
 
-                if Module.Guid and not Module.IsLibrary:
-                    EntryPoint = " ".join(Module.Module.ModuleEntryPointList)
+                EntryPoint = " ".join(Module.Module.ModuleEntryPointList)
 
-                    RealEntryPoint = "_ModuleEntryPoint"
+                RealEntryPoint = "_ModuleEntryPoint"
 
-                    self._FfsEntryPoint[Module.Guid.upper()] = (EntryPoint, RealEntryPoint)
+                self._FfsEntryPoint[Module.Guid.upper()] = (EntryPoint, RealEntryPoint)
 
 
         #
-        # Collect platform firmware volume list as the input of EOT.
+        # Collect platform firmware volume list to predict the execution order in.
         #
         self._FvList = []
         if Wa.FdfProfile:
@@ -1649,17 +1718,39 @@ def _ParseMapFile(self):
                 EdkLogger.warn(None, "Cannot open file to read", self._MapFileName)
 
     ##
-    # Invokes EOT tool to get the predicted the execution order.
+    # Get the GUID values of PPIs/Protocols produced by a module
+    #
+    # @param GuidDict        The dict of PPI/Protocol C names to GUID values
+    # @param CommentsList    The dicts of PPI/Protocol C names to usage comments
+    #                        of the module and its libraries
+    #
+    @staticmethod
+    def _GetProducedGuids(GuidDict, CommentsList):
+        GuidList = []
+        for Comments in CommentsList:
+            for CName in Comments:
+                if CName not in GuidDict:
+                    continue
+                for Comment in Comments[CName]:
+                    Usages = Comment.replace('#', ' ').split()
+                    if set(Usages) & gProducedUsages:
+                        GuidList.append(GuidStructureStringToGuidString(GuidDict[CName]))
+                        break
+        return GuidList
+
+    ##
+    # Predict the execution order.
     #
-    # This function invokes EOT tool to calculate the predicted dispatch order
+    # This function parses the platform firmware volumes and simulates the
+    # dispatch of FFS files, with the PPIs/Protocols produced by modules.
     #
     # @param self:           The object pointer
     #
-    def _InvokeEotTool(self):
-        if self._EotToolInvoked:
+    def _PredictExecutionOrder(self):
+        if self._ExecutionOrderPredicted:
             return
 
-        self._EotToolInvoked = True
+        self._ExecutionOrderPredicted = True
         FvFileList = []
         for FvName in self._FvList:
             FvFile = os.path.join(self._FvDir, FvName + ".Fv")
@@ -1668,51 +1759,33 @@ def _InvokeEotTool(self):
 
         if len(FvFileList) == 0:
             return
-        #
-        # Write source file list and GUID file list to an intermediate file
-        # as the input for EOT tool and dispatch List as the output file
-        # from EOT tool.
-        #
-        SourceList = os.path.join(self._EotDir, "SourceFile.txt")
-        GuidList = os.path.join(self._EotDir, "GuidList.txt")
-        DispatchList = os.path.join(self._EotDir, "Dispatch.txt")
-
-        TempFile = []
-        for Item in self._SourceList:
-            FileWrite(TempFile, Item)
-        SaveFileOnChange(SourceList, "".join(TempFile), False)
-        TempFile = []
-        for Key in self._GuidMap:
-            FileWrite(TempFile, "%s %s" % (Key, self._GuidMap[Key]))
-        SaveFileOnChange(GuidList, "".join(TempFile), False)
 
         try:
-            from Eot.EotMain import Eot
-
-            #
-            # Invoke EOT tool and echo its runtime performance
-            #
-            EotStartTime = time.time()
-            Eot(CommandLineOption=False, SourceFileList=SourceList, GuidList=GuidList,
-                FvFileList=' '.join(FvFileList), Dispatch=DispatchList, IsInit=True)
-            EotEndTime = time.time()
-            EotDuration = time.strftime("%H:%M:%S", time.gmtime(int(round(EotEndTime - EotStartTime))))
-            EdkLogger.quiet("EOT run time: %s\n" % EotDuration)
-
-            #
-            # Parse the output of EOT tool
-            #
-            for Line in open(DispatchList):
-                if len(Line.split()) < 4:
+            from edk2basetools.Eot.EotMain import MultipleFv
+
+            StartTime = time.time()
+            Fv = MultipleFv(FvFileList)
+            Fv.Dispatch(Graph=self._DispatchGraph)
+            EndTime = time.time()
+            Duration = time.strftime("%H:%M:%S", time.gmtime(int(round(EndTime - StartTime))))
+            EdkLogger.quiet("Execution order prediction time: %s\n" % Duration)
+
+            for FfsObj in list(Fv.OrderedFfsDict.values()) + list(Fv.UnDispatchedFfsDict.values()):
+                if FfsObj.Type in [0x04, 0x06]:
+                    Phase = "P"
+                elif FfsObj.Type in [0x05, 0x07, 0x08, 0x0A]:
+                    Phase = "D"
+                else:
                     continue
-                (Guid, Phase, FfsName, FilePath) = Line.split()
+                Guid = FfsObj.Guid.upper()
+                FfsName, FilePath = self._ModuleInfo.get(Guid, ('Unknown-Module', Guid))
                 Symbol = self._FfsEntryPoint.get(Guid, [FfsName, ""])[0]
                 if len(Symbol) > self.MaxLen:
                     self.MaxLen = len(Symbol)
                 self.ItemList.append((Phase, Symbol, FilePath))
         except:
             EdkLogger.quiet("(Python %s on %s\n%s)" % (platform.python_version(), sys.platform, traceback.format_exc()))
-            EdkLogger.warn(None, "Failed to generate execution order prediction report, for some error occurred in executing EOT.")
+            EdkLogger.warn(None, "Failed to generate execution order prediction report, for some error occurred in parsing firmware volumes.")
 
 
     ##
@@ -1724,7 +1797,7 @@ def _InvokeEotTool(self):
     # @param File            The file object for report
     #
     def _GenerateExecutionOrderReport(self, File):
-        self._InvokeEotTool()
+        self._PredictExecutionOrder()
         if len(self.ItemList) == 0:
             return
         FileWrite(File, gSectionStart)
@@ -2199,8 +2272,9 @@ def __init__(self, Wa, MaList, ReportType):
     # @param MakeTime        The total time of Make Phase
     # @param GenFdsTime      The total time of GenFds Phase
     # @param ReportType      The kind of report items in the final report file
+    # @param ThreadNumber    The number of threads generating module sections
     #
-    def GenerateReport(self, File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, ReportType):
+    def GenerateReport(self, File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, ReportType, ThreadNumber=1):
         FileWrite(File, "Platform Summary")
         FileWrite(File, "Platform Name:        %s" % self.PlatformName)
         FileWrite(File, "Platform DSC Path:    %s" % self.PlatformDscPath)
@@ -2238,13 +2312,44 @@ def GenerateReport(self, File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime,
                 for FdReportListItem in self.FdReportList:
                     FdReportListItem.GenerateReport(File)
 
-        for ModuleReportItem in self.ModuleReportList:
-            ModuleReportItem.GenerateReport(File, self.PcdReport, self.PredictionReport, self.DepexParser, ReportType)
+        File.Flush()
+
+        #
+        # Module sections are generated concurrently and written in order as
+        # soon as they are ready. The map file is parsed in advance since the
+        # fixed address of modules are shared. The VPD PCDs found in module
+        # sections are merged in the same order.
+        #
+        if "FIXED_ADDRESS" in ReportType:
+            self.PredictionReport._ParseMapFile()
+        with ThreadPoolExecutor(max_workers=max(ThreadNumber, 1)) as Pool:
+            for Section, ModuleVPDPcdList in Pool.map(lambda Item: self._GenerateModuleReport(Item, ReportType), self.ModuleReportList):
+                File.extend(Section)
+                File.Flush()
+                VPDPcdList.extend(VPDPcdItem for VPDPcdItem in ModuleVPDPcdList if VPDPcdItem not in VPDPcdList)
 
         if not self._IsModuleBuild:
             if "EXECUTION_ORDER" in ReportType:
                 self.PredictionReport.GenerateReport(File, None)
 
+    ##
+    # Generate the section of a module into a list of its own
+    #
+    # @param self            The object pointer
+    # @param ModuleReportItem The module report object
+    # @param ReportType      The kind of report items in the final report file
+    #
+    # @retval tuple          (the strings of the module section, the VPD PCDs found in it)
+    #
+    def _GenerateModuleReport(self, ModuleReportItem, ReportType):
+        Section = []
+        gModuleVPDPcd.List = []
+        try:
+            ModuleReportItem.GenerateReport(Section, self.PcdReport, self.PredictionReport, self.DepexParser, ReportType)
+            return Section, gModuleVPDPcd.List
+        finally:
+            gModuleVPDPcd.List = None
+
 ## BuildReport class
 #
 #  This base class contain the routines to collect data and then
@@ -2297,25 +2402,30 @@ def AddPlatformReport(self, Wa, MaList=None):
     # @param AutoGenTime     The total time of AutoGen phase
     # @param MakeTime        The total time of Make phase
     # @param GenFdsTime      The total time of GenFds phase
+    # @param ThreadNumber    The number of threads generating module sections
     #
-    def GenerateReport(self, BuildDuration, AutoGenTime, MakeTime, GenFdsTime):
+    def GenerateReport(self, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, ThreadNumber=1):
         if self.ReportFile:
+            File = None
             try:
 
                 if "COMPILE_INFO" in self.ReportType:
                     self.GenerateCompileInfo()
 
-                File = []
+                File = ReportFileWriter(self.ReportFile)
                 for (Wa, MaList) in self.ReportList:
-                    PlatformReport(Wa, MaList, self.ReportType).GenerateReport(File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, self.ReportType)
-                Content = FileLinesSplit(''.join(File), gLineMaxLength)
-                SaveFileOnChange(self.ReportFile, Content, False)
+                    PlatformReport(Wa, MaList, self.ReportType).GenerateReport(File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, self.ReportType, ThreadNumber)
+                File.Close()
+                File = None
                 EdkLogger.quiet("Build report can be found at %s" % os.path.abspath(self.ReportFile))
             except IOError:
                 EdkLogger.error(None, FILE_WRITE_FAILURE, ExtraData=self.ReportFile)
             except:
                 EdkLogger.error("BuildReport", CODE_ERROR, "Unknown fatal error when generating build report", ExtraData=self.ReportFile, RaiseError=False)
                 EdkLogger.quiet("(Python %s on %s\n%s)" % (platform.python_version(), sys.platform, traceback.format_exc()))
+            finally:
+                if File is not None:
+                    File.Discard()
 
 
     ##
@@ -22,8 +22,10 @@
 import time
 import platform
 import traceback
+import heapq
 import multiprocessing
-from threading import Thread,Event,BoundedSemaphore
+from threading import Thread,Event
+from concurrent.futures import ThreadPoolExecutor
 import threading
 from linecache import getlines
 from subprocess import Popen,PIPE, STDOUT
@@ -33,8 +35,11 @@
 from edk2basetools.AutoGen.ModuleAutoGen import ModuleAutoGen
 from edk2basetools.AutoGen.WorkspaceAutoGen import WorkspaceAutoGen
 from edk2basetools.AutoGen.AutoGenWorker import AutoGenWorkerInProcess,AutoGenManager,\
-    LogAgent
+    LogAgent,PutModuleBatches
 from edk2basetools.AutoGen import GenMake
+from edk2basetools.AutoGen.FileHashStore import FileHashStore, HASH_ALGORITHMS
+from edk2basetools.AutoGen.BinaryCache import CollectGarbage
+from edk2basetools.AutoGen.IncludeGraph import IncludeGraph
 from edk2basetools.Common import Misc as Utils
 
 from edk2basetools.Common.TargetTxtClassObject import TargetTxtDict
@@ -43,6 +48,7 @@
 from edk2basetools.Common.Misc import PathClass,SaveFileOnChange,RemoveDirectory
 from edk2basetools.Common.StringUtils import NormPath
 from edk2basetools.Common.MultipleWorkspace import MultipleWorkspace as mws
+from edk2basetools.Common.PersistentStore import LoadStore, SaveStore
 from edk2basetools.Common.BuildToolError import *
 from edk2basetools.Common.DataType import *
 import edk2basetools.Common.EdkLogger as EdkLogger
@@ -398,133 +404,185 @@ def __init__(self, Obj, BuildCommand, Target):
 # scheduling thread running, catching thread error, monitor the thread status, etc.
 #
 class BuildTask:
-    # queue for tasks waiting for schedule
+    # queue for tasks waiting for their dependencies
     _PendingQueue = OrderedDict()
-    _PendingQueueLock = threading.Lock()
 
-    # queue for tasks ready for running
-    _ReadyQueue = OrderedDict()
-    _ReadyQueueLock = threading.Lock()
+    # heap of tasks ready for running, the longest critical path first
+    _ReadyQueue = []
 
     # queue for run tasks
     _RunningQueue = OrderedDict()
-    _RunningQueueLock = threading.Lock()
 
     # queue containing all build tasks, in case duplicate build
     _TaskQueue = OrderedDict()
 
+    # condition protecting all queues and dependency counters. It's notified
+    # when a task is added or completed, or when the build is to be ended.
+    _QueueCondition = threading.Condition()
+
+    # sequence number keeping tasks of the same priority in order of arrival
+    _TaskSequence = 0
+
     # flag indicating error occurs in a running thread
     _ErrorFlag = threading.Event()
     _ErrorFlag.clear()
     _ErrorMessage = ""
 
-    # BoundedSemaphore object used to control the number of running threads
-    _Thread = None
+    # the number of build threads still running
+    _ThreadNumber = 0
+
+    # pool generating the hash chains of built modules, off the build threads
+    _HashPool = None
+    _HashThreadNumber = 1
+
+    # build time of each task in previous builds, in seconds
+    _BUILD_TIME_VERSION_ = 1
+    _BuildTimeFile = None
+    _BuildTimeHistory = {}
 
     # flag indicating if the scheduler is started or not
     _SchedulerStopped = threading.Event()
     _SchedulerStopped.set()
 
-    ## Start the task scheduler thread
+    ## Start the build threads
     #
     #   @param  MaxThreadNumber     The maximum thread number
     #   @param  ExitFlag            Flag used to end the scheduler
     #
     @staticmethod
     def StartScheduler(MaxThreadNumber, ExitFlag):
-        SchedulerThread = Thread(target=BuildTask.Scheduler, args=(MaxThreadNumber, ExitFlag))
-        SchedulerThread.name = "Build-Task-Scheduler"
-        SchedulerThread.daemon = False
-        SchedulerThread.start()
-        # wait for the scheduler to be started, especially useful in Linux
-        while not BuildTask.IsOnGoing():
-            time.sleep(0.01)
+        BuildTask._SchedulerStopped.clear()
+        BuildTask._ThreadNumber = MaxThreadNumber
+        BuildTask._HashThreadNumber = MaxThreadNumber
+        for Index in range(MaxThreadNumber):
+            BuildThread = Thread(target=BuildTask.Scheduler, args=(ExitFlag,))
+            BuildThread.name = "build thread %d" % Index
+            BuildThread.daemon = False
+            BuildThread.start()
 
-    ## Scheduler method
+    ## Scheduler method run by each build thread
+    #
+    #   A build thread takes the ready task of the longest critical path, runs
+    # it, and then wakes up the threads waiting for the tasks depending on it.
+    # It exits when no pending/ready/running task is left and it's indicated to
+    # do so, or there's error in running thread.
     #
-    #   @param  MaxThreadNumber     The maximum thread number
     #   @param  ExitFlag            Flag used to end the scheduler
     #
     @staticmethod
-    def Scheduler(MaxThreadNumber, ExitFlag):
-        BuildTask._SchedulerStopped.clear()
+    def Scheduler(ExitFlag):
         try:
-            # use BoundedSemaphore to control the maximum running threads
-            BuildTask._Thread = BoundedSemaphore(MaxThreadNumber)
+            while True:
+                with BuildTask._QueueCondition:
+                    Bt = BuildTask._NextTask(ExitFlag)
+                    if Bt is None:
+                        break
+                    BuildTask._RunningQueue[Bt.BuildItem] = Bt
+                Bt.Run()
+        except BaseException as X:
             #
-            # scheduling loop, which will exits when no pending/ready task and
-            # indicated to do so, or there's error in running thread
+            # TRICK: hide the output of threads left running, so that the user can
+            #        catch the error message easily
             #
-            while (len(BuildTask._PendingQueue) > 0 or len(BuildTask._ReadyQueue) > 0 \
-                   or not ExitFlag.is_set()) and not BuildTask._ErrorFlag.is_set():
-                EdkLogger.debug(EdkLogger.DEBUG_8, "Pending Queue (%d), Ready Queue (%d)"
-                                % (len(BuildTask._PendingQueue), len(BuildTask._ReadyQueue)))
-
-                # get all pending tasks
-                BuildTask._PendingQueueLock.acquire()
-                BuildObjectList = list(BuildTask._PendingQueue.keys())
-                #
-                # check if their dependency is resolved, and if true, move them
-                # into ready queue
-                #
-                for BuildObject in BuildObjectList:
-                    Bt = BuildTask._PendingQueue[BuildObject]
-                    if Bt.IsReady():
-                        BuildTask._ReadyQueue[BuildObject] = BuildTask._PendingQueue.pop(BuildObject)
-                BuildTask._PendingQueueLock.release()
-
-                # launch build thread until the maximum number of threads is reached
-                while not BuildTask._ErrorFlag.is_set():
-                    # empty ready queue, do nothing further
-                    if len(BuildTask._ReadyQueue) == 0:
-                        break
+            EdkLogger.SetLevel(EdkLogger.ERROR)
+            BuildTask._ErrorFlag.set()
+            BuildTask._ErrorMessage = "build thread scheduler error\n\t%s" % str(X)
 
-                    # wait for active thread(s) exit
-                    BuildTask._Thread.acquire(True)
+        with BuildTask._QueueCondition:
+            BuildTask._ThreadNumber -= 1
+            if BuildTask._ErrorFlag.is_set() and BuildTask._RunningQueue:
+                EdkLogger.verbose("Waiting for thread ending...(%d)" % len(BuildTask._RunningQueue))
+            LastThread = BuildTask._ThreadNumber == 0
+        if not LastThread:
+            return
 
-                    # start a new build thread
-                    Bo, Bt = BuildTask._ReadyQueue.popitem()
+        # the hash chains of all modules are needed once the build completes
+        if BuildTask._HashPool is not None:
+            BuildTask._HashPool.shutdown(wait=True)
+            BuildTask._HashPool = None
+        with BuildTask._QueueCondition:
+            BuildTask._PendingQueue.clear()
+            del BuildTask._ReadyQueue[:]
+            BuildTask._RunningQueue.clear()
+            BuildTask._TaskQueue.clear()
+            BuildTask._SchedulerStopped.set()
 
-                    # move into running queue
-                    BuildTask._RunningQueueLock.acquire()
-                    BuildTask._RunningQueue[Bo] = Bt
-                    BuildTask._RunningQueueLock.release()
+    ## Wait for a task ready for running
+    #
+    #   Must be called with _QueueCondition acquired.
+    #
+    #   @param  ExitFlag            Flag used to end the scheduler
+    #
+    #   @retval BuildTask           The task of the longest critical path
+    #   @retval None                The build thread should exit
+    #
+    @staticmethod
+    def _NextTask(ExitFlag):
+        while not BuildTask._ErrorFlag.is_set():
+            while BuildTask._ReadyQueue:
+                Priority, _, Bt = heapq.heappop(BuildTask._ReadyQueue)
+                # the critical path grows when tasks depending on this one are added later
+                if -Priority != Bt.CriticalPath:
+                    BuildTask._PushReady(Bt)
+                    continue
+                return Bt
+            if ExitFlag.is_set() and not BuildTask._PendingQueue and not BuildTask._RunningQueue:
+                BuildTask._QueueCondition.notify_all()
+                return None
+            BuildTask._QueueCondition.wait()
+        return None
 
-                    Bt.Start()
-                    # avoid tense loop
-                    time.sleep(0.01)
+    ## Put a task without uncompleted dependency into ready queue
+    #
+    #   Must be called with _QueueCondition acquired.
+    #
+    @staticmethod
+    def _PushReady(Bt):
+        BuildTask._TaskSequence += 1
+        heapq.heappush(BuildTask._ReadyQueue, (-Bt.CriticalPath, BuildTask._TaskSequence, Bt))
 
-                # avoid tense loop
-                time.sleep(0.01)
+    ## Generate the hash chains of a built module in hash pool
+    #
+    #   Must be called with _QueueCondition acquired.
+    #
+    #   @param  BuildObject     The ModuleAutoGen object built
+    #
+    @staticmethod
+    def _SubmitHash(BuildObject):
+        if BuildTask._HashPool is None:
+            BuildTask._HashPool = ThreadPoolExecutor(max_workers=BuildTask._HashThreadNumber)
+        BuildTask._HashPool.submit(BuildTask._GenHash, BuildObject)
 
-            # wait for all running threads exit
-            if BuildTask._ErrorFlag.is_set():
-                EdkLogger.quiet("\nWaiting for all build threads exit...")
-            # while not BuildTask._ErrorFlag.is_set() and \
-            while len(BuildTask._RunningQueue) > 0:
-                EdkLogger.verbose("Waiting for thread ending...(%d)" % len(BuildTask._RunningQueue))
-                EdkLogger.debug(EdkLogger.DEBUG_8, "Threads [%s]" % ", ".join(Th.name for Th in threading.enumerate()))
-                # avoid tense loop
-                time.sleep(0.1)
+    ## Generate the hash chains of a built module
+    #
+    #   @param  BuildObject     The ModuleAutoGen object built
+    #
+    @staticmethod
+    def _GenHash(BuildObject):
+        try:
+            # Run hash operation post dependency to account for libs
+            # Run if --hash or --binary-destination
+            if GlobalData.gUseHashCache and not GlobalData.gBinCacheSource:
+                BuildObject.GenModuleHash()
+            if GlobalData.gBinCacheDest:
+                BuildObject.GenCMakeHash()
         except BaseException as X:
-            #
-            # TRICK: hide the output of threads left running, so that the user can
-            #        catch the error message easily
-            #
+            if not BuildTask._ErrorFlag.is_set():
+                GlobalData.gBuildingModule = "%s [%s, %s, %s]" % (str(BuildObject), BuildObject.Arch,
+                                                                  BuildObject.ToolChain, BuildObject.BuildTarget)
             EdkLogger.SetLevel(EdkLogger.ERROR)
             BuildTask._ErrorFlag.set()
-            BuildTask._ErrorMessage = "build thread scheduler error\n\t%s" % str(X)
-
-        BuildTask._PendingQueue.clear()
-        BuildTask._ReadyQueue.clear()
-        BuildTask._RunningQueue.clear()
-        BuildTask._TaskQueue.clear()
-        BuildTask._SchedulerStopped.set()
+            BuildTask._ErrorMessage = "hash chain generation broken\n    %s" % str(X)
+            with BuildTask._QueueCondition:
+                BuildTask._QueueCondition.notify_all()
 
     ## Wait for all running method exit
     #
     @staticmethod
     def WaitForComplete():
+        # wake up the build threads to check the exit and error flags
+        with BuildTask._QueueCondition:
+            BuildTask._QueueCondition.notify_all()
         BuildTask._SchedulerStopped.wait()
 
     ## Check if the scheduler is running or not
@@ -558,29 +616,64 @@ def HasError():
     def GetErrorMessage():
         return BuildTask._ErrorMessage
 
+    ## Load the build time of tasks in previous builds
+    #
+    #   @param  BuildTimeFile   The file keeping the build time
+    #
+    @staticmethod
+    def LoadBuildTime(BuildTimeFile):
+        BuildTask._BuildTimeFile = BuildTimeFile
+        BuildTask._BuildTimeHistory = LoadStore(BuildTimeFile, BuildTask._BUILD_TIME_VERSION_, "build time") or {}
+
+    ## Save the build time of tasks for next build
+    #
+    @staticmethod
+    def SaveBuildTime():
+        if not BuildTask._BuildTimeFile or not BuildTask._BuildTimeHistory:
+            return
+        SaveStore(BuildTask._BuildTimeFile, BuildTask._BUILD_TIME_VERSION_, BuildTask._BuildTimeHistory, "build time")
+
+    ## The key of a build item in the build time history
+    @staticmethod
+    def _BuildTimeKey(BuildItem):
+        return (repr(BuildItem), BuildItem.BuildObject.BuildTarget, BuildItem.BuildObject.ToolChain, BuildItem.Target)
+
+    ## Estimate the build time of a build item
+    #
+    #   Without history, all tasks cost the same so that the critical path is
+    #   the longest chain of dependency.
+    #
+    @staticmethod
+    def _EstimateCost(BuildItem):
+        return BuildTask._BuildTimeHistory.get(BuildTask._BuildTimeKey(BuildItem), 1.0)
+
     ## Factory method to create a BuildTask object
     #
     #   This method will check if a module is building or has been built. And if
     #   true, just return the associated BuildTask object in the _TaskQueue. If
     #   not, create and return a new BuildTask object. The new BuildTask object
-    #   will be appended to the _PendingQueue for scheduling later.
+    #   will be appended to the _PendingQueue, or to the _ReadyQueue if all its
+    #   dependencies have been completed.
     #
     #   @param  BuildItem       A BuildUnit object representing a build object
     #   @param  Dependency      The dependent build object of BuildItem
     #
     @staticmethod
     def New(BuildItem, Dependency=None):
-        if BuildItem in BuildTask._TaskQueue:
-            Bt = BuildTask._TaskQueue[BuildItem]
-            return Bt
-
-        Bt = BuildTask()
-        Bt._Init(BuildItem, Dependency)
-        BuildTask._TaskQueue[BuildItem] = Bt
-
-        BuildTask._PendingQueueLock.acquire()
-        BuildTask._PendingQueue[BuildItem] = Bt
-        BuildTask._PendingQueueLock.release()
+        with BuildTask._QueueCondition:
+            if BuildItem in BuildTask._TaskQueue:
+                Bt = BuildTask._TaskQueue[BuildItem]
+                return Bt
+
+            Bt = BuildTask()
+            Bt._Init(BuildItem, Dependency)
+            BuildTask._TaskQueue[BuildItem] = Bt
+
+            if Bt.IsReady():
+                BuildTask._PushReady(Bt)
+                BuildTask._QueueCondition.notify()
+            else:
+                BuildTask._PendingQueue[BuildItem] = Bt
 
         return Bt
 
@@ -593,52 +686,63 @@ def _Init(self, BuildItem, Dependency=None):
         self.BuildItem = BuildItem
 
         self.DependencyList = []
+        # tasks depending on this one, and the number of uncompleted tasks this one depends on
+        self.DependentList = []
+        self.RemainingDependency = 0
+        # build time of this task, and of the longest chain of tasks starting from it
+        self.Cost = BuildTask._EstimateCost(BuildItem)
+        self.CriticalPath = self.Cost
+        # flag indicating build completes, used to avoid unnecessary re-build
+        self.CompleteFlag = False
         if Dependency is None:
             Dependency = BuildItem.Dependency
         else:
             Dependency.extend(BuildItem.Dependency)
         self.AddDependency(Dependency)
-        # flag indicating build completes, used to avoid unnecessary re-build
-        self.CompleteFlag = False
 
     ## Check if all dependent build tasks are completed or not
     #
     def IsReady(self):
-        ReadyFlag = True
-        for Dep in self.DependencyList:
-            if Dep.CompleteFlag == True:
-                continue
-            ReadyFlag = False
-            break
-
-        return ReadyFlag
+        return self.RemainingDependency == 0
 
     ## Add dependent build task
     #
     #   @param  Dependency      The list of dependent build objects
     #
     def AddDependency(self, Dependency):
-        for Dep in Dependency:
-            if not Dep.BuildObject.IsBinaryModule and not Dep.BuildObject.CanSkipbyCache(GlobalData.gModuleCacheHit):
-                self.DependencyList.append(BuildTask.New(Dep))    # BuildTask list
-
-    ## The thread wrapper of LaunchCommand function
-    #
-    # @param  Command               A list or string contains the call of the command
-    # @param  WorkingDir            The directory in which the program will be running
-    #
-    def _CommandThread(self, Command, WorkingDir):
+        with BuildTask._QueueCondition:
+            for Dep in Dependency:
+                if not Dep.BuildObject.IsBinaryModule and not Dep.BuildObject.CanSkipbyCache(GlobalData.gModuleCacheHit):
+                    DepTask = BuildTask.New(Dep)
+                    self.DependencyList.append(DepTask)    # BuildTask list
+                    DepTask.DependentList.append(self)
+                    if not DepTask.CompleteFlag:
+                        self.RemainingDependency += 1
+                    DepTask._RaiseCriticalPath(self.CriticalPath)
+
+    ## Extend the critical path of this task and the ones it depends on
+    #
+    #   @param  DependentPath   The critical path of a task depending on this one
+    #
+    def _RaiseCriticalPath(self, DependentPath):
+        TaskList = [(self, DependentPath)]
+        while TaskList:
+            Bt, Path = TaskList.pop()
+            Path += Bt.Cost
+            if Path > Bt.CriticalPath:
+                Bt.CriticalPath = Path
+                TaskList.extend((Dep, Path) for Dep in Bt.DependencyList)
+
+    ## Run the build command of the task in current build thread
+    #
+    def Run(self):
+        EdkLogger.quiet("Building ... %s" % repr(self.BuildItem))
+        Command = self.BuildItem.BuildCommand + [self.BuildItem.Target]
+        WorkingDir = self.BuildItem.WorkingDir
+        BeginTime = time.time()
         try:
             self.BuildItem.BuildObject.BuildTime = LaunchCommand(Command, WorkingDir,self.BuildItem.BuildObject)
-            self.CompleteFlag = True
-
-            # Run hash operation post dependency to account for libs
-            # Run if --hash or --binary-destination
-            if GlobalData.gUseHashCache and not GlobalData.gBinCacheSource:
-                self.BuildItem.BuildObject.GenModuleHash()
-            if GlobalData.gBinCacheDest:
-                self.BuildItem.BuildObject.GenCMakeHash()
-
+            Completed = True
         except:
             #
             # TRICK: hide the output of threads left running, so that the user can
@@ -654,22 +758,21 @@ def _CommandThread(self, Command, WorkingDir):
             BuildTask._ErrorFlag.set()
             BuildTask._ErrorMessage = "%s broken\n    %s [%s]" % \
                                       (threading.current_thread().name, Command, WorkingDir)
-
-        # indicate there's a thread is available for another build task
-        BuildTask._RunningQueueLock.acquire()
-        BuildTask._RunningQueue.pop(self.BuildItem)
-        BuildTask._RunningQueueLock.release()
-        BuildTask._Thread.release()
-
-    ## Start build task thread
-    #
-    def Start(self):
-        EdkLogger.quiet("Building ... %s" % repr(self.BuildItem))
-        Command = self.BuildItem.BuildCommand + [self.BuildItem.Target]
-        self.BuildTread = Thread(target=self._CommandThread, args=(Command, self.BuildItem.WorkingDir))
-        self.BuildTread.name = "build thread"
-        self.BuildTread.daemon = False
-        self.BuildTread.start()
+            Completed = False
+
+        # release the tasks depending on this one, and wake up the build threads waiting for them
+        with BuildTask._QueueCondition:
+            BuildTask._RunningQueue.pop(self.BuildItem)
+            if Completed:
+                BuildTask._BuildTimeHistory[BuildTask._BuildTimeKey(self.BuildItem)] = time.time() - BeginTime
+                if (GlobalData.gUseHashCache and not GlobalData.gBinCacheSource) or GlobalData.gBinCacheDest:
+                    BuildTask._SubmitHash(self.BuildItem.BuildObject)
+                self.CompleteFlag = True
+                for Bt in self.DependentList:
+                    Bt.RemainingDependency -= 1
+                    if Bt.RemainingDependency == 0 and Bt.BuildItem in BuildTask._PendingQueue:
+                        BuildTask._PushReady(BuildTask._PendingQueue.pop(Bt.BuildItem))
+            BuildTask._QueueCondition.notify_all()
 
 ## The class contains the information related to EFI image
 #
@@ -750,15 +853,26 @@ def __init__(self, Target, WorkspaceDir, BuildOptions,log_q):
         GlobalData.gUseHashCache = BuildOptions.UseHashCache
         GlobalData.gBinCacheDest   = BuildOptions.BinCacheDest
         GlobalData.gBinCacheSource = BuildOptions.BinCacheSource
+        GlobalData.gHashAlgorithm = BuildOptions.HashAlgorithm
+        GlobalData.gCacheGc = BuildOptions.CacheGc
+        if BuildOptions.CacheSizeLimit is not None:
+            GlobalData.gCacheSizeLimit = BuildOptions.CacheSizeLimit * 1024 * 1024
         GlobalData.gEnableGenfdsMultiThread = not BuildOptions.NoGenfdsMultiThread
+        GlobalData.gEnableGenfdsInProcess = BuildOptions.GenfdsInProcess
         GlobalData.gDisableIncludePathCheck = BuildOptions.DisableIncludePathCheck
 
-        if GlobalData.gBinCacheDest and not GlobalData.gUseHashCache:
+        if (GlobalData.gCacheGc or GlobalData.gCacheSizeLimit is not None) and not GlobalData.gBinCacheDest:
+            EdkLogger.error("build", OPTION_NOT_SUPPORTED, ExtraData="--cache-gc and --cache-size-limit must be used together with --binary-destination.")
+
+        if GlobalData.gBinCacheDest and not GlobalData.gUseHashCache and not GlobalData.gCacheGc:
             EdkLogger.error("build", OPTION_NOT_SUPPORTED, ExtraData="--binary-destination must be used together with --hash.")
 
         if GlobalData.gBinCacheSource and not GlobalData.gUseHashCache:
             EdkLogger.error("build", OPTION_NOT_SUPPORTED, ExtraData="--binary-source must be used together with --hash.")
 
+        if GlobalData.gHashAlgorithm not in HASH_ALGORITHMS:
+            EdkLogger.error("build", OPTION_NOT_SUPPORTED, ExtraData="--hash-algorithm %s requires the xxhash module." % GlobalData.gHashAlgorithm)
+
         if GlobalData.gBinCacheDest and GlobalData.gBinCacheSource:
             EdkLogger.error("build", OPTION_NOT_SUPPORTED, ExtraData="--binary-destination can not be used together with --binary-source.")
 
@@ -783,6 +897,11 @@ def __init__(self, Target, WorkspaceDir, BuildOptions,log_q):
         GlobalData.gDatabasePath = os.path.normpath(os.path.join(GlobalData.gConfDirectory, GlobalData.gDatabasePath))
         if not os.path.exists(os.path.join(GlobalData.gConfDirectory, '.cache')):
             os.makedirs(os.path.join(GlobalData.gConfDirectory, '.cache'))
+        if not (BuildOptions.Reparse or BuildOptions.DisableCache or BuildOptions.CheckUsage):
+            GlobalData.gMetaFileCache = os.path.join(os.path.dirname(GlobalData.gDatabasePath), 'MetaFile.cache')
+        GlobalData.gFileHashCache = os.path.join(os.path.dirname(GlobalData.gDatabasePath), 'FileHash.cache')
+        GlobalData.gIncludeGraphFile = os.path.join(os.path.dirname(GlobalData.gDatabasePath), 'IncludeGraph.cache')
+        BuildTask.LoadBuildTime(os.path.join(os.path.dirname(GlobalData.gDatabasePath), 'BuildTime.cache'))
         self.Db = BuildDB
         self.BuildDatabase = self.Db.BuildObject
         self.Platform = None
@@ -843,7 +962,8 @@ def __init__(self, Target, WorkspaceDir, BuildOptions,log_q):
         GlobalData.gHashChainStatus = dict()
         GlobalData.gCMakeHashFile = dict()
         GlobalData.gModuleHashFile = dict()
-        GlobalData.gFileHashDict = dict()
+        GlobalData.gFileHashStore = FileHashStore(GlobalData.gFileHashCache, GlobalData.gHashAlgorithm)
+        GlobalData.gIncludeGraph = IncludeGraph(GlobalData.gIncludeGraphFile)
         GlobalData.gModuleAllCacheStatus = set()
         GlobalData.gModuleCacheHit = set()
 
@@ -880,6 +1000,9 @@ def StartAutoGen(self,mqueue, DataPipe,SkipAutoGen,PcdMaList,cqueue):
                         cqueue.put((PcdMa.MetaFile.Path, PcdMa.Arch, "MakeCache", False))
 
             self.AutoGenMgr.join()
+            ModuleTime = sorted(self.AutoGenMgr.ModuleTime.items(), key=lambda Item: Item[1], reverse=True)
+            for (ModulePath, Arch), Seconds in ModuleTime[:10]:
+                EdkLogger.verbose("AutoGen time %.3fs: %s [%s]" % (Seconds, ModulePath, Arch))
             rt = self.AutoGenMgr.Status
             err = 0
             if not rt:
@@ -1005,6 +1128,7 @@ def LoadConfiguration(self):
         self.ToolChainFamily = ToolChainFamily
 
         self.ThreadNumber   = ThreadNum()
+        GlobalData.gThreadNumber = self.ThreadNumber
     ## Initialize build configuration
     #
     #   This method will parse DSC file and merge the configurations from
@@ -1267,9 +1391,7 @@ def _BuildPa(self, Target, AutoGenObject, CreateDepsCodeFile=True, CreateDepsMak
         if Target not in ['clean', 'cleanlib', 'cleanall', 'run', 'fds']:
             # for target which must generate AutoGen code and makefile
             mqueue = mp.Queue()
-            for m in AutoGenObject.GetAllModuleInfo:
-                mqueue.put(m)
-            mqueue.put((None,None,None,None,None,None,None))
+            PutModuleBatches(mqueue, AutoGenObject.GetAllModuleInfo, AutoGenObject.GetModuleCost, self.ThreadNumber)
             AutoGenObject.DataPipe.DataContainer = {"CommandTarget": self.Target}
             AutoGenObject.DataPipe.DataContainer = {"Workspace_timestamp": AutoGenObject.Workspace._SrcTimeStamp}
             AutoGenObject.CreateLibModuelDirs()
@@ -2217,7 +2339,6 @@ def PerformAutoGen(self,BuildTarget,ToolChain):
             mqueue = mp.Queue()
             cqueue = mp.Queue()
             for m in Pa.GetAllModuleInfo:
-                mqueue.put(m)
                 module_file,module_root,module_path,module_basename,\
                     module_originalpath,module_arch,IsLib = m
                 Ma = ModuleAutoGen(Wa, PathClass(module_path, Wa), BuildTarget,\
@@ -2226,7 +2347,7 @@ def PerformAutoGen(self,BuildTarget,ToolChain):
             data_pipe_file = os.path.join(Pa.BuildDir, "GlobalVar_%s_%s.bin" % (str(Pa.Guid),Pa.Arch))
             Pa.DataPipe.dump(data_pipe_file)
 
-            mqueue.put((None,None,None,None,None,None,None))
+            PutModuleBatches(mqueue, Pa.GetAllModuleInfo, Pa.GetModuleCost, self.ThreadNumber)
             autogen_rt, errorcode = self.StartAutoGen(mqueue, Pa.DataPipe, self.SkipAutoGen, PcdMaList, cqueue)
 
             if not autogen_rt:
@@ -2491,6 +2612,9 @@ def Launch(self):
         self.PreMakeCacheHit = set()
         self.MakeCacheMiss = set()
         self.MakeCacheHit = set()
+        if GlobalData.gCacheGc:
+            CollectGarbage(GlobalData.gBinCacheDest, GlobalData.gCacheSizeLimit)
+            return
         if not self.ModuleFile:
             if not self.SpawnMode or self.Target not in ["", "all"]:
                 self.SpawnMode = False
@@ -2503,6 +2627,13 @@ def Launch(self):
 
         if self.Target == 'cleanall':
             RemoveDirectory(os.path.dirname(GlobalData.gDatabasePath), True)
+        else:
+            self.Db.SaveMetaFileCache()
+            BuildTask.SaveBuildTime()
+            GlobalData.gFileHashStore.Save()
+            GlobalData.gIncludeGraph.Save()
+            if GlobalData.gBinCacheDest and GlobalData.gCacheSizeLimit is not None:
+                CollectGarbage(GlobalData.gBinCacheDest, GlobalData.gCacheSizeLimit)
 
     def CreateAsBuiltInf(self):
         for Module in self.BuildModules:
@@ -2782,7 +2913,7 @@ def Main():
                 "You should use 'GCCNOLTO' instead of 'GCC49', and 'GCC' instead of 'GCC5'.")
 
         if not BuildError:
-            MyBuild.BuildReport.GenerateReport(BuildDurationStr, LogBuildTime(MyBuild.AutoGenTime), LogBuildTime(MyBuild.MakeTime), LogBuildTime(MyBuild.GenFdsTime))
+            MyBuild.BuildReport.GenerateReport(BuildDurationStr, LogBuildTime(MyBuild.AutoGenTime), LogBuildTime(MyBuild.MakeTime), LogBuildTime(MyBuild.GenFdsTime), MyBuild.ThreadNumber)
 
     EdkLogger.SetLevel(EdkLogger.QUIET)
     EdkLogger.quiet("\n- %s -" % Conclusion)
@@ -97,9 +97,14 @@ def GetOption(self):
         Parser.add_option("--pcd", action="append", dest="OptionPcd", help="Set PCD value by command line. Format: \"PcdName=Value\" ")
         Parser.add_option("-l", "--cmd-len", action="store", type="int", dest="CommandLength", help="Specify the maximum line length of build command. Default is 4096.")
         Parser.add_option("--hash", action="store_true", dest="UseHashCache", default=False, help="Enable hash-based caching during build process.")
+        Parser.add_option("--hash-algorithm", action="store", type="choice", choices=['md5', 'blake2b', 'xxh128'], dest="HashAlgorithm", default="md5",
+            help="Specify the digest algorithm of hash-based caching. Must be one of: [md5, blake2b, xxh128], xxh128 requires the xxhash module. Default is md5.")
         Parser.add_option("--binary-destination", action="store", type="string", dest="BinCacheDest", help="Generate a cache of binary files in the specified directory.")
         Parser.add_option("--binary-source", action="store", type="string", dest="BinCacheSource", help="Consume a cache of binary files from the specified directory.")
+        Parser.add_option("--cache-size-limit", action="store", type="int", dest="CacheSizeLimit", help="Specify the maximum size in MB of the cache of binary files specified by --binary-destination. The least recently used build results are evicted at the end of build.")
+        Parser.add_option("--cache-gc", action="store_true", dest="CacheGc", default=False, help="Remove unused files and evict the least recently used build results from the cache of binary files specified by --binary-destination, without building.")
         Parser.add_option("--genfds-multi-thread", action="store_true", dest="GenfdsMultiThread", default=True, help="Enable GenFds multi thread to generate ffs file.")
         Parser.add_option("--no-genfds-multi-thread", action="store_true", dest="NoGenfdsMultiThread", default=False, help="Disable GenFds multi thread to generate ffs file.")
+        Parser.add_option("--genfds-in-process", action="store_true", dest="GenfdsInProcess", default=False, help="Let GenFds generate the common sections and FFS files in process instead of calling GenSec and GenFfs. Experimental.")
         Parser.add_option("--disable-include-path-check", action="store_true", dest="DisableIncludePathCheck", default=False, help="Disable the include path check for outside of package.")
         self.BuildOption, self.BuildTarget = Parser.parse_args()
@@ -0,0 +1,91 @@
+# @file
+#  Unit tests of storing and restoring module build results in binary cache.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import edk2basetools.Common.GlobalData as GlobalData
+from edk2basetools.AutoGen import BinaryCache
+from edk2basetools.AutoGen.FileHashStore import FileHashStore
+
+
+class TestBinaryCache(unittest.TestCase):
+    def setUp(self):
+        # UPT replaces these functions of os module by hooks which don't take
+        # the arguments used by shutil, use the built-in ones of the platform
+        for name in ("chmod", "mkdir", "remove", "rmdir"):
+            patcher = mock.patch.object(os, name, getattr(sys.modules[os.name], name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.tmpdir = tempfile.mkdtemp()
+        self.saved_store = GlobalData.gFileHashStore
+        GlobalData.gFileHashStore = FileHashStore()
+        self.cache = os.path.join(self.tmpdir, "Cache")
+        self.source = self.write("Source", "Driver.c", "int Main (void) { return 0; }\n")
+        self.build_dir = os.path.join(self.tmpdir, "Build")
+        self.ffs_dir = os.path.join(self.tmpdir, "Ffs")
+        self.outputs = [("B", os.path.join("OUTPUT", "Driver.efi"), b"MZ driver"),
+                        ("B", "Driver.map", b"map"),
+                        ("F", "Driver.ffs", b"ffs")]
+
+    def tearDown(self):
+        GlobalData.gFileHashStore = self.saved_store
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, dir_name, name, content):
+        path = os.path.join(self.tmpdir, dir_name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(content, bytes) else "w") as fd:
+            fd.write(content)
+        return path
+
+    def output_dirs(self):
+        return {"B": self.build_dir, "F": self.ffs_dir}
+
+    def manifest(self):
+        # the build result is keyed by the hash of module inputs, as ModuleAutoGen does
+        digest = GlobalData.gFileHashStore.NewHash()
+        digest.update(GlobalData.gFileHashStore.Digest(self.source).encode("utf-8"))
+        return os.path.join(self.cache, "Driver", digest.hexdigest() + BinaryCache.MANIFEST_EXT)
+
+    def build(self):
+        file_list = []
+        for kind, relative_path, content in self.outputs:
+            path = self.write(self.output_dirs()[kind], relative_path, content)
+            file_list.append((kind, relative_path, path))
+        self.assertTrue(BinaryCache.SaveModuleFiles(self.cache, self.manifest(), file_list))
+
+    def test_store_and_restore(self):
+        self.build()
+        shutil.rmtree(self.build_dir)
+        shutil.rmtree(self.ffs_dir)
+        self.assertTrue(BinaryCache.RestoreModuleFiles(self.cache, self.manifest(), self.output_dirs()))
+        for kind, relative_path, content in self.outputs:
+            with open(os.path.join(self.output_dirs()[kind], relative_path), "rb") as fd:
+                self.assertEqual(fd.read(), content)
+
+    def test_changed_input(self):
+        self.build()
+        self.write("Source", "Driver.c", "int Main (void) { return 1; }\n")
+        self.assertFalse(BinaryCache.RestoreModuleFiles(self.cache, self.manifest(), self.output_dirs()))
+
+    def test_shared_blobs(self):
+        # the same output of two build results is kept once
+        self.build()
+        self.write("Source", "Driver.c", "int Main (void) { return 1; }\n")
+        self.build()
+        blobs = [name for root, dirs, files in os.walk(os.path.join(self.cache, BinaryCache.BLOB_DIR)) for name in files]
+        self.assertEqual(len(blobs), len(self.outputs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# @file
+#  Unit tests of the data pipe file mapped by AutoGen workers.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import os
+import shutil
+import tempfile
+import unittest
+
+from edk2basetools.AutoGen.DataPipe import MemoryDataPipe
+
+
+class TestDataPipe(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.pipe_file = os.path.join(self.tmpdir, "GlobalVar.bin")
+        pipe = MemoryDataPipe()
+        pipe.DataContainer = {"P_Info": {"Target": "DEBUG"}, "LogLevel": 20}
+        pipe.dump(self.pipe_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_load(self):
+        with MemoryDataPipe() as pipe:
+            pipe.load(self.pipe_file)
+            self.assertEqual(pipe.Get("LogLevel"), 20)
+            # the value set replaces the one not decoded yet
+            pipe.DataContainer = {"P_Info": {"Target": "RELEASE"}}
+            self.assertEqual(pipe.Get("P_Info"), {"Target": "RELEASE"})
+            self.assertEqual(pipe.DataContainer, {"P_Info": {"Target": "RELEASE"}, "LogLevel": 20})
+        self.assertIsNone(pipe.mapped_file)
+
+    def test_close(self):
+        pipe = MemoryDataPipe()
+        pipe.load(self.pipe_file)
+        pipe.close()
+        # the file can be written again once it's not mapped
+        os.remove(self.pipe_file)
+        self.assertIsNone(pipe.Get("LogLevel"))
+        pipe.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# @file
+#  Unit tests of searching the string tokens referenced by the source files
+#  of a module through the index shared by all modules.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import os
+import shutil
+import tempfile
+import unittest
+
+import edk2basetools.Common.GlobalData as GlobalData
+from edk2basetools.AutoGen import StrGather
+from edk2basetools.AutoGen.IncludeGraph import IncludeGraph
+from edk2basetools.Common.Misc import PathClass
+
+
+class UniObject(object):
+    def __init__(self):
+        self.Referenced = []
+
+    def SetStringReferenced(self, Name):
+        self.Referenced.append(Name)
+
+    def ReToken(self):
+        pass
+
+
+class TestStrGather(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.saved_graph = GlobalData.gIncludeGraph
+        GlobalData.gIncludeGraph = IncludeGraph(os.path.join(self.tmpdir, "IncludeGraph.cache"))
+        self.source = self.write("Driver.c", '#include "Driver.h"\n'
+                                             'Print (STRING_TOKEN (STR_HELLO));\n'
+                                             'HiiGetString (STRING_TOKEN(STR_NAME), STRING_TOKEN (STR_HELLO));\n')
+        self.uni = self.write("Driver.uni", '#string STR_UNUSED #language en-US "STRING_TOKEN(STR_UNUSED)"\n')
+
+    def tearDown(self):
+        GlobalData.gIncludeGraph = self.saved_graph
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w") as fd:
+            fd.write(content)
+        return path
+
+    def test_search_string(self):
+        sources = [PathClass(self.source), PathClass(self.uni), PathClass(os.path.join(self.tmpdir, "None.c"))]
+        file_list = StrGather.GetFileList(sources, [self.tmpdir], [".uni", ".inf"])
+        self.assertEqual(file_list, [self.source])
+        uni = StrGather.SearchString(UniObject(), file_list, False)
+        self.assertEqual(uni.Referenced, ["STR_HELLO", "STR_NAME"])
+        # the #include list is kept in the same entry
+        self.assertEqual(GlobalData.gIncludeGraph.GetIncludeList(self.source), ["Driver.h"])
+
+    def test_changed_file(self):
+        self.assertEqual(GlobalData.gIncludeGraph.GetStringTokenList(self.source), ("STR_HELLO", "STR_NAME"))
+        self.write("Driver.c", "Print (STRING_TOKEN (STR_BYE));\n")
+        self.assertEqual(GlobalData.gIncludeGraph.GetStringTokenList(self.source), ("STR_BYE",))
+
+
+if __name__ == '__main__':
+    unittest.main()
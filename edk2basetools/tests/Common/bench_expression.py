@@ -0,0 +1,107 @@
+# @file
+#  Micro-benchmark of the expression result cache: conditional directive and
+#  PCD value expressions evaluated with empty caches and with warm caches.
+#
+#  Usage:
+#    python bench_expression.py [--file <DscOrFdf> ...] [--expressions N]
+#
+#  Without --file, expressions shaped like the ones of a large platform DSC
+#  are generated. With --file (e.g. OvmfPkg/OvmfPkgX64.dsc OvmfPkg/OvmfPkgX64.fdf),
+#  the expressions of !if/!elseif directives of the given files are measured,
+#  against the macros defined in them.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import argparse
+import re
+import time
+
+from edk2basetools.Common.Expression import ValueExpression, gExpressionCache, gMacroReplaceCache
+
+gDirectivePattern = re.compile(r'^\s*!(?:if|elseif)\s+(.+?)\s*(?:#.*)?$', re.IGNORECASE)
+gDefinePattern = re.compile(r'^\s*(?:DEFINE\s+)?([A-Za-z_][\w]*)\s*=\s*(.*?)\s*(?:#.*)?$')
+
+
+## Gather the directive expressions and the macros of DSC/FDF files
+def GatherExpressions(FileList):
+    ExprList = []
+    Symbols = {'TARGET': 'DEBUG', 'TOOL_CHAIN_TAG': 'GCC5', 'ARCH': 'X64'}
+    for File in FileList:
+        with open(File, 'r', errors='ignore') as Fd:
+            for Line in Fd:
+                Match = gDirectivePattern.match(Line)
+                if Match:
+                    ExprList.append(Match.group(1))
+                    continue
+                Match = gDefinePattern.match(Line)
+                if Match and Match.group(1) not in Symbols:
+                    Symbols[Match.group(1)] = Match.group(2)
+    return ExprList, Symbols
+
+
+def GenerateExpressions(Count):
+    Symbols = {'TARGET': 'DEBUG', 'TOOL_CHAIN_TAG': 'GCC5', 'ARCH': 'IA32 X64'}
+    ExprList = []
+    for Index in range(Count // 4):
+        Symbols['FEATURE_%d_ENABLE' % Index] = 'TRUE' if Index % 2 else 'FALSE'
+        Symbols['gTokenSpaceGuid.PcdValue%d' % Index] = '0x%x' % Index
+    for Index in range(Count):
+        Feature = Index % max(Count // 4, 1)
+        Kind = Index % 4
+        if Kind == 0:
+            ExprList.append('$(FEATURE_%d_ENABLE) == TRUE' % Feature)
+        elif Kind == 1:
+            ExprList.append('$(TARGET) != "RELEASE" AND $(FEATURE_%d_ENABLE)' % Feature)
+        elif Kind == 2:
+            ExprList.append('gTokenSpaceGuid.PcdValue%d + 1 > 0x10' % Feature)
+        else:
+            ExprList.append('"X64" in $(ARCH) || $(TOOL_CHAIN_TAG) == "MSFT"')
+    return ExprList, Symbols
+
+
+def Evaluate(ExprList, Symbols):
+    Results = []
+    for Expr in ExprList:
+        try:
+            Results.append(ValueExpression(Expr, Symbols)(True))
+        except Exception as Exc:
+            Results.append(type(Exc).__name__)
+    return Results
+
+
+def Measure(ExprList, Symbols, Repeat, Cold):
+    Start = time.perf_counter()
+    for _ in range(Repeat):
+        if Cold:
+            gExpressionCache.Clear()
+            gMacroReplaceCache.Clear()
+        Results = Evaluate(ExprList, Symbols)
+    return time.perf_counter() - Start, Results
+
+
+def main():
+    Parser = argparse.ArgumentParser(description='Expression cache benchmark')
+    Parser.add_argument('--file', nargs='+', help='Measure the directive expressions of DSC/FDF files')
+    Parser.add_argument('--expressions', type=int, default=5000, help='Generated expressions')
+    Parser.add_argument('--repeat', type=int, default=5, help='Times the expression set is evaluated')
+    Args = Parser.parse_args()
+    if Args.file:
+        ExprList, Symbols = GatherExpressions(Args.file)
+    else:
+        ExprList, Symbols = GenerateExpressions(Args.expressions)
+    if not ExprList:
+        print("No expression found")
+        return
+    ColdTime, ColdResults = Measure(ExprList, Symbols, Args.repeat, True)
+    Measure(ExprList, Symbols, 1, False)
+    WarmTime, WarmResults = Measure(ExprList, Symbols, Args.repeat, False)
+    assert ColdResults == WarmResults
+    print("expressions: %7d  evaluations: %7d  cold: %8.3fs  cached: %8.3fs  speedup: %6.1fx" %
+          (len(ExprList), len(ExprList) * Args.repeat, ColdTime, WarmTime, ColdTime / WarmTime))
+
+
+if __name__ == '__main__':
+    main()
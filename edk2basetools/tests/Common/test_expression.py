@@ -0,0 +1,88 @@
+# @file
+#  Unit tests of the expression result cache.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import unittest
+
+import edk2basetools.Common.GlobalData as GlobalData
+from edk2basetools.Common.Expression import ValueExpression, ValueExpressionEx, BadExpression, \
+    SymbolView, ExpressionCache, gExpressionCache, gMacroReplaceCache
+
+
+class TestExpressionCache(unittest.TestCase):
+    def setUp(self):
+        gExpressionCache.Clear()
+        gMacroReplaceCache.Clear()
+        self.symbols = {'TARGET': 'DEBUG', 'gTokenSpaceGuid.PcdA': '0x10',
+                        'gTokenSpaceGuid.PcdB': 'gTokenSpaceGuid.PcdA + 1'}
+
+    def test_macro_change(self):
+        Expr = '$(TARGET) == "DEBUG"'
+        self.assertTrue(ValueExpression(Expr, self.symbols)())
+        self.assertTrue(ValueExpression(Expr, self.symbols)())
+        self.symbols['TARGET'] = 'RELEASE'
+        self.assertFalse(ValueExpression(Expr, self.symbols)())
+
+    def test_pcd_change(self):
+        Expr = 'gTokenSpaceGuid.PcdB * 2'
+        self.assertEqual(ValueExpression(Expr, self.symbols)(True), '34')
+        self.symbols['gTokenSpaceGuid.PcdA'] = '0x20'
+        self.assertEqual(ValueExpression(Expr, self.symbols)(True), '66')
+
+    def test_undefined_symbol(self):
+        Expr = 'gTokenSpaceGuid.PcdC == 1'
+        self.assertRaises(BadExpression, ValueExpression(Expr, self.symbols))
+        self.symbols['gTokenSpaceGuid.PcdC'] = '1'
+        self.assertTrue(ValueExpression(Expr, self.symbols)())
+
+    def test_symbol_table_not_changed(self):
+        Symbols = dict(self.symbols)
+        ValueExpression('gTokenSpaceGuid.PcdA AND TRUE', self.symbols)()
+        self.assertEqual(Symbols, self.symbols)
+
+    def test_value_expression_ex(self):
+        Expr = ('gTokenSpaceGuid.PcdA', 'UINT8')
+        self.assertEqual(ValueExpressionEx(Expr[0], Expr[1], self.symbols)(True), '16')
+        self.symbols['gTokenSpaceGuid.PcdA'] = '0x30'
+        self.assertEqual(ValueExpressionEx(Expr[0], Expr[1], self.symbols)(True), '48')
+        self.assertEqual(ValueExpressionEx('{0x1, 0x2}', 'VOID*', self.symbols)(True), '{0x1, 0x2}')
+
+    def test_conditional_pcds(self):
+        PlatformPcds = GlobalData.gPlatformPcds
+        ConditionalPcds = GlobalData.gConditionalPcds
+        try:
+            Expr = 'gTokenSpaceGuid.PcdA == 0x10'
+            ValueExpression(Expr, self.symbols)()
+            GlobalData.gPlatformPcds['gTokenSpaceGuid.PcdA'] = '0x10'
+            ValueExpression(Expr, self.symbols)()
+            self.assertIn('gTokenSpaceGuid.PcdA', GlobalData.gConditionalPcds)
+        finally:
+            GlobalData.gPlatformPcds.pop('gTokenSpaceGuid.PcdA', None)
+            if 'gTokenSpaceGuid.PcdA' in ConditionalPcds:
+                ConditionalPcds.remove('gTokenSpaceGuid.PcdA')
+            self.assertIs(PlatformPcds, GlobalData.gPlatformPcds)
+
+    def test_symbol_view(self):
+        View = SymbolView({'A': '1'})
+        self.assertIn('A', View)
+        self.assertNotIn('B', View)
+        self.assertTrue(View.Match({'A': '1'}))
+        self.assertFalse(SymbolView({'A': '2', 'B': '0'}).Match(View.Reads))
+
+    def test_lru_eviction(self):
+        Cache = ExpressionCache(2)
+        Cache.Set('a', 1)
+        Cache.Set('b', 2)
+        Cache.Get('a')
+        Cache.Set('c', 3)
+        self.assertEqual(Cache.Get('a'), 1)
+        self.assertIsNone(Cache.Get('b'))
+        self.assertEqual(Cache.Get('c'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# @file
+#  Unit tests of loading and saving the stores kept in files across builds.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from edk2basetools.Common.PersistentStore import FileStamp, LoadStore, SaveStore, StableEntries
+
+
+class TestPersistentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = os.path.join(self.tmpdir, "Test.cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_load_and_save(self):
+        self.assertIsNone(LoadStore(self.store, 1, "test store"))
+        self.assertTrue(SaveStore(self.store, (1, "md5"), {"A": 1}, "test store"))
+        self.assertEqual(LoadStore(self.store, (1, "md5"), "test store"), {"A": 1})
+        self.assertIsNone(LoadStore(self.store, (2, "md5"), "test store"))
+        self.assertEqual(os.listdir(self.tmpdir), ["Test.cache"])
+
+        with open(self.store, "wb") as fd:
+            fd.write(b"garbage")
+        self.assertIsNone(LoadStore(self.store, (1, "md5"), "test store"))
+        self.assertFalse(SaveStore(os.path.join(self.tmpdir, "None", "Test.cache"), 1, {}, "test store"))
+
+    def test_stable_entries(self):
+        old = os.path.join(self.tmpdir, "Old.c")
+        new = os.path.join(self.tmpdir, "New.c")
+        for path in (old, new):
+            with open(path, "w") as fd:
+                fd.write(path)
+        past = time.time() - 10
+        os.utime(old, (past, past))
+        entries = {old: (FileStamp(old), "old"), new: (FileStamp(new), "new"), "None.c": (FileStamp("None.c"), None)}
+        self.assertEqual(StableEntries(entries), {old: entries[old]})
+
+
+if __name__ == '__main__':
+    unittest.main()
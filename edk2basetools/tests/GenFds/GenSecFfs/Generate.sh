@@ -0,0 +1,18 @@
+#!/bin/sh
+## @file
+#  Generate the expected outputs of test_gensecffs.py with the GenSec and
+#  GenFfs tools of BaseTools, which have to be found in PATH. Image.efi,
+#  Ui.sec, Te.sec and Guid.sec are the inputs.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+set -e
+cd "$(dirname "$0")"
+FILE_GUID=1B45CC0A-156A-428A-AF62-49864DA0E6E6
+
+GenSec -s EFI_SECTION_PE32 -o Pe32.sec Image.efi
+GenSec --sectionalign 1 --sectionalign 16 -o Aligned.sec Ui.sec Pe32.sec
+GenSec --sectionalign 1 --sectionalign 32 -o TeAligned.sec Ui.sec Te.sec
+GenSec --sectionalign 1 --sectionalign 16 -o GuidAligned.sec Ui.sec Guid.sec
+GenFfs -t EFI_FV_FILETYPE_DRIVER -g $FILE_GUID -s -o Driver.ffs -i Ui.sec -i Pe32.sec -n 16
+GenFfs -t EFI_FV_FILETYPE_PEIM -g $FILE_GUID -o Peim.ffs -i Ui.sec -i Te.sec -n 32
@@ -0,0 +1,92 @@
+# @file
+#  Unit tests of the manifest GenFds uses to skip the images unchanged since
+#  the last build.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import os
+import shutil
+import tempfile
+import unittest
+
+from edk2basetools.Common.PersistentStore import FileStamp
+from edk2basetools.GenFds.BuildManifest import BuildManifest
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = os.path.join(self.tmpdir, "GenFds.manifest")
+        self.input = self.write("Image.efi", b"MZ" + b"\0" * 30)
+        self.output = os.path.join(self.tmpdir, "Image.pe32")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "wb") as fd:
+            fd.write(data)
+        return path
+
+    def generate(self, manifest, command):
+        if manifest.NeedsUpdate(self.output, [self.input], command):
+            self.write("Image.pe32", b"\x24\x00\x00\x10" + open(self.input, "rb").read())
+            manifest.Update(self.output)
+            return True
+        return False
+
+    def test_needs_update(self):
+        command = ["GenSec", "-s", "EFI_SECTION_PE32", "-o", self.output, self.input]
+        manifest = BuildManifest(self.store)
+        self.assertTrue(self.generate(manifest, command))
+        self.assertFalse(self.generate(manifest, command))
+        manifest.Save()
+
+        # time stamps don't matter, only contents and command do
+        os.utime(self.input, (0, 0))
+        manifest = BuildManifest(self.store)
+        self.assertFalse(self.generate(manifest, command))
+        self.assertTrue(self.generate(manifest, command + ["--verbose"]))
+        self.write("Image.efi", b"MZ" + b"\1" * 30)
+        self.assertTrue(self.generate(manifest, command + ["--verbose"]))
+        self.write("Image.pe32", b"")
+        self.assertTrue(self.generate(manifest, command + ["--verbose"]))
+        # not recorded if the output is not generated
+        manifest.NeedsUpdate(self.output, [self.input], command)
+        self.assertTrue(manifest.NeedsUpdate(self.output, [self.input], command))
+        self.assertTrue(manifest.NeedsUpdate(self.output, [os.path.join(self.tmpdir, "None.efi")], command))
+
+    def write_fd(self, manifest, fd_file, data, regions):
+        manifest.WriteFd(fd_file, self.write("Platform.fd.tmp", data), regions)
+        self.assertFalse(os.path.exists(fd_file + ".tmp"))
+
+    def test_write_fd(self):
+        fd_file = os.path.join(self.tmpdir, "Platform.fd")
+        regions = [(0, 16), (16, 16), (32, 32)]
+        data = bytes(range(64))
+        manifest = BuildManifest(self.store)
+        self.write_fd(manifest, fd_file, data, regions)
+        self.assertEqual(open(fd_file, "rb").read(), data)
+        manifest.Save()
+
+        # only the changed region is copied into the existing file, which
+        # is detected by writing a marker into the unchanged regions
+        with open(fd_file, "r+b") as fd:
+            fd.write(b"\xff")
+        manifest = BuildManifest(self.store)
+        manifest._Entries[fd_file] = manifest._Entries[fd_file][:2] + (FileStamp(fd_file),)
+        data = data[:16] + b"\xee" * 16 + data[32:]
+        self.write_fd(manifest, fd_file, data, regions)
+        self.assertEqual(open(fd_file, "rb").read(), b"\xff" + data[1:])
+
+        # the whole file is replaced if the layout is changed
+        self.write_fd(manifest, fd_file, data[:48], [(0, 32), (32, 16)])
+        self.assertEqual(open(fd_file, "rb").read(), data[:48])
+
+
+if __name__ == '__main__':
+    unittest.main()
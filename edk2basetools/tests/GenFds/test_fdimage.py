@@ -0,0 +1,67 @@
+# @file
+#  Unit tests of copying the images of regions into FD file.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from edk2basetools.GenFds import FdImage
+
+
+class TestFdImage(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.data = os.urandom(0x3000)
+        self.image = os.path.join(self.tmpdir, "Image.fv")
+        with open(self.image, "wb") as fd:
+            fd.write(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_append_file(self):
+        buffer = io.BytesIO(b"\xff" * 4)
+        buffer.seek(4)
+        self.assertEqual(FdImage.AppendFile(buffer, self.image), len(self.data))
+        self.assertEqual(buffer.getvalue(), b"\xff" * 4 + self.data)
+
+        fd_file = os.path.join(self.tmpdir, "Platform.fd")
+        with open(fd_file, "w+b") as buffer:
+            buffer.truncate(0x4000)
+            buffer.write(b"\xff" * 4)
+            FdImage.AppendFile(buffer, self.image)
+            buffer.write(b"\xee" * 4)
+            self.assertEqual(buffer.tell(), len(self.data) + 8)
+        with open(fd_file, "rb") as fd:
+            self.assertEqual(fd.read(), b"\xff" * 4 + self.data + b"\xee" * 4 + b"\0" * (0x1000 - 8))
+
+    def test_copy_file_range(self):
+        fd_file = os.path.join(self.tmpdir, "Platform.fd")
+        with open(fd_file, "wb") as fd:
+            fd.write(b"\0" * 0x2000)
+        with open(self.image, "rb") as src, open(fd_file, "r+b") as dst:
+            FdImage.CopyFileRange(src, dst, 0x1000, 0x1800, 0x800)
+        with open(fd_file, "rb") as fd:
+            self.assertEqual(fd.read(), b"\0" * 0x800 + self.data[0x1800:0x2800] + b"\0" * 0x800)
+
+    def test_update_file(self):
+        fd_file = os.path.join(self.tmpdir, "Platform.fd")
+        new_file = os.path.join(self.tmpdir, "Platform.fd.tmp")
+        shutil.copy(self.image, new_file)
+        self.assertTrue(FdImage.UpdateFile(fd_file, new_file))
+        shutil.copy(self.image, new_file)
+        self.assertFalse(FdImage.UpdateFile(fd_file, new_file))
+        self.assertFalse(os.path.exists(new_file))
+        with open(fd_file, "rb") as fd:
+            self.assertEqual(fd.read(), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
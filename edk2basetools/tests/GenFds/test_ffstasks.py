@@ -0,0 +1,53 @@
+# @file
+#  Unit tests of running the tasks generating FFS files of an FV concurrently.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import unittest
+
+from edk2basetools.GenFds.GenFdsGlobalVariable import GenFdsGlobalVariable
+
+
+class TestFfsTasks(unittest.TestCase):
+    def setUp(self):
+        self.saved = (GenFdsGlobalVariable.ThreadNumber, GenFdsGlobalVariable.EnableGenfdsMultiThread,
+                      GenFdsGlobalVariable.LargeFileInFvFlags)
+        GenFdsGlobalVariable.ThreadNumber = 4
+        GenFdsGlobalVariable.EnableGenfdsMultiThread = False
+        GenFdsGlobalVariable.LargeFileInFvFlags = [False]
+
+    def tearDown(self):
+        (GenFdsGlobalVariable.ThreadNumber, GenFdsGlobalVariable.EnableGenfdsMultiThread,
+         GenFdsGlobalVariable.LargeFileInFvFlags) = self.saved
+
+    def large_file(self):
+        GenFdsGlobalVariable.GetLargeFileInFvFlags()[-1] = True
+        return "Large.ffs"
+
+    def nested_fv(self):
+        # a large file in a nested FV is not in the FV of calling thread
+        LargeFileInFvFlags = GenFdsGlobalVariable.GetLargeFileInFvFlags()
+        LargeFileInFvFlags.append(False)
+        self.large_file()
+        self.assertTrue(LargeFileInFvFlags.pop())
+        return "Nested.ffs"
+
+    def test_result_order(self):
+        TaskList = [(True, lambda Index=Index: "%d.ffs" % Index) for Index in range(8)]
+        self.assertEqual(GenFdsGlobalVariable.RunFfsTasks(TaskList), ["%d.ffs" % Index for Index in range(8)])
+        self.assertEqual(GenFdsGlobalVariable.LargeFileInFvFlags, [False])
+
+    def test_large_file(self):
+        self.assertEqual(GenFdsGlobalVariable.RunFfsTasks([(True, self.nested_fv), (True, self.nested_fv)]),
+                         ["Nested.ffs", "Nested.ffs"])
+        self.assertEqual(GenFdsGlobalVariable.LargeFileInFvFlags, [False])
+        self.assertEqual(GenFdsGlobalVariable.RunFfsTasks([(True, self.nested_fv), (True, self.large_file)]),
+                         ["Nested.ffs", "Large.ffs"])
+        self.assertEqual(GenFdsGlobalVariable.LargeFileInFvFlags, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
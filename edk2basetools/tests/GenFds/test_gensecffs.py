@@ -0,0 +1,150 @@
+# @file
+#  Unit tests of the sections and FFS files GenFds generates without GenSec
+#  and GenFfs. The outputs are also compared with the tools if they are found.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import unittest
+import uuid
+
+from edk2basetools.GenFds import GenSecFfs
+
+FILE_GUID = "1B45CC0A-156A-428A-AF62-49864DA0E6E6"
+# the inputs, and the expected outputs of the GenSec and GenFfs commands in
+# Generate.sh. The outputs were derived from GenSec.c and GenFfs.c, not made
+# by the tools, run Generate.sh with the tools to replace them.
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "GenSecFfs")
+
+
+class TestGenSecFfs(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.pe32 = self.write("Image.efi", b"MZ" + bytes(range(1, 31)))
+        self.ui = self.write("Ui.ui", b"\x0e\x00\x00\x15" + "Dxe\0".encode("utf-16-le") + b"\0\0")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "wb") as fd:
+            fd.write(data)
+        return path
+
+    def test_leaf_section(self):
+        data = GenSecFfs.GenSection("EFI_SECTION_PE32", [self.pe32])
+        self.assertEqual(data, b"\x24\x00\x00\x10" + b"MZ" + bytes(range(1, 31)))
+        self.assertIsNone(GenSecFfs.GenSection("EFI_SECTION_PE32", [self.pe32, self.ui]))
+        self.assertIsNone(GenSecFfs.GenSection("EFI_SECTION_PE32", [os.path.join(self.tmpdir, "None.efi")]))
+
+    def test_version_section(self):
+        expected = b"\x0e\x00\x00\x14" + b"\x05\x00" + "1.0\0".encode("utf-16-le")
+        self.assertEqual(GenSecFfs.GenVersionSection('"1.0"', "5"), expected)
+        # GenSec accepts only decimal build number
+        self.assertIsNone(GenSecFfs.GenVersionSection("1.0", "0x5"))
+        self.assertIsNone(GenSecFfs.GenVersionSection('"$(VERSION)"'))
+        self.assertIsNone(GenSecFfs.GenVersionSection("1.0", "70000"))
+
+    def test_compression_section(self):
+        # sections start at 4-byte boundary
+        data = GenSecFfs.GenSection("EFI_SECTION_COMPRESSION", [self.ui, self.pe32], "PI_NONE")
+        contents = open(self.ui, "rb").read() + b"\0\0" + open(self.pe32, "rb").read()
+        self.assertEqual(data, struct.pack("<3BBIB", 9 + len(contents), 0, 0, 0x01, len(contents), 0) + contents)
+        self.assertIsNone(GenSecFfs.GenSection("EFI_SECTION_COMPRESSION", [self.ui], "PI_STD"))
+
+    def test_section_alignment(self):
+        pe32 = self.write("Image.pe32", GenSecFfs.GenSection("EFI_SECTION_PE32", [self.pe32]))
+        data = GenSecFfs.GenSection(None, [self.ui, pe32], AlignList=["1", "16"])
+        # a raw section pads the data of PE32 section to 16-byte boundary
+        self.assertEqual(len(data), 16 + 12 + 36)
+        self.assertEqual(data[16:28], b"\x0c\x00\x00\x19" + b"\0" * 8)
+        self.assertEqual(data[28:], open(pe32, "rb").read())
+        self.assertIsNone(GenSecFfs.GenSection(None, [self.ui, pe32], AlignList=["1", "0"]))
+
+    def test_ffs(self):
+        pe32 = self.write("Image.pe32", GenSecFfs.GenSection("EFI_SECTION_PE32", [self.pe32]))
+        data = GenSecFfs.GenFfs("EFI_FV_FILETYPE_DRIVER", FILE_GUID, [self.ui, pe32], CheckSum=True,
+                                SectionAlign=[None, "16"])
+        contents = GenSecFfs.GenSection(None, [self.ui, pe32], AlignList=["1", "16"])
+        size = 24 + len(contents)
+        header = bytearray(uuid.UUID(FILE_GUID).bytes_le + struct.pack("<BBBB3BB", 0, 0, 0x07, 0x48, size, 0, 0, 0))
+        header[16] = -sum(header) & 0xFF
+        header[17] = -sum(contents) & 0xFF
+        header[23] = 0x07
+        self.assertEqual(data, bytes(header) + contents)
+
+        data = GenSecFfs.GenFfs("EFI_FV_FILETYPE_FREEFORM", FILE_GUID, [self.ui], Fixed=True, Align="64K")
+        self.assertEqual(data[19], 0x04 | (7 << 3))
+        self.assertEqual(data[17], 0xAA)
+        # a driver without image is reported by GenFfs
+        self.assertIsNone(GenSecFfs.GenFfs("EFI_FV_FILETYPE_DRIVER", FILE_GUID, [self.ui]))
+        self.assertIsNone(GenSecFfs.GenFfs("EFI_FV_FILETYPE_FREEFORM", "Guid", [self.ui]))
+
+    def test_large_guided_section(self):
+        # a section of 16M has EFI_COMMON_SECTION_HEADER2, the DataOffset of
+        # EFI_GUID_DEFINED_SECTION2 follows the extended size and the GUID
+        size = 0x1000000
+        guided = self.write("Large.sec", struct.pack("<3BBI", 0xFF, 0xFF, 0xFF, 0x02, size) +
+                            uuid.UUID(FILE_GUID).bytes_le + struct.pack("<HH", 28, 0x02) + b"\0" * (size - 28))
+        data = GenSecFfs.GenSection(None, [self.ui, guided], AlignList=["1", "16"])
+        # the data of guided section starts at 16-byte boundary after a 4-byte raw section
+        self.assertEqual(data[16:20], b"\x04\x00\x00\x19")
+        self.assertEqual(len(data), 20 + size)
+
+    def test_golden(self):
+        def Golden(name):
+            with open(os.path.join(GOLDEN_DIR, name), "rb") as fd:
+                return fd.read()
+
+        def Input(name):
+            return os.path.join(GOLDEN_DIR, name)
+
+        self.assertEqual(GenSecFfs.GenSection("EFI_SECTION_PE32", [Input("Image.efi")]), Golden("Pe32.sec"))
+        self.assertEqual(GenSecFfs.GenSection(None, [Input("Ui.sec"), Input("Pe32.sec")], AlignList=["1", "16"]),
+                         Golden("Aligned.sec"))
+        self.assertEqual(GenSecFfs.GenSection(None, [Input("Ui.sec"), Input("Te.sec")], AlignList=["1", "32"]),
+                         Golden("TeAligned.sec"))
+        self.assertEqual(GenSecFfs.GenSection(None, [Input("Ui.sec"), Input("Guid.sec")], AlignList=["1", "16"]),
+                         Golden("GuidAligned.sec"))
+        self.assertEqual(GenSecFfs.GenFfs("EFI_FV_FILETYPE_DRIVER", FILE_GUID, [Input("Ui.sec"), Input("Pe32.sec")],
+                                          CheckSum=True, SectionAlign=[None, "16"]),
+                         Golden("Driver.ffs"))
+        self.assertEqual(GenSecFfs.GenFfs("EFI_FV_FILETYPE_PEIM", FILE_GUID, [Input("Ui.sec"), Input("Te.sec")],
+                                          SectionAlign=[None, "32"]),
+                         Golden("Peim.ffs"))
+
+    @unittest.skipUnless(shutil.which("GenSec") and shutil.which("GenFfs"), "GenSec and GenFfs are not found")
+    def test_same_as_tools(self):
+        def Tool(*Args):
+            output = os.path.join(self.tmpdir, "Tool.out")
+            subprocess.check_call(list(Args) + ["-o", output])
+            with open(output, "rb") as fd:
+                return fd.read()
+
+        pe32 = self.write("Image.pe32", Tool("GenSec", "-s", "EFI_SECTION_PE32", self.pe32))
+        self.assertEqual(GenSecFfs.GenSection("EFI_SECTION_PE32", [self.pe32]), open(pe32, "rb").read())
+        self.assertEqual(GenSecFfs.GenVersionSection("1.0", "5"),
+                         Tool("GenSec", "-s", "EFI_SECTION_VERSION", "-n", "1.0", "-j", "5"))
+        self.assertEqual(GenSecFfs.GenSection(None, [self.ui, pe32], AlignList=["1", "16"]),
+                         Tool("GenSec", "--sectionalign", "1", "--sectionalign", "16", self.ui, pe32))
+        self.assertEqual(GenSecFfs.GenSection("EFI_SECTION_COMPRESSION", [self.ui, pe32], "PI_NONE"),
+                         Tool("GenSec", "-s", "EFI_SECTION_COMPRESSION", "-c", "PI_NONE", self.ui, pe32))
+        self.assertEqual(GenSecFfs.GenFfs("EFI_FV_FILETYPE_DRIVER", FILE_GUID, [self.ui, pe32], CheckSum=True,
+                                          SectionAlign=[None, "16"]),
+                         Tool("GenFfs", "-t", "EFI_FV_FILETYPE_DRIVER", "-g", FILE_GUID, "-s",
+                              "-i", self.ui, "-i", pe32, "-n", "16"))
+        self.assertEqual(GenSecFfs.GenFfs("EFI_FV_FILETYPE_FREEFORM", FILE_GUID, [self.ui], Fixed=True, Align="64K"),
+                         Tool("GenFfs", "-t", "EFI_FV_FILETYPE_FREEFORM", "-g", FILE_GUID, "-x", "-a", "64K",
+                              "-i", self.ui))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# @file
+#  Unit tests of the include cache of Trim.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import edk2basetools.Common.EdkLogger as EdkLogger
+from edk2basetools.Trim import Trim
+
+
+class TestIncludeCache(unittest.TestCase):
+    def setUp(self):
+        EdkLogger.Initialize()
+        EdkLogger.SetLevel(EdkLogger.ERROR)
+        self.tmpdir = tempfile.mkdtemp()
+        self.inc_dir = tempfile.mkdtemp()
+        self.write(os.path.join(self.inc_dir, "Common.asi"), "Name (A, 1)\n  Include (\"Leaf.asi\")\n")
+        self.write(os.path.join(self.inc_dir, "Leaf.asi"), "Name (B, 2)\n")
+        self.write("Dsdt.asl", "DefinitionBlock () {\n  Include (\"Common.asi\")\n#include \"Common.asi\"\n}\n")
+        self.include_path_file = self.write("Include.lst", "-I%s\n" % self.inc_dir)
+        Trim.gIncludeCache = Trim.IncludeCache()
+
+    def tearDown(self):
+        for path in (self.tmpdir, self.inc_dir):
+            if os.path.exists(path):
+                shutil.rmtree(path)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def trim(self):
+        source = os.path.join(self.tmpdir, "Dsdt.asl")
+        target = os.path.join(self.tmpdir, "Dsdt.iii")
+        Trim.TrimAslFile(source, target, self.include_path_file)
+        with open(target) as f:
+            lines = f.readlines()
+        with open(os.path.join(self.tmpdir, "Dsdt.asl.trim.deps")) as f:
+            deps = f.read().split(" \\\n")
+        return lines, deps
+
+    def test_expand_includes(self):
+        lines, deps = self.trim()
+        self.assertEqual(lines, ["#undef MIN\n", "#undef MAX\n", "DefinitionBlock () {\n",
+                                 "  Name (A, 1)\n", "    Name (B, 2)\n", "\n", "\n",
+                                 "Name (A, 1)\n", "  Name (B, 2)\n", "\n", "\n", "}\n"])
+        common = os.path.join(self.inc_dir, "Common.asi")
+        leaf = os.path.join(self.inc_dir, "Leaf.asi")
+        self.assertEqual(deps[1:], [common, leaf, common, leaf])
+
+    def test_circular_include(self):
+        self.write(os.path.join(self.inc_dir, "Leaf.asi"), "Include (\"Common.asi\")\n")
+        lines, deps = self.trim()
+        # the include of Common.asi in Leaf.asi is dropped
+        self.assertEqual(lines[2:7], ["DefinitionBlock () {\n", "  Name (A, 1)\n", "\n", "\n", "\n"])
+
+    def test_store_file(self):
+        store_file = os.path.join(self.tmpdir, "Include.cache")
+        # the entries of files modified just now are not saved
+        past = time.time() - 10
+        for name in ("Common.asi", "Leaf.asi"):
+            os.utime(os.path.join(self.inc_dir, name), (past, past))
+        Trim.gIncludeCache = Trim.IncludeCache(store_file)
+        expected = self.trim()
+        Trim.gIncludeCache.Save()
+        self.assertTrue(os.path.exists(store_file))
+
+        Trim.gIncludeCache = Trim.IncludeCache(store_file)
+        self.assertEqual(self.trim(), expected)
+        self.assertEqual(Trim.gIncludeCache._NewEntries.keys(), set([(os.path.join(self.tmpdir, "Dsdt.asl"), "ASL")]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+# @file
+#  Micro-benchmark of MetaFileTable: indexed queries vs. linear scan of the
+#  record lists, and memory of the compact record storage vs. the lists.
+#
+#  Usage:
+#    python bench_metafiletable.py [--dsc <Workspace> <PlatformDsc>] [--records N]
+#
+#  Without --dsc, a table shaped like a large platform DSC is generated.
+#  With --dsc (e.g. $WORKSPACE OvmfPkg/OvmfPkgX64.dsc), the raw and the
+#  post-processed tables of the given DSC file are measured.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import argparse
+import os
+import time
+import tracemalloc
+
+import edk2basetools.Common.GlobalData as GlobalData
+from edk2basetools.Common.DataType import TAB_ARCH_COMMON, TAB_COMMON
+from edk2basetools.Common.Misc import PathClass
+from edk2basetools.Common.MultipleWorkspace import MultipleWorkspace as mws
+from edk2basetools.CommonDataClass.DataClass import MODEL_EFI_LIBRARY_CLASS, MODEL_META_DATA_BUILD_OPTION, \
+    MODEL_META_DATA_COMPONENT, MODEL_META_DATA_HEADER, MODEL_PCD_DYNAMIC_DEFAULT, MODEL_PCD_FEATURE_FLAG, \
+    MODEL_PCD_FIXED_AT_BUILD
+from edk2basetools.Workspace.WorkspaceDatabase import WorkspaceDatabase
+from edk2basetools.Workspace.MetaFileTable import PlatformTable, RecordStore
+
+ARCH_LIST = ['IA32', 'X64', 'AARCH64']
+MODEL_LIST = [MODEL_PCD_FIXED_AT_BUILD, MODEL_PCD_FEATURE_FLAG, MODEL_PCD_DYNAMIC_DEFAULT,
+              MODEL_EFI_LIBRARY_CLASS, MODEL_META_DATA_COMPONENT, MODEL_META_DATA_BUILD_OPTION]
+
+
+## The linear scan PlatformTable.Query used before tables were indexed
+def ScanQuery(Content, Model, Scope1=None, Scope2=None, BelongsToItem=None, FromItem=None):
+    result = [item for item in Content if item[1] == Model and item[-1] > 0]
+    if Scope1 is not None and Scope1 != TAB_ARCH_COMMON:
+        Sc1 = set(['COMMON'])
+        Sc1.add(Scope1)
+        result = [item for item in result if item[5] in Sc1]
+    Sc2 = set(['COMMON', 'DEFAULT'])
+    if Scope2 and Scope2 != TAB_COMMON:
+        if '.' in Scope2:
+            Index = Scope2.index('.')
+            NewScope = TAB_COMMON + Scope2[Index:]
+            Sc2.add(NewScope)
+        Sc2.add(Scope2)
+        result = [item for item in result if item[6] in Sc2]
+    if BelongsToItem is not None:
+        result = [item for item in result if item[8] == BelongsToItem]
+    else:
+        result = [item for item in result if item[8] < 0]
+    if FromItem is not None:
+        result = [item for item in result if item[9] == FromItem]
+    return [[r[2], r[3], r[4], r[5], r[6], r[7], r[0], r[10]] for r in result]
+
+
+def GenerateTable(Records):
+    # the table only needs an existing file to be its meta file
+    Dir, Name = os.path.split(os.path.abspath(__file__))
+    mws.setWs(Dir)
+    Table = PlatformTable(WorkspaceDatabase(), PathClass(Name, Dir), True)
+    Owner = -1
+    for Index in range(Records):
+        Model = MODEL_LIST[Index % len(MODEL_LIST)]
+        Arch = TAB_ARCH_COMMON if Index % 3 else ARCH_LIST[Index % len(ARCH_LIST)]
+        Id = Table.Insert(Model, 'Value%d' % Index, 'gTokenSpaceGuid', '', Arch, TAB_COMMON, BelongsToItem=Owner,
+                          StartLine=Index)
+        # every tenth component carries a sub-section of overrides
+        if Model == MODEL_META_DATA_COMPONENT:
+            Owner = Id if Index % 10 == 4 else -1
+        elif Owner >= 0 and Index % 7 == 0:
+            Owner = -1
+    Table.SetEndFlag()
+    return Table
+
+
+def ParseDsc(Workspace, DscFile):
+    from edk2basetools.Workspace.WorkspaceDatabase import BuildDB
+    os.environ['WORKSPACE'] = Workspace
+    mws.setWs(Workspace, os.getenv('PACKAGES_PATH'))
+    GlobalData.gWorkspace = Workspace
+    GlobalData.gGlobalDefines['WORKSPACE'] = Workspace
+    Platform = BuildDB.BuildObject[PathClass(DscFile, Workspace), TAB_COMMON]
+    RawData = Platform._RawData
+    RawData.StartParse()
+    TableList = [('raw', RawData._RawTable)]
+    try:
+        RawData[MODEL_META_DATA_HEADER, ARCH_LIST[1]]
+        TableList.append(('post-processed', RawData._Table))
+    except Exception as Exc:
+        print("Post-process of %s failed: %s" % (DscFile, Exc))
+    return TableList
+
+
+## Copy records as the parser produces them, i.e. with string objects of their own
+def CopyRecords(Table):
+    return [[(Value + ' ')[:-1] if isinstance(Value, str) else Value for Value in Record]
+            for Record in Table.CurrentContent]
+
+
+## Memory of the records kept in lists of lists and in RecordStore
+def MeasureMemory(Table):
+    RecordList = CopyRecords(Table)
+    tracemalloc.start()
+    Content = []
+    for Record in RecordList:
+        Content.append([(Value + ' ')[:-1] if isinstance(Value, str) else Value + 0 for Value in Record])
+    ListSize = tracemalloc.get_traced_memory()[0]
+    del Content
+    tracemalloc.stop()
+    tracemalloc.start()
+    Content = RecordStore(Table._COLUMN_TYPE_)
+    for Record in RecordList:
+        Content.append([(Value + ' ')[:-1] if isinstance(Value, str) else Value + 0 for Value in Record])
+    StoreSize = tracemalloc.get_traced_memory()[0]
+    del Content
+    tracemalloc.stop()
+    return ListSize, StoreSize
+
+
+def Measure(Function, QueryList, Repeat):
+    Start = time.perf_counter()
+    for _ in range(Repeat):
+        for Args in QueryList:
+            Function(*Args)
+    return time.perf_counter() - Start
+
+
+def Benchmark(Name, Table, Repeat):
+    Owners = sorted(set(Record[8] for Record in Table.CurrentContent if Record[8] >= 0))[:50]
+    QueryList = []
+    for Model in sorted(set(Record[1] for Record in Table.CurrentContent if Record[1] >= 0)):
+        QueryList.append((Model,))
+        for Arch in ARCH_LIST:
+            QueryList.append((Model, Arch))
+            QueryList.append((Model, Arch, None, -1))
+            QueryList.extend((Model, Arch, None, Owner) for Owner in Owners)
+    Content = CopyRecords(Table)
+    for Args in QueryList:
+        assert Table.Query(*Args) == ScanQuery(Content, *Args), Args
+    Indexed = Measure(Table.Query, QueryList, Repeat)
+    Scanned = Measure(lambda *Args: ScanQuery(Content, *Args), QueryList, Repeat)
+    print("%-16s records: %7d  queries: %7d  scan: %8.3fs  indexed: %8.3fs  speedup: %6.1fx" %
+          (Name, len(Table.CurrentContent), len(QueryList) * Repeat, Scanned, Indexed, Scanned / Indexed))
+    ListSize, StoreSize = MeasureMemory(Table)
+    print("%-16s memory   lists: %10d bytes  compact: %10d bytes  saved: %5.1f%%" %
+          (Name, ListSize, StoreSize, 100.0 * (ListSize - StoreSize) / ListSize))
+
+
+def main():
+    Parser = argparse.ArgumentParser(description='MetaFileTable query benchmark')
+    Parser.add_argument('--dsc', nargs=2, metavar=('WORKSPACE', 'DSC'), help='Measure tables of a platform DSC file')
+    Parser.add_argument('--records', type=int, default=20000, help='Records of the generated table')
+    Parser.add_argument('--repeat', type=int, default=3, help='Times each query set is repeated')
+    Args = Parser.parse_args()
+    if Args.dsc:
+        TableList = ParseDsc(*Args.dsc)
+    else:
+        TableList = [('generated', GenerateTable(Args.records))]
+    for Name, Table in TableList:
+        Benchmark(Name, Table, Args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# @file
+#  Unit tests of the persistent meta-file cache.
+#
+#  SPDX-License-Identifier: BSD-2-Clause-Patent
+#
+##
+
+# Import Modules
+import os
+import shutil
+import tempfile
+import unittest
+
+import edk2basetools.Common.GlobalData as GlobalData
+from edk2basetools.Common.Misc import PathClass
+from edk2basetools.CommonDataClass.DataClass import MODEL_EFI_SOURCE_FILE, MODEL_META_DATA_COMMENT
+from edk2basetools.Workspace.WorkspaceDatabase import WorkspaceDatabase
+from edk2basetools.Workspace.MetaFileTable import ModuleTable
+from edk2basetools.Workspace.MetaFileCache import MetaFileCache
+
+
+class TestMetaFileCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.inf_file = os.path.join(self.tmpdir, "Module.inf")
+        with open(self.inf_file, "w") as f:
+            f.write("[Sources]\n  Module.c\n")
+        self.cache_file = os.path.join(self.tmpdir, "MetaFile.cache")
+        GlobalData.gGlobalDefines = {}
+
+    def tearDown(self):
+        if os.path.exists(self.tmpdir):
+            shutil.rmtree(self.tmpdir)
+
+    def create_table(self):
+        return ModuleTable(WorkspaceDatabase(), PathClass("Module.inf", self.tmpdir), False)
+
+    def parse_table(self, cache):
+        table = self.create_table()
+        self.assertFalse(cache.Restore(table))
+        owner = table.Insert(MODEL_EFI_SOURCE_FILE, "Module.c", "", "", StartLine=2, EndLine=2)
+        table.Insert(MODEL_META_DATA_COMMENT, "## comment", "", "", BelongsToItem=owner)
+        table.SetEndFlag()
+        return table
+
+    def test_restore_unchanged_file(self):
+        cache = MetaFileCache(self.cache_file)
+        cache.Save([self.parse_table(cache)])
+
+        table = self.create_table()
+        self.assertTrue(MetaFileCache(self.cache_file).Restore(table))
+        self.assertTrue(table.IsIntegrity())
+        source = table.Query(MODEL_EFI_SOURCE_FILE)
+        self.assertEqual([r[0] for r in source], ["Module.c"])
+        comment = table.Query(MODEL_META_DATA_COMMENT, BelongsToItem=source[0][5])
+        self.assertEqual([r[0] for r in comment], ["## comment"])
+
+    def test_changed_file(self):
+        cache = MetaFileCache(self.cache_file)
+        cache.Save([self.parse_table(cache)])
+        with open(self.inf_file, "a") as f:
+            f.write("  Other.c\n")
+        self.assertFalse(MetaFileCache(self.cache_file).Restore(self.create_table()))
+
+    def test_changed_macros(self):
+        cache = MetaFileCache(self.cache_file)
+        cache.Save([self.parse_table(cache)])
+        GlobalData.gGlobalDefines = {"TARGET": "DEBUG"}
+        self.assertFalse(MetaFileCache(self.cache_file).Restore(self.create_table()))
+
+
+if __name__ == '__main__':
+    unittest.main()